@@ -5,37 +5,104 @@ Este script analisa os dados de turismo em Las Vegas, já pré-processados,
 para identificar o impacto dos shows do BTS em abril de 2022.
 
 O fluxo de trabalho é:
-1. Carregar o arquivo CSV consolidado de 'data/processed'.
+1. Carregar o store tipado consolidado de 'data/processed', já filtrado
+   pelas métricas pedidas.
 2. Gerar gráficos comparativos que mostram a evolução das métricas ao
    longo dos anos, permitindo uma análise visual do impacto do evento
    em relação a outros períodos.
-3. Calcular e exibir estatísticas comparativas.
+3. Calcular e exibir estatísticas comparativas e, opcionalmente, o impacto
+   de uma tabela inteira de eventos (ver `event_impact`).
 
 A refatoração tornou este script focado apenas na análise e visualização,
 removendo a complexidade do tratamento de dados brutos.
 """
 
 import argparse
+import functools
+import hashlib
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
 from typing import Optional
 
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+import instrumentation
 from config import DATA_PROCESSED, GRAPH_OUTPUT
+from event_impact import (
+    compute_event_impacts,
+    impact_significance,
+    load_events,
+    save_impacts,
+)
+from tourism_store import load_store, long_to_wide
 from utils import time_function, profile_function
 
 # --- Constantes de Análise ---
-PROCESSED_DATA_FILE = DATA_PROCESSED / "vegas_tourism_yearly.csv"
+PROCESSED_DATA_FILE = DATA_PROCESSED / "vegas_tourism.parquet"
+REGION = "Las Vegas"
 EVENT_NAME = "Shows BTS"
 EVENT_YEAR = 2022
 EVENT_MONTH = 4
+PLOT_STYLE = {"style": "whitegrid", "palette": "viridis"}
+# Versão do layout dos gráficos: incremente ao mudar o código de plotagem para
+# invalidar o cache de renderização.
+RENDER_CACHE_VERSION = 1
 
-def load_data() -> Optional[pd.DataFrame]:
+# Pivô mensal, pasta de saída e uso do cache de cada processo de renderização
+# (ver `render_charts`)
+_worker_pivot: Optional[pd.DataFrame] = None
+_worker_output_dir: Optional[Path] = None
+_worker_use_cache: bool = True
+
+
+@functools.lru_cache(maxsize=None)
+def _load_plotting():
+    """Importa matplotlib.pyplot e seaborn na primeira vez que são usados.
+
+    As duas bibliotecas custam boa parte do tempo de inicialização e só são
+    necessárias quando algum gráfico é de fato renderizado.
+    """
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    return plt, sns
+
+
+def __getattr__(name):
+    # ``analyze_processed_data.plt`` e ``.sns`` carregam os módulos sob demanda
+    if name == "plt":
+        return _load_plotting()[0]
+    elif name == "sns":
+        return _load_plotting()[1]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _plotting():
+    """``(plt, sns)`` lidos como atributos do módulo (respeita substituições em testes)."""
+    module = sys.modules[__name__]
+    return module.plt, module.sns
+
+def load_data(
+    metrics: Optional[list[str]] = None,
+    region: str = REGION,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+) -> Optional[pd.DataFrame]:
     """Carrega os dados processados e prepara o índice.
 
+    Lê o store tipado em Parquet (ver `tourism_store`), aplicando os filtros
+    de métricas, região e datas na própria leitura, e devolve a tabela larga
+    da região indexada por data. Arquivos ``.csv`` no formato largo antigo
+    continuam aceitos (sem filtros).
+
     Retorna ``None`` se o arquivo não for encontrado.
     """
     try:
+        if Path(PROCESSED_DATA_FILE).suffix == ".parquet":
+            store = load_store(
+                PROCESSED_DATA_FILE, metrics=metrics, regions=[region], start=start, end=end
+            )
+            return long_to_wide(store, region)
         df = pd.read_csv(PROCESSED_DATA_FILE, parse_dates=['Date'], index_col='Date')
         return df
     except FileNotFoundError:
@@ -43,16 +110,72 @@ def load_data() -> Optional[pd.DataFrame]:
         print("Por favor, execute o script 'preprocess_vegas_data.py' primeiro.")
         return None
 
-def plot_yearly_comparison(df: pd.DataFrame, metric: str, title: str, ylabel: str):
+def build_monthly_pivot(df: pd.DataFrame, metrics: list[str]) -> pd.DataFrame:
+    """Pivô mês × ano de todas as métricas, calculado uma única vez.
+
+    Retorna um DataFrame indexado pelo mês (1-12) com colunas
+    ``MultiIndex`` (métrica, ano). ``pivot[metric]`` equivale ao
+    ``pivot_table(index=mês, columns=ano, values=metric)`` da métrica, e o
+    agrupamento por mês/ano é feito uma vez só para todas as métricas.
+    """
+    grouped = df[metrics].groupby([df.index.month, df.index.year]).mean()
+    grouped.index.names = ["Month", "Year"]
+    pivot = grouped.unstack("Year")
+    pivot.columns.names = ["Metric", "Year"]
+    return pivot
+
+def metric_pivot(pivot: pd.DataFrame, metric: str) -> pd.DataFrame:
+    """Extrai o pivô mês × ano de uma métrica, sem meses ou anos vazios."""
+    return pivot[metric].dropna(how="all").dropna(axis=1, how="all")
+
+def chart_hash(df_pivot: pd.DataFrame, title: str, ylabel: str) -> str:
+    """Hash do conteúdo de um gráfico: dados pivotados e parâmetros de plotagem."""
+    h = hashlib.sha256()
+    params = (RENDER_CACHE_VERSION, title, ylabel, EVENT_NAME, EVENT_YEAR, EVENT_MONTH, PLOT_STYLE)
+    h.update(repr(params).encode())
+    h.update(repr((df_pivot.index.tolist(), df_pivot.columns.tolist())).encode())
+    h.update(df_pivot.to_numpy(dtype="float64").tobytes())
+    return h.hexdigest()
+
+def plot_yearly_comparison(
+    df: Optional[pd.DataFrame],
+    metric: str,
+    title: str,
+    ylabel: str,
+    output_dir: Optional[Path] = None,
+    use_cache: bool = True,
+    pivot: Optional[pd.DataFrame] = None,
+):
     """
     Gera um gráfico de linha comparando uma métrica ao longo dos meses
     para cada ano disponível nos dados.
+
+    O arquivo é salvo em ``output_dir`` (padrão: `GRAPH_OUTPUT`). Com
+    ``use_cache``, a renderização é pulada quando o PNG existente foi gerado
+    a partir dos mesmos dados e parâmetros (ver `chart_hash`).
+
+    Se ``pivot`` (de `build_monthly_pivot`) for informado, ele é usado no
+    lugar de ``df``, evitando recalcular o agrupamento por mês/ano.
+
+    Retorna o caminho do PNG (renderizado ou mantido do cache).
     """
-    plt.figure(figsize=(14, 8))
-    
     # Usa pivot para ter anos como colunas e meses como linhas
-    df_pivot = df.pivot_table(index=df.index.month, columns=df.index.year, values=metric)
-    
+    if pivot is None:
+        pivot = build_monthly_pivot(df, [metric])
+    df_pivot = metric_pivot(pivot, metric)
+
+    filename = (output_dir or GRAPH_OUTPUT) / f"comparison_{metric.replace(' ', '_').lower()}.png"
+    hash_file = filename.with_name(filename.name + ".sha256")
+    digest = chart_hash(df_pivot, title, ylabel)
+    if use_cache and filename.exists() and hash_file.exists() and hash_file.read_text() == digest:
+        instrumentation.count("charts.cache_hits")
+        print(f"Gráfico inalterado, mantido: {filename}")
+        return filename
+
+    plt, sns = _plotting()
+    instrumentation.count("charts.rendered")
+    plt.figure(figsize=(14, 8))
+
     sns.lineplot(data=df_pivot, markers=True, dashes=False)
 
     # Destaque para o ponto do evento (Abril de 2022), se disponível
@@ -74,54 +197,143 @@ def plot_yearly_comparison(df: pd.DataFrame, metric: str, title: str, ylabel: st
     plt.legend(title="Ano")
     plt.grid(True, which='both', linestyle='--', linewidth=0.5)
     plt.tight_layout()
-    
-    filename = GRAPH_OUTPUT / f"comparison_{metric.replace(' ', '_').lower()}.png"
+
     plt.savefig(filename)
     plt.close()
+    hash_file.write_text(digest)
     print(f"Gráfico salvo em: {filename}")
+    return filename
+
+def _init_render_worker(pivot: pd.DataFrame, output_dir: Path, use_cache: bool):
+    """Prepara um processo de renderização: backend Agg e dados compartilhados."""
+    global _worker_pivot, _worker_output_dir, _worker_use_cache
+    import matplotlib
+
+    matplotlib.use("Agg")
+    _, sns = _plotting()
+    sns.set(**PLOT_STYLE)
+    _worker_pivot = pivot
+    _worker_output_dir = output_dir
+    _worker_use_cache = use_cache
+
+
+def _render_metric(metric: str):
+    """Renderiza o gráfico de uma métrica dentro de um processo de renderização."""
+    return plot_yearly_comparison(
+        None,
+        metric=metric,
+        title=f"Comparativo Anual de {metric}",
+        ylabel=metric,
+        output_dir=_worker_output_dir,
+        use_cache=_worker_use_cache,
+        pivot=_worker_pivot,
+    )
+
 
-def comparative_analysis(df: pd.DataFrame, metrics: list[str]):
-    """Imprime uma análise comparativa do mês do evento."""
+def render_charts(
+    df: pd.DataFrame,
+    metrics: list[str],
+    jobs: int = 1,
+    use_cache: bool = True,
+    pivot: Optional[pd.DataFrame] = None,
+):
+    """Gera o gráfico comparativo de cada métrica.
+
+    Com ``jobs > 1`` os gráficos são renderizados num pool de processos:
+    cada processo usa o backend não interativo Agg e cria as próprias
+    figuras, e o pivô mensal é enviado uma única vez por processo.
+    Retorna os caminhos dos gráficos, na ordem de ``metrics``.
+    """
+    if pivot is None:
+        pivot = build_monthly_pivot(df, metrics)
+
+    if jobs <= 1 or len(metrics) <= 1:
+        return [
+            plot_yearly_comparison(
+                df,
+                metric=metric,
+                title=f"Comparativo Anual de {metric}",
+                ylabel=metric,
+                use_cache=use_cache,
+                pivot=pivot,
+            )
+            for metric in metrics
+        ]
+
+    with ProcessPoolExecutor(
+        max_workers=min(jobs, len(metrics)),
+        initializer=_init_render_worker,
+        initargs=(pivot, GRAPH_OUTPUT, use_cache),
+    ) as executor:
+        # list() propaga exceções levantadas nos processos
+        return list(executor.map(_render_metric, metrics))
+
+
+def comparative_analysis(
+    df: pd.DataFrame, metrics: list[str], pivot: Optional[pd.DataFrame] = None
+):
+    """Imprime uma análise comparativa do mês do evento.
+
+    Lê os valores do pivô mês × ano (`build_monthly_pivot`), calculado aqui
+    se não for informado. Para vários eventos, veja `event_impact`.
+    """
     print("\n" + "=" * 60)
     print(f"🔎 Análise de Impacto Quantitativo: {EVENT_NAME} (Abril de {EVENT_YEAR})")
     print("=" * 60)
 
-    # Filtra dados do evento
-    event_data = df[(df.index.year == EVENT_YEAR) & (df.index.month == EVENT_MONTH)]
-
-    # Filtra dados para o mesmo mês em outros anos
-    april_other_years = df[(df.index.month == EVENT_MONTH) & (df.index.year != EVENT_YEAR)]
+    metrics = [metric for metric in metrics if metric in df.columns]
+    if pivot is None:
+        pivot = build_monthly_pivot(df, metrics)
 
-    if event_data.empty:
+    if EVENT_MONTH not in pivot.index or EVENT_YEAR not in pivot.columns.get_level_values("Year"):
         print(
             f"Aviso: não há dados para {EVENT_MONTH:02d}/{EVENT_YEAR}. "
             "Análise comparativa não realizada."
         )
         return
 
-    for metric in metrics:
-        if metric not in df.columns:
-            continue
+    # Todas as métricas de uma vez pelo motor vetorizado de impacto
+    event = pd.DataFrame({"Event": [EVENT_NAME], "Year": [EVENT_YEAR], "Month": [EVENT_MONTH]})
+    impacts = compute_event_impacts(pivot, event).set_index("Metric")
 
-        event_value = event_data[metric].iloc[0]
-        avg_april_others = april_other_years[metric].mean()
-        if pd.isna(event_value) or pd.isna(avg_april_others):
+    for metric in metrics:
+        if metric not in impacts.index:
             continue
-
-        diff_vs_other_aprils = ((event_value - avg_april_others) / avg_april_others) * 100
+        row = impacts.loc[metric]
 
         print(f"\n--- {metric} ---")
-        print(f"  - Valor em Abr/2022: {event_value:,.2f}")
-        print(f"  - Média de Abril (outros anos): {avg_april_others:,.2f}")
-        print(f"  - Impacto vs. outros Abrils: {diff_vs_other_aprils:+.2f}%")
+        print(f"  - Valor em Abr/2022: {row['EventValue']:,.2f}")
+        print(f"  - Média de Abril (outros anos): {row['Baseline']:,.2f}")
+        print(f"  - Impacto vs. outros Abrils: {row['ImpactPct']:+.2f}%")
     print("=" * 60 + "\n")
 
 @profile_function
-def main(metrics=None):
-    """Orquestra a análise e geração de gráficos."""
-    sns.set(style="whitegrid", palette="viridis")
+def main(
+    metrics=None,
+    jobs=1,
+    use_cache=True,
+    events_file=None,
+    significance=False,
+    n_resamples=2000,
+    max_block_elements=None,
+):
+    """Orquestra a análise e geração de gráficos.
 
-    df: Optional[pd.DataFrame] = load_data()
+    ``jobs`` define quantos processos renderizam gráficos em paralelo e
+    ``use_cache=False`` força a regeneração de todos os gráficos. Com
+    ``events_file``, o impacto de todos os eventos da tabela em todas as
+    métricas é calculado e salvo em `event_impact.IMPACTS_FILE`; com
+    ``significance``, inclui intervalos bootstrap e p-valores de permutação
+    (``n_resamples`` reamostragens, distribuídas em ``jobs`` processos, em
+    blocos de até ``max_block_elements`` valores; ver `impact_significance`).
+
+    Retorna os arquivos gerados (gráficos e tabela de impactos), ou None se
+    os dados não puderem ser carregados.
+    """
+    _, sns = _plotting()
+    sns.set(**PLOT_STYLE)
+
+    df: Optional[pd.DataFrame] = load_data(metrics=metrics)
     if not isinstance(df, pd.DataFrame):
         return
 
@@ -137,18 +349,30 @@ def main(metrics=None):
     else:
         metrics = available_metrics
 
-    for metric in metrics:
-        plot_yearly_comparison(
-            df,
-            metric=metric,
-            title=f"Comparativo Anual de {metric}",
-            ylabel=metric,
-        )
+    # Pivô mês × ano compartilhado entre gráficos e estatísticas
+    pivot = build_monthly_pivot(df, metrics)
+
+    outputs = render_charts(df, metrics, jobs=jobs, use_cache=use_cache, pivot=pivot)
 
     # Realizar e imprimir a análise quantitativa
-    comparative_analysis(df, metrics)
+    comparative_analysis(df, metrics, pivot=pivot)
+
+    if events_file:
+        events = load_events(events_file)
+        if significance:
+            block = {"max_block_elements": max_block_elements} if max_block_elements else {}
+            impacts = impact_significance(pivot, events, n_resamples=n_resamples, jobs=jobs, **block)
+        else:
+            impacts = compute_event_impacts(pivot, events)
+        impacts_path = save_impacts(impacts)
+        outputs.append(impacts_path)
+        print(
+            f"Impacto de {impacts['Event'].nunique()} eventos em "
+            f"{impacts['Metric'].nunique()} métricas salvo em: {impacts_path}"
+        )
 
     print("Análise concluída com sucesso!")
+    return outputs
 
 
 if __name__ == "__main__":
@@ -158,5 +382,38 @@ if __name__ == "__main__":
         nargs="*",
         help="Lista de indicadores a analisar (padrão: todos)",
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Número de processos para renderizar gráficos em paralelo",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Regenera todos os gráficos, ignorando o cache de renderização",
+    )
+    parser.add_argument(
+        "--events",
+        help="CSV de eventos (Event, Year, Month) para calcular impactos em lote",
+    )
+    parser.add_argument(
+        "--significance",
+        action="store_true",
+        help="Inclui intervalos bootstrap e p-valores de permutação nos impactos",
+    )
+    parser.add_argument(
+        "--resamples",
+        type=int,
+        default=2000,
+        help="Número de reamostragens do bootstrap/permutação",
+    )
     args = parser.parse_args()
-    main(metrics=args.metrics)
+    main(
+        metrics=args.metrics,
+        jobs=args.jobs,
+        use_cache=not args.no_cache,
+        events_file=args.events,
+        significance=args.significance,
+        n_resamples=args.resamples,
+    )
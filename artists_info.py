@@ -1,10 +1,16 @@
 import requests, re
 import base64
 import os
-import pandas as pd
-from bs4 import BeautifulSoup
+import instrumentation
 from config import DATA_RAW, DATA_PROCESSED
 
+def _parse_html(html, parser="lxml"):
+    # bs4 só é importado quando alguma página é de fato raspada
+    from bs4 import BeautifulSoup
+
+    return BeautifulSoup(html, parser)
+
+
 # ========== Spotify API ==========
 def init_spotify_client():
     cid = os.getenv("SPOTIFY_CLIENT_ID")
@@ -17,6 +23,8 @@ def init_spotify_client():
     headers = {"Authorization": f"Basic {b64_auth_str}"}
     data = {"grant_type": "client_credentials"}
 
+    instrumentation.count("http.calls")
+
     response = requests.post(
         "https://accounts.spotify.com/api/token", headers=headers, data=data
     )
@@ -26,6 +34,7 @@ def init_spotify_client():
 def buscar_artista(nome, access_token):
     headers = {"Authorization": f"Bearer {access_token}"}
     url = f"https://api.spotify.com/v1/search?q={nome}&type=artist&limit=1"
+    instrumentation.count("http.calls")
     response = requests.get(url, headers=headers)
     return response.json()["artists"]["items"][0]
 
@@ -33,6 +42,7 @@ def buscar_artista(nome, access_token):
 def buscar_top_musicas(artist_id, access_token, market="BR"):
     headers = {"Authorization": f"Bearer {access_token}"}
     url = f"https://api.spotify.com/v1/artists/{artist_id}/top-tracks?market={market}"
+    instrumentation.count("http.calls")
     response = requests.get(url, headers=headers)
     return response.json()["tracks"]
 
@@ -47,6 +57,7 @@ def buscar_dados_lastfm(artista_nome):
         "api_key": api_key,
         "format": "json",
     }
+    instrumentation.count("http.calls")
     response = requests.get(url, params=params)
     if response.status_code != 200:
         return {"ouvintes_lastfm": None, "playcount_lastfm": None, "bio_resumo": ""}
@@ -65,10 +76,11 @@ def buscar_dados_lastfm(artista_nome):
 def buscar_kworb_streams(spotify_id):
     try:
         url = f"https://kworb.net/spotify/artist/{spotify_id}.html"
+        instrumentation.count("http.calls")
         response = requests.get(url)
         if response.status_code != 200:
             return None
-        soup = BeautifulSoup(response.text, "lxml")
+        soup = _parse_html(response.text)
         tabela = soup.find("table", {"class": "sortable"})
         total_streams = 0
         if not tabela:
@@ -91,10 +103,11 @@ def buscar_wikipedia_sales(artista_nome):
     try:
         nome_formatado = artista_nome.replace(" ", "_")
         url = f"https://en.wikipedia.org/wiki/{nome_formatado}_discography"
+        instrumentation.count("http.calls")
         response = requests.get(url)
         if response.status_code != 200:
             return None
-        soup = BeautifulSoup(response.text, "lxml")
+        soup = _parse_html(response.text)
         texto = soup.get_text()
         match = re.search(
             r"has sold over ([\d,]+) (million|billion)? (records|albums)",
@@ -124,11 +137,12 @@ def buscar_certificacoes_riaa(artista_nome):
         search_url = f"{base_url}?tab_active=default-award&ar={artista_nome.replace(' ', '+')}#search_section"
 
         headers = {"User-Agent": "Mozilla/5.0"}
+        instrumentation.count("http.calls")
         response = requests.get(search_url, headers=headers)
         if response.status_code != 200:
             return None
 
-        soup = BeautifulSoup(response.text, "html.parser")
+        soup = _parse_html(response.text, "html.parser")
         tabela = soup.find("table", {"id": "search-award-table"})
         if not tabela:
             return None
@@ -231,6 +245,8 @@ def get_artist_raw_data():
 
 if __name__ == "__main__":
     # Exemplo de uso para teste, se necessário
+    import pandas as pd
+
     raw_data = get_artist_raw_data()
     df = pd.DataFrame(raw_data)
     csv_path = DATA_PROCESSED / "dados_artistas_raw_test.csv"
@@ -0,0 +1,209 @@
+"""
+baseline_model.py
+
+Baseline sazonal (contrafactual) para as métricas de turismo de Las Vegas.
+
+Comparar o mês de um evento com a média simples do mesmo mês em outros anos
+ignora a tendência e distorce o resultado quando há anos atípicos (o colapso
+de 2020-2021). Este módulo ajusta, para cada série (região, métrica), uma
+regressão sazonal com tendência linear:
+
+    y_t = b * t + s_mes(t) + e_t
+
+usando apenas meses "normais": os períodos de `EXCLUDED_PERIODS` (COVID) e os
+meses dos próprios eventos ficam fora do ajuste. A previsão do modelo nesses
+meses é o baseline contrafactual, e o resíduo (real - baseline) mede o
+impacto do evento.
+
+Todas as séries são ajustadas de uma vez: as equações normais de cada série
+são montadas com multiplicações de matrizes e resolvidas num único
+`np.linalg.solve` em lote, mesmo quando as séries têm meses faltantes
+diferentes. Os baselines ajustados ficam em cache em `BASELINE_CACHE_DIR`,
+indexados pelo hash dos dados e dos parâmetros do modelo.
+"""
+
+import hashlib
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+import instrumentation
+from config import DATA_PROCESSED
+from event_impact import load_events
+from tourism_store import STORE_FILE, load_store
+
+BASELINE_CACHE_DIR = DATA_PROCESSED / "baselines"
+RESIDUALS_FILE = DATA_PROCESSED / "event_residuals.csv"
+# Intervalos (inclusivos) fora do ajuste por não representarem a sazonalidade normal
+EXCLUDED_PERIODS = [("2020-03-01", "2021-06-01")]
+# Versão do modelo: incremente ao mudar o ajuste para invalidar o cache
+MODEL_VERSION = 1
+
+
+def series_matrix(store_df: pd.DataFrame, regions: Optional[list[str]] = None) -> pd.DataFrame:
+    """Converte o store (longo) numa matriz data × (região, métrica).
+
+    O índice é completado para todos os meses do período, com NaN nos
+    meses sem dado, de modo que a posição na matriz corresponda ao tempo.
+    """
+    if regions:
+        store_df = store_df[store_df["Region"].isin(regions)]
+    wide = store_df.pivot_table(
+        index=store_df.index,
+        columns=["Region", "Metric"],
+        values="Value",
+        aggfunc="first",
+        observed=True,
+    )
+    wide.columns = wide.columns.set_levels(
+        [level.astype(str) for level in wide.columns.levels]
+    )
+    full_index = pd.date_range(wide.index.min(), wide.index.max(), freq="MS", name="Date")
+    return wide.reindex(full_index)
+
+
+def design_matrix(index: pd.DatetimeIndex) -> np.ndarray:
+    """Matriz de regressores: tendência (em anos) + um indicador por mês."""
+    t = (index.year - index.year.min()) + (index.month - 1) / 12
+    months = np.eye(12)[index.month - 1]
+    return np.column_stack([t, months])
+
+
+def training_mask(
+    index: pd.DatetimeIndex, events: Optional[pd.DataFrame] = None
+) -> np.ndarray:
+    """Meses usados no ajuste: fora de `EXCLUDED_PERIODS` e dos meses de eventos."""
+    keep = np.ones(len(index), dtype=bool)
+    for start, end in EXCLUDED_PERIODS:
+        keep &= ~((index >= pd.Timestamp(start)) & (index <= pd.Timestamp(end)))
+    if events is not None and len(events):
+        event_dates = pd.to_datetime(
+            {"year": events["Year"], "month": events["Month"], "day": 1}
+        )
+        keep &= ~index.isin(event_dates)
+    return keep
+
+
+def fit_baselines(
+    wide: pd.DataFrame, events: Optional[pd.DataFrame] = None
+) -> pd.DataFrame:
+    """Ajusta o modelo sazonal de todas as séries em lote e devolve os baselines.
+
+    Retorna uma matriz com o mesmo formato de ``wide`` contendo a previsão do
+    modelo em todos os meses. Séries com menos observações de treino do que
+    parâmetros ficam com NaN.
+    """
+    X = design_matrix(wide.index)
+    Y = wide.to_numpy(dtype="float64")
+    W = (~np.isnan(Y)) & training_mask(wide.index, events)[:, None]
+    Yw = np.where(W, Y, 0.0)
+    n_params = X.shape[1]
+
+    # Equações normais por série: (X' W_s X) beta_s = X' W_s y_s, montadas
+    # para todas as séries com duas multiplicações de matrizes
+    outer = (X[:, :, None] * X[:, None, :]).reshape(len(X), -1)
+    xtx = (W.T.astype("float64") @ outer).reshape(-1, n_params, n_params)
+    xty = Yw.T @ X
+    # Meses sem nenhuma observação tornariam o sistema singular: fixa o
+    # coeficiente deles em zero e invalida a previsão da série depois
+    diagonal = np.arange(n_params)
+    unobserved = xtx[:, diagonal, diagonal] == 0
+    xtx[:, diagonal, diagonal] += unobserved
+    beta = np.linalg.solve(xtx, xty[..., None])[..., 0]
+
+    baseline = X @ beta.T
+    baseline[:, (W.sum(axis=0) < n_params) | unobserved.any(axis=1)] = np.nan
+    return pd.DataFrame(baseline, index=wide.index, columns=wide.columns)
+
+
+def _cache_key(wide: pd.DataFrame, events: Optional[pd.DataFrame]) -> str:
+    """Hash dos dados de entrada, dos eventos excluídos e dos parâmetros do modelo."""
+    h = hashlib.sha256()
+    h.update(repr((MODEL_VERSION, EXCLUDED_PERIODS)).encode())
+    h.update(repr((wide.index.tolist(), wide.columns.tolist())).encode())
+    h.update(wide.to_numpy(dtype="float64").tobytes())
+    if events is not None:
+        h.update(events[["Year", "Month"]].to_csv(index=False).encode())
+    return h.hexdigest()[:16]
+
+
+def fit_baselines_cached(
+    wide: pd.DataFrame,
+    events: Optional[pd.DataFrame] = None,
+    cache_dir: Optional[Path] = None,
+) -> pd.DataFrame:
+    """`fit_baselines` com cache em disco (um Parquet por combinação de entrada)."""
+    cache_dir = cache_dir or BASELINE_CACHE_DIR
+    cache_file = cache_dir / f"baseline_{_cache_key(wide, events)}.parquet"
+    if cache_file.exists():
+        instrumentation.count("baselines.cache_hits")
+        cached = pd.read_parquet(cache_file)
+        cached.columns = wide.columns
+        return cached
+
+    instrumentation.count("baselines.cache_misses")
+    with instrumentation.span("baselines.fit", series=wide.shape[1]):
+        baselines = fit_baselines(wide, events)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    to_save = baselines.copy()
+    to_save.columns = [f"{region}|{metric}" for region, metric in baselines.columns]
+    to_save.to_parquet(cache_file)
+    return baselines
+
+
+def event_residuals(
+    wide: pd.DataFrame, baselines: pd.DataFrame, events: pd.DataFrame
+) -> pd.DataFrame:
+    """Resíduo (real - baseline) de cada série nos meses dos eventos.
+
+    Retorna uma tabela longa com as colunas Event, Year, Month, Region,
+    Metric, Actual, Baseline, Residual e ResidualPct; pares sem valor real
+    ou sem baseline são omitidos.
+    """
+    event_dates = pd.to_datetime({"year": events["Year"], "month": events["Month"], "day": 1})
+    rows = wide.index.get_indexer(event_dates)
+    found = rows >= 0
+    events, rows = events[found].reset_index(drop=True), rows[found]
+
+    actual = wide.to_numpy(dtype="float64")[rows]
+    baseline = baselines.to_numpy(dtype="float64")[rows]
+    n_events, n_series = actual.shape
+    with np.errstate(invalid="ignore", divide="ignore"):
+        residual_pct = (actual - baseline) / baseline * 100
+
+    result = pd.DataFrame(
+        {
+            "Event": np.repeat(events["Event"].to_numpy(), n_series),
+            "Year": np.repeat(events["Year"].to_numpy(), n_series),
+            "Month": np.repeat(events["Month"].to_numpy(), n_series),
+            "Region": np.tile(wide.columns.get_level_values("Region").to_numpy(), n_events),
+            "Metric": np.tile(wide.columns.get_level_values("Metric").to_numpy(), n_events),
+            "Actual": actual.ravel(),
+            "Baseline": baseline.ravel(),
+            "Residual": (actual - baseline).ravel(),
+            "ResidualPct": residual_pct.ravel(),
+        }
+    )
+    return result[np.isfinite(result["ResidualPct"].to_numpy())].reset_index(drop=True)
+
+
+def main(events_file, regions: Optional[list[str]] = None, use_cache: bool = True):
+    """Ajusta os baselines de todas as séries e salva os resíduos dos eventos."""
+    try:
+        store = load_store(STORE_FILE, regions=regions)
+    except FileNotFoundError:
+        print(f"Erro: store de turismo não encontrado em {STORE_FILE}")
+        print("Por favor, execute 'python run.py preprocess-vegas' primeiro.")
+        return
+
+    events = load_events(events_file)
+    wide = series_matrix(store, regions)
+    fit = fit_baselines_cached if use_cache else fit_baselines
+    baselines = fit(wide, events)
+
+    residuals = event_residuals(wide, baselines, events)
+    residuals.to_csv(RESIDUALS_FILE, index=False)
+    print(f"Baselines ajustados para {wide.shape[1]} séries.")
+    print(f"Resíduos de {residuals['Event'].nunique()} eventos salvos em: {RESIDUALS_FILE}")
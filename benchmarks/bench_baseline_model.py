@@ -0,0 +1,70 @@
+"""
+bench_baseline_model.py
+
+Benchmark do ajuste em lote de `baseline_model.fit_baselines`.
+
+Compara o ajuste de todas as séries de uma vez (equações normais em lote)
+com um laço de `np.linalg.lstsq` por série, em matrizes sintéticas de 20
+anos mensais com centenas de séries e meses faltantes aleatórios.
+
+Uso:
+  python benchmarks/bench_baseline_model.py --series 100 500 2000
+"""
+
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from baseline_model import design_matrix, fit_baselines, training_mask  # noqa: E402
+
+
+def make_series(n_series: int, years: int = 20, missing: float = 0.05, seed: int = 0) -> pd.DataFrame:
+    """Matriz data × (região, métrica) com tendência, sazonalidade e ruído."""
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2004-01-01", periods=12 * years, freq="MS", name="Date")
+    t = np.arange(len(index))[:, None] / 12
+    season = np.sin(2 * np.pi * (index.month.to_numpy()[:, None] - 1) / 12)
+    values = 100 + rng.normal(0, 5, n_series) * t + 20 * season + rng.normal(0, 2, (len(index), n_series))
+    values[rng.random(values.shape) < missing] = np.nan
+    columns = pd.MultiIndex.from_tuples(
+        [("Las Vegas", f"Metric {i}") for i in range(n_series)], names=["Region", "Metric"]
+    )
+    return pd.DataFrame(values, index=index, columns=columns)
+
+
+def fit_baselines_loop(wide: pd.DataFrame) -> np.ndarray:
+    """Referência: um `np.linalg.lstsq` por série."""
+    X = design_matrix(wide.index)
+    train = training_mask(wide.index)
+    out = np.empty(wide.shape)
+    for j, column in enumerate(wide.columns):
+        y = wide[column].to_numpy()
+        rows = train & ~np.isnan(y)
+        beta, *_ = np.linalg.lstsq(X[rows], y[rows], rcond=None)
+        out[:, j] = X @ beta
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do ajuste de baselines sazonais.")
+    parser.add_argument("--series", nargs="*", type=int, default=[100, 500, 2000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'séries':>8} {'laço (s)':>10} {'lote (s)':>10} {'ganho':>8}")
+    for n in args.series:
+        wide = make_series(n)
+        np.testing.assert_allclose(fit_baselines(wide).to_numpy(), fit_baselines_loop(wide), rtol=1e-6)
+        t_loop = min(timeit.repeat(lambda: fit_baselines_loop(wide), number=1, repeat=args.repeat))
+        t_batch = min(timeit.repeat(lambda: fit_baselines(wide), number=1, repeat=args.repeat))
+        print(f"{n:>8} {t_loop:>10.4f} {t_batch:>10.4f} {t_loop / t_batch:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
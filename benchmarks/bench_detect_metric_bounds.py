@@ -0,0 +1,70 @@
+"""
+bench_detect_metric_bounds.py
+
+Microbenchmark de `preprocess_data.detect_metric_bounds`.
+
+Compara a implementação vetorizada atual com a versão original, que
+percorria a planilha linha a linha com `df.iloc`, usando planilhas
+sintéticas no formato LVCVA com milhares de linhas de métricas.
+
+Uso:
+  python benchmarks/bench_detect_metric_bounds.py --rows 1000 5000 20000
+"""
+
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.generators import make_lvcva_sheet  # noqa: E402
+from preprocess_data import (  # noqa: E402
+    COLUNA_NOMES_METRICAS,
+    FOOTER_KEYWORDS,
+    LINHA_DATAS,
+    detect_metric_bounds,
+)
+
+
+def detect_metric_bounds_loop(df: pd.DataFrame) -> tuple[int, int]:
+    """Implementação original (laço Python), mantida como referência."""
+    start_row = LINHA_DATAS + 1
+    while start_row < len(df):
+        cell = df.iloc[start_row, COLUNA_NOMES_METRICAS]
+        if pd.isna(cell) or (isinstance(cell, str) and cell.strip() == ""):
+            start_row += 1
+            continue
+        break
+
+    end_row = start_row
+    while end_row < len(df):
+        cell = df.iloc[end_row, COLUNA_NOMES_METRICAS]
+        if pd.isna(cell) or (isinstance(cell, str) and cell.strip() == "") or df.iloc[end_row].isna().all():
+            break
+        if isinstance(cell, str) and cell.strip().lower().startswith(tuple(FOOTER_KEYWORDS)):
+            break
+        end_row += 1
+
+    return start_row, end_row
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de detect_metric_bounds.")
+    parser.add_argument("--rows", nargs="*", type=int, default=[1_000, 5_000, 20_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'linhas':>8} {'laço (s)':>10} {'vetorizado (s)':>15} {'ganho':>8}")
+    for n in args.rows:
+        df = make_lvcva_sheet(n)
+        assert detect_metric_bounds(df) == detect_metric_bounds_loop(df)
+        t_loop = min(timeit.repeat(lambda: detect_metric_bounds_loop(df), number=1, repeat=args.repeat))
+        t_vec = min(timeit.repeat(lambda: detect_metric_bounds(df), number=1, repeat=args.repeat))
+        print(f"{n:>8} {t_loop:>10.4f} {t_vec:>15.4f} {t_loop / t_vec:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
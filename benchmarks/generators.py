@@ -0,0 +1,162 @@
+"""
+generators.py
+
+Geradores de dados sintéticos para os benchmarks, no mesmo formato das
+fontes reais:
+
+- arquivos DB1B ``db1b.public.<trimestre>.asc`` (campos separados por ``|``,
+  10 campos do itinerário + 11 por segmento), com tamanho e fração de
+  itinerários que terminam em LAS configuráveis;
+- planilhas da LVCVA (uma aba ``"<região> <ano>"`` por região, linha de
+  meses em `LINHA_DATAS`, métricas na primeira coluna e rodapé "Source");
+- corpora de comentários do Reddit, com uma fração configurável contendo
+  um par hobby + termo depreciativo.
+
+Todos os geradores são determinísticos para uma mesma ``seed``.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import DEMEAN_TERMS, FEMALE_TERMS, MALE_TERMS  # noqa: E402
+from preprocess_data import (  # noqa: E402
+    COLUNA_NOMES_METRICAS,
+    COLUNAS_DATAS,
+    LINHA_DATAS,
+    REGIOES_EXCEL,
+)
+
+AIRPORTS = ["JFK", "LAX", "SFO", "ORD", "DFW", "SEA", "DEN", "ATL", "BOS", "PHX", "MSP", "IAH"]
+CARRIERS = ["AA", "DL", "UA", "WN", "B6", "AS", "NK", "F9"]
+FARE_CLASSES = ["X", "Y", "C", "D", "F", "G"]
+FILLER_WORDS = "the and my weekend really love just think people this that with some time".split()
+
+
+def db1b_line(rng, ticket: int, quarter_code: str, las: bool, max_segments: int = 4) -> str:
+    """Uma linha DB1B; com ``las``, o último segmento chega em LAS."""
+    n_segments = int(rng.integers(1, max_segments + 1))
+    origin = AIRPORTS[rng.integers(len(AIRPORTS))]
+    fields = [
+        f"{ticket:012d}",
+        CARRIERS[rng.integers(len(CARRIERS))],
+        quarter_code,
+        str(n_segments),
+        "1",
+        origin,
+        "US",
+        str(rng.integers(1, 99)),
+        str(rng.integers(0, 2)),
+        FARE_CLASSES[rng.integers(len(FARE_CLASSES))],
+    ]
+    for segment in range(1, n_segments + 1):
+        if segment == n_segments and las:
+            arrival = "LAS"
+        else:
+            arrival = AIRPORTS[rng.integers(len(AIRPORTS))]
+        carrier = CARRIERS[rng.integers(len(CARRIERS))]
+        fields += [
+            carrier,
+            str(segment),
+            carrier,
+            "0",
+            "1",
+            f"{rng.uniform(100, 2800):.1f}",
+            arrival,
+            "0",
+            "1",
+            "0",
+            f"{rng.uniform(40, 900):.2f}",
+        ]
+    return "|".join(fields)
+
+
+def write_db1b_file(
+    path: Path,
+    n_lines: int,
+    las_ratio: float = 0.1,
+    max_segments: int = 4,
+    seed: int = 0,
+) -> int:
+    """Grava um arquivo DB1B sintético e retorna o número de itinerários para LAS.
+
+    O trimestre das linhas vem do nome do arquivo
+    (``db1b.public.<trimestre>.asc``); exatamente ``round(n_lines * las_ratio)``
+    linhas terminam em LAS.
+    """
+    path = Path(path)
+    quarter_code = path.name.split(".")[2]
+    rng = np.random.default_rng(seed)
+    n_las = round(n_lines * las_ratio)
+    las = np.zeros(n_lines, dtype=bool)
+    las[rng.permutation(n_lines)[:n_las]] = True
+
+    with open(path, "w") as f:
+        for ticket in range(n_lines):
+            f.write(db1b_line(rng, ticket, quarter_code, bool(las[ticket]), max_segments) + "\n")
+    return n_las
+
+
+def write_db1b_dir(
+    folder: Path,
+    quarters: list[str],
+    n_lines: int,
+    las_ratio: float = 0.1,
+    seed: int = 0,
+) -> int:
+    """Gera um arquivo DB1B por trimestre em ``folder``; retorna o total para LAS."""
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    return sum(
+        write_db1b_file(folder / f"db1b.public.{quarter}.asc", n_lines, las_ratio, seed=seed + i)
+        for i, quarter in enumerate(quarters)
+    )
+
+
+def make_lvcva_sheet(n_metrics: int, n_cols: int = 25, seed: int = 0) -> pd.DataFrame:
+    """Aba bruta no formato LVCVA: cabeçalho, métricas mensais e rodapé."""
+    rng = np.random.default_rng(seed)
+    values = rng.uniform(0, 1e6, size=(n_metrics, n_cols)).astype(object)
+    values[:, COLUNA_NOMES_METRICAS] = [f"Metric {i}" for i in range(n_metrics)]
+
+    header = np.full((LINHA_DATAS + 3, n_cols), np.nan, dtype=object)
+    header[LINHA_DATAS, COLUNAS_DATAS] = [f"M{m}" for m in range(1, len(COLUNAS_DATAS) + 1)]
+    footer = np.full((3, n_cols), np.nan, dtype=object)
+    footer[1, COLUNA_NOMES_METRICAS] = "Source: LVCVA"
+
+    return pd.DataFrame(np.vstack([header, values, footer]))
+
+
+def write_lvcva_workbook(
+    path: Path,
+    year: int,
+    n_metrics: int = 40,
+    regions: tuple[str, ...] = tuple(REGIOES_EXCEL),
+    seed: int = 0,
+) -> Path:
+    """Grava uma planilha sintética da LVCVA com uma aba por região."""
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        for i, region in enumerate(regions):
+            sheet = make_lvcva_sheet(n_metrics, seed=seed + i)
+            sheet.to_excel(writer, sheet_name=f"{REGIOES_EXCEL[region]}{year}", header=False, index=False)
+    return Path(path)
+
+
+def make_comments(n_comments: int, match_ratio: float = 0.05, words: int = 30, seed: int = 0) -> list[str]:
+    """Corpus de comentários; ~``match_ratio`` deles citam um hobby e um insulto."""
+    rng = np.random.default_rng(seed)
+    hobbies = [term.replace(r":?", ":") for term in FEMALE_TERMS + MALE_TERMS]
+    comments = []
+    for _ in range(n_comments):
+        tokens = list(rng.choice(FILLER_WORDS, size=words))
+        if rng.random() < match_ratio:
+            tokens.insert(int(rng.integers(len(tokens))), hobbies[rng.integers(len(hobbies))])
+            tokens.insert(int(rng.integers(len(tokens))), DEMEAN_TERMS[rng.integers(len(DEMEAN_TERMS))])
+        if rng.random() < 0.1:
+            tokens.append("#vegas @friend")
+        comments.append(" ".join(tokens))
+    return comments
@@ -0,0 +1,196 @@
+"""
+run_benchmarks.py
+
+Suíte de benchmarks das funções críticas, com baselines gravados e limites
+de regressão.
+
+Cada caso gera seus dados sintéticos (ver `generators`) numa pasta
+temporária, mede o melhor de ``--repeat`` medidas (tempo por chamada) e compara com o tempo
+gravado em `baselines.json`. Um caso mais lento que ``baseline × limite``
+(padrão: 1.5, ou o ``threshold`` do próprio caso) é uma regressão e faz o
+script terminar com código 1.
+
+Os baselines dependem da máquina: regrave-os com ``--update-baselines`` ao
+trocar de máquina ou depois de uma otimização intencional. O valor gravado é
+a mediana de ``--baseline-runs`` execuções completas, para que uma medida
+atipicamente rápida não vire um baseline que a máquina raramente alcança.
+
+Uso:
+  python benchmarks/run_benchmarks.py
+  python benchmarks/run_benchmarks.py --only flights --repeat 5
+  python benchmarks/run_benchmarks.py --update-baselines
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import statistics
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.generators import (  # noqa: E402
+    make_comments,
+    make_lvcva_sheet,
+    write_db1b_dir,
+    write_db1b_file,
+    write_lvcva_workbook,
+)
+
+BASELINES_FILE = Path(__file__).resolve().parent / "baselines.json"
+# Folga para o ruído de máquinas compartilhadas (variação de ~30% observada)
+DEFAULT_THRESHOLD = 1.5
+
+
+def bench_process_file(workdir: Path):
+    from flights_parser import process_file
+
+    path = workdir / "db1b.public.20222.asc"
+    write_db1b_file(path, n_lines=50_000, las_ratio=0.1)
+    return lambda: process_file(path)
+
+
+def bench_get_flight_raw_data(workdir: Path):
+    from flights_parser import get_flight_raw_data
+
+    folder = workdir / "db1b"
+    write_db1b_dir(folder, ["20221", "20222", "20223", "20224"], n_lines=20_000, las_ratio=0.1)
+    return lambda: get_flight_raw_data(folder)
+
+
+def bench_process_single_file(workdir: Path):
+    from preprocess_data import REGIOES_EXCEL, process_single_file
+
+    path = workdir / "lvcva_2022.xlsx"
+    write_lvcva_workbook(path, 2022, n_metrics=60)
+    return lambda: process_single_file(path, 2022, regions=list(REGIOES_EXCEL))
+
+
+def bench_detect_metric_bounds(workdir: Path):
+    from preprocess_data import detect_metric_bounds
+
+    sheet = make_lvcva_sheet(20_000)
+    return lambda: detect_metric_bounds(sheet)
+
+
+def bench_match_terms_enrich_row(workdir: Path):
+    import re
+
+    from config import DEMEAN_TERMS, FEMALE_TERMS
+    from reddit_scraper import enrich_row, match_terms
+
+    # Carga grande o bastante (~0.1 s por chamada) para que o ruído de
+    # agendamento não pese na razão contra o baseline
+    comments = make_comments(100_000, match_ratio=0.05)
+    hobby_regex = re.compile(FEMALE_TERMS[0], re.IGNORECASE)
+    insult_regex = re.compile("|".join(DEMEAN_TERMS), re.IGNORECASE)
+
+    def run():
+        # Como em `fetch_comments_for_pair`: só os comentários com o par são enriquecidos
+        for body in comments:
+            if match_terms(body, hobby_regex, insult_regex):
+                enrich_row({"body": body})
+
+    return run
+
+
+def bench_plot_yearly_comparison(workdir: Path):
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import numpy as np
+    import pandas as pd
+
+    from analyze_processed_data import plot_yearly_comparison
+
+    index = pd.date_range("2010-01-01", "2023-12-01", freq="MS")
+    df = pd.DataFrame(
+        {
+            "Visitors": np.random.default_rng(0).uniform(2e6, 4e6, len(index)),
+            "Year": index.year,
+            "Month": index.month,
+        },
+        index=index,
+    )
+    return lambda: plot_yearly_comparison(
+        df, "Visitors", "Visitors", "Visitors", output_dir=workdir, use_cache=False
+    )
+
+
+# nome -> (preparação, limite de regressão)
+CASES = {
+    "flights.process_file": (bench_process_file, DEFAULT_THRESHOLD),
+    "flights.get_flight_raw_data": (bench_get_flight_raw_data, DEFAULT_THRESHOLD),
+    "preprocess.process_single_file": (bench_process_single_file, DEFAULT_THRESHOLD),
+    "preprocess.detect_metric_bounds": (bench_detect_metric_bounds, 2.0),
+    "reddit.match_terms_enrich_row": (bench_match_terms_enrich_row, DEFAULT_THRESHOLD),
+    "analyze.plot_yearly_comparison": (bench_plot_yearly_comparison, DEFAULT_THRESHOLD),
+}
+
+
+def run_case(name: str, repeat: int) -> float:
+    """Prepara os dados de um caso e retorna o melhor tempo (s) entre ``repeat`` execuções."""
+    setup, _ = CASES[name]
+    # As funções medidas imprimem progresso; a saída é descartada
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        timer = timeit.Timer(setup(Path(tmp)))
+        # autorange também serve de aquecimento (imports, caches de disco) e
+        # agrupa chamadas rápidas até ~0.2 s por medida, reduzindo o ruído
+        number, _ = timer.autorange()
+        return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def load_baselines(path: Path = BASELINES_FILE) -> dict[str, float]:
+    return json.loads(path.read_text()) if path.exists() else {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suíte de benchmarks com detecção de regressões.")
+    parser.add_argument("--only", nargs="*", help="Roda só os casos cujo nome contém um destes textos.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--update-baselines", action="store_true", help="Grava os tempos medidos como novos baselines.")
+    parser.add_argument(
+        "--baseline-runs", type=int, default=5, help="Execuções cuja mediana é gravada com --update-baselines."
+    )
+    parser.add_argument(
+        "--threshold", type=float, default=None, help="Sobrescreve o limite de regressão de todos os casos."
+    )
+    args = parser.parse_args()
+
+    names = [n for n in CASES if not args.only or any(f in n for f in args.only)]
+    baselines = load_baselines()
+    regressions = []
+
+    print(f"{'caso':<34} {'tempo (s)':>10} {'baseline':>10} {'razão':>7}")
+    for name in names:
+        if args.update_baselines:
+            elapsed = statistics.median(run_case(name, args.repeat) for _ in range(args.baseline_runs))
+        else:
+            elapsed = run_case(name, args.repeat)
+        baseline = baselines.get(name)
+        threshold = args.threshold or CASES[name][1]
+        if baseline:
+            ratio = elapsed / baseline
+            flag = "  ❌ regressão" if ratio > threshold else ""
+            print(f"{name:<34} {elapsed:>10.4f} {baseline:>10.4f} {ratio:>6.2f}x{flag}")
+            if ratio > threshold:
+                regressions.append(name)
+        else:
+            print(f"{name:<34} {elapsed:>10.4f} {'-':>10} {'-':>7}")
+        if args.update_baselines:
+            baselines[name] = round(elapsed, 6)
+
+    if args.update_baselines:
+        BASELINES_FILE.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n")
+        print(f"Baselines gravados em: {BASELINES_FILE}")
+    elif regressions:
+        print(f"Regressões: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
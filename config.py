@@ -27,6 +27,11 @@ DATA_PROCESSED: Path = ROOT / "data" / "processed"
 # Define o caminho para salvar os gráficos gerados.
 GRAPH_OUTPUT: Path = ROOT / "output" / "graphs"
 
+# --- Relatórios de Desempenho ---
+# Métricas da instrumentação e perfis do cProfile (criado sob demanda,
+# apenas quando a instrumentação está ligada).
+PERF_REPORTS: Path = ROOT / "performance_reports"
+
 # --- Garantia de Existência dos Diretórios ---
 # Cria os diretórios de saída para evitar FileNotFoundError em outros scripts.
 # exist_ok=True -> não gera erro se o diretório já existir.
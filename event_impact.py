@@ -0,0 +1,276 @@
+"""
+event_impact.py
+
+Motor vetorizado de impacto de eventos sobre as métricas de turismo.
+
+Para cada par (evento, métrica), compara o valor da métrica no mês do evento
+com a média do mesmo mês nos demais anos (baseline). Todos os pares são
+calculados de uma vez sobre o cubo mês × ano × métrica obtido do pivô de
+`analyze_processed_data.build_monthly_pivot`, sem laços por evento ou por
+métrica.
+
+A tabela de eventos é um CSV com as colunas ``Event``, ``Year`` e ``Month``:
+
+    Event,Year,Month
+    Shows BTS,2022,4
+    Lady Gaga - Enigma,2019,1
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from config import DATA_PROCESSED, DATA_RAW
+
+EVENTS_FILE = DATA_RAW / "events.csv"
+IMPACTS_FILE = DATA_PROCESSED / "event_impacts.csv"
+EVENT_COLUMNS = ["Event", "Year", "Month"]
+IMPACT_COLUMNS = EVENT_COLUMNS + ["Metric", "EventValue", "Baseline", "BaselineYears", "ImpactPct"]
+SIGNIFICANCE_COLUMNS = ["CILow", "CIHigh", "PValue"]
+# Limite de valores reamostrados por array em `impact_significance` (cada
+# array temporário ocupa ~32 MB); define quantos eventos entram em cada bloco.
+MAX_BLOCK_ELEMENTS = 4_000_000
+
+
+def load_events(path: Path = EVENTS_FILE) -> pd.DataFrame:
+    """Lê a tabela de eventos, validando as colunas obrigatórias."""
+    events = pd.read_csv(path)
+    missing = set(EVENT_COLUMNS) - set(events.columns)
+    if missing:
+        raise ValueError(f"Colunas ausentes na tabela de eventos {path}: {', '.join(sorted(missing))}")
+    events = events[EVENT_COLUMNS].dropna()
+    return events.astype({"Event": str, "Year": int, "Month": int}).reset_index(drop=True)
+
+
+def pivot_to_cube(pivot: pd.DataFrame) -> tuple[np.ndarray, pd.Index, pd.Index, pd.Index]:
+    """Converte o pivô (mês × (métrica, ano)) num array 3-D mês × ano × métrica.
+
+    Retorna o cubo e os rótulos de cada eixo (meses, anos, métricas).
+    """
+    metrics = pivot.columns.get_level_values("Metric").unique()
+    years = pivot.columns.get_level_values("Year").unique().sort_values()
+    full_columns = pd.MultiIndex.from_product([metrics, years], names=["Metric", "Year"])
+    values = pivot.reindex(columns=full_columns).to_numpy(dtype="float64")
+    cube = values.reshape(len(pivot.index), len(metrics), len(years)).transpose(0, 2, 1)
+    return cube, pivot.index, years, metrics
+
+
+def _event_arrays(
+    pivot: pd.DataFrame, events: pd.DataFrame, exclude_other_events: bool
+) -> tuple[pd.DataFrame, pd.Index, np.ndarray, np.ndarray, np.ndarray]:
+    """Monta os arrays de todos os eventos a partir do cubo.
+
+    Retorna os eventos com dados, as métricas, os valores do mês de cada
+    evento em todos os anos (evento × ano × métrica), o valor no próprio
+    evento (evento × métrica) e a máscara dos anos que entram no baseline.
+    """
+    cube, months, years, metrics = pivot_to_cube(pivot)
+    month_idx = months.get_indexer(events["Month"])
+    year_idx = years.get_indexer(events["Year"])
+
+    found = (month_idx >= 0) & (year_idx >= 0)
+    if not found.all():
+        absent = events.loc[~found, "Event"].tolist()
+        print(f"Aviso: eventos sem dados no período analisado: {', '.join(absent)}")
+    events = events[found].reset_index(drop=True)
+    month_idx, year_idx = month_idx[found], year_idx[found]
+    n_events = len(events)
+
+    # (evento, ano, métrica): valores do mês de cada evento em todos os anos
+    same_month = cube[month_idx]
+    rows = np.arange(n_events)
+    event_values = same_month[rows, year_idx]
+
+    # Anos que entram no baseline: com dados e diferentes do ano do evento
+    in_baseline = np.ones((n_events, len(years)), dtype=bool)
+    in_baseline[rows, year_idx] = False
+    if exclude_other_events:
+        event_cells = np.zeros((len(months), len(years)), dtype=bool)
+        event_cells[month_idx, year_idx] = True
+        in_baseline &= ~event_cells[month_idx]
+    mask = in_baseline[:, :, None] & ~np.isnan(same_month)
+
+    return events, metrics, same_month, event_values, mask
+
+
+def _impact_frame(
+    events: pd.DataFrame, metrics: pd.Index, columns: dict[str, np.ndarray]
+) -> pd.DataFrame:
+    """Monta a tabela longa (evento × métrica) a partir de arrays evento × métrica."""
+    n_events, n_metrics = len(events), len(metrics)
+    result = pd.DataFrame(
+        {
+            "Event": np.repeat(events["Event"].to_numpy(), n_metrics),
+            "Year": np.repeat(events["Year"].to_numpy(), n_metrics),
+            "Month": np.repeat(events["Month"].to_numpy(), n_metrics),
+            "Metric": np.tile(metrics.to_numpy(), n_events),
+            **{name: values.ravel() for name, values in columns.items()},
+        }
+    )
+    valid = np.isfinite(result["ImpactPct"].to_numpy())
+    return result[valid].reset_index(drop=True)
+
+
+def _impact_columns(
+    same_month: np.ndarray, event_values: np.ndarray, mask: np.ndarray
+) -> dict[str, np.ndarray]:
+    """Baseline e impacto percentual (arrays evento × métrica)."""
+    counts = mask.sum(axis=1)
+    sums = np.where(mask, same_month, 0.0).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        baseline = sums / counts
+        impact = (event_values - baseline) / baseline * 100
+    return {
+        "EventValue": event_values,
+        "Baseline": baseline,
+        "BaselineYears": counts,
+        "ImpactPct": impact,
+    }
+
+
+def compute_event_impacts(
+    pivot: pd.DataFrame,
+    events: pd.DataFrame,
+    exclude_other_events: bool = False,
+) -> pd.DataFrame:
+    """Calcula o impacto de cada evento em cada métrica numa única passada.
+
+    O baseline de um evento é a média do mesmo mês nos outros anos com
+    dados. Com ``exclude_other_events``, meses que também são eventos da
+    tabela ficam fora dos baselines dos demais.
+
+    Retorna uma tabela longa com as colunas de `IMPACT_COLUMNS`; pares sem
+    valor no mês do evento ou sem baseline são omitidos.
+    """
+    events, metrics, same_month, event_values, mask = _event_arrays(
+        pivot, events, exclude_other_events
+    )
+    return _impact_frame(events, metrics, _impact_columns(same_month, event_values, mask))
+
+
+def _significance_chunk(
+    same_month: np.ndarray,
+    event_values: np.ndarray,
+    mask: np.ndarray,
+    n_resamples: int,
+    confidence: float,
+    seed: np.random.SeedSequence,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Bootstrap e permutação para um bloco de eventos (arrays evento × métrica).
+
+    Todas as reamostragens do bloco são feitas numa única operação de array.
+    """
+    rng = np.random.default_rng(seed)
+
+    # (evento, métrica, ano), com os anos válidos do baseline no início
+    values = same_month.transpose(0, 2, 1)
+    valid = mask.transpose(0, 2, 1)
+    order = np.argsort(~valid, axis=-1, kind="stable")
+    base = np.take_along_axis(np.where(valid, values, 0.0), order, axis=-1)
+    n = valid.sum(axis=-1)
+    n_years = base.shape[-1]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # Bootstrap: reamostra os anos do baseline com reposição
+        # (índices planos em `base`: evita o custo de take_along_axis)
+        offsets = np.arange(n.size).reshape(n.shape) * n_years
+        idx = (rng.random((n_resamples, *base.shape)) * n[None, :, :, None]).astype(np.intp)
+        idx += offsets[None, :, :, None]
+        draws = base.ravel()[idx]
+        draws *= np.arange(n_years) < n[None, :, :, None]
+        boot_mean = draws.sum(axis=-1) / n
+        boot_impact = (event_values - boot_mean) / boot_mean * 100
+        alpha = (1 - confidence) / 2
+        ci_low, ci_high = np.percentile(boot_impact, [100 * alpha, 100 * (1 - alpha)], axis=0)
+
+        # Permutação: sorteia qual dos n + 1 meses (baseline + evento) faz o
+        # papel do evento e compara com a média dos outros n
+        pool = np.concatenate([base, np.zeros_like(base[..., :1])], axis=-1)
+        np.put_along_axis(pool, n[..., None], np.nan_to_num(event_values)[..., None], axis=-1)
+        total = pool.sum(axis=-1)
+        baseline = (total - event_values) / n
+        observed = np.abs((event_values - baseline) / baseline * 100)
+
+        pick = (rng.random((n_resamples, *n.shape)) * (n + 1)).astype(np.intp)
+        picked = np.take_along_axis(pool[None], pick[..., None], axis=-1)[..., 0]
+        others = (total - picked) / n
+        perm_impact = np.abs((picked - others) / others * 100)
+        extreme = (perm_impact >= observed) | np.isclose(perm_impact, observed)
+        p_value = (1 + extreme.sum(axis=0)) / (n_resamples + 1)
+
+    return ci_low, ci_high, p_value
+
+
+def _significance_task(args):
+    """Adaptador de `_significance_chunk` para `ProcessPoolExecutor.map`."""
+    return _significance_chunk(*args)
+
+
+def impact_significance(
+    pivot: pd.DataFrame,
+    events: pd.DataFrame,
+    n_resamples: int = 2000,
+    confidence: float = 0.95,
+    seed: int = 0,
+    jobs: int = 1,
+    exclude_other_events: bool = False,
+    max_block_elements: int = MAX_BLOCK_ELEMENTS,
+) -> pd.DataFrame:
+    """Impacto de cada (evento, métrica) com intervalo de confiança e p-valor.
+
+    - ``CILow``/``CIHigh``: intervalo bootstrap (percentis) do impacto
+      percentual, reamostrando com reposição os anos do baseline.
+    - ``PValue``: teste de permutação bicaudal; sob a hipótese nula o mês
+      do evento é intercambiável com os mesmos meses dos outros anos. Com
+      ``n`` anos de baseline, o menor p-valor possível é ``1 / (n + 1)``.
+
+    Os eventos são processados em blocos de no máximo ``max_block_elements``
+    valores reamostrados por array; com ``jobs > 1`` os blocos são
+    distribuídos num pool de processos. Cada bloco tem a própria semente
+    derivada de ``seed``, então o resultado não depende de ``jobs``.
+    """
+    events, metrics, same_month, event_values, mask = _event_arrays(
+        pivot, events, exclude_other_events
+    )
+    n_events, n_years, n_metrics = same_month.shape
+
+    per_event = max(1, n_resamples * n_years * n_metrics)
+    chunk = max(1, max_block_elements // per_event)
+    starts = range(0, n_events, chunk)
+    seeds = np.random.SeedSequence(seed).spawn(len(starts))
+    tasks = [
+        (
+            same_month[i : i + chunk],
+            event_values[i : i + chunk],
+            mask[i : i + chunk],
+            n_resamples,
+            confidence,
+            chunk_seed,
+        )
+        for i, chunk_seed in zip(starts, seeds)
+    ]
+
+    if jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as executor:
+            results = list(executor.map(_significance_task, tasks))
+    else:
+        results = [_significance_task(task) for task in tasks]
+
+    if results:
+        ci_low, ci_high, p_value = (np.concatenate(parts) for parts in zip(*results))
+    else:
+        ci_low = ci_high = p_value = np.empty((0, n_metrics))
+
+    columns = _impact_columns(same_month, event_values, mask)
+    columns.update({"CILow": ci_low, "CIHigh": ci_high, "PValue": p_value})
+    return _impact_frame(events, metrics, columns)
+
+
+def save_impacts(impacts: pd.DataFrame, path: Optional[Path] = None) -> Path:
+    """Grava a tabela de impactos em CSV."""
+    path = path or IMPACTS_FILE
+    impacts.to_csv(path, index=False)
+    return path
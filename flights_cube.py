@@ -0,0 +1,90 @@
+"""
+flights_cube.py
+
+Cubo de agregados das chegadas em LAS, materializado durante o
+`fetch-flights --cubes`.
+
+O cubo guarda, para cada combinação Origin × MarketingCarrier × YearQuarter ×
+FareClass, o número de chegadas e as somas/contagens de tarifa e distância.
+Como somas e contagens são aditivas, qualquer agrupamento mais grosso (por
+origem, por trimestre, ...) sai de um `groupby` sobre o cubo, sem reler os
+voos linha a linha.
+
+O arquivo é um Parquet pequeno, ordenado pelas dimensões, com as dimensões
+gravadas como categóricas; `load_cube` aplica filtros na leitura e devolve a
+tabela indexada pelas dimensões.
+"""
+
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+from config import DATA_PROCESSED
+
+CUBE_FILE = DATA_PROCESSED / "flights_cube.parquet"
+CUBE_DIMENSIONS = ["Origin", "MarketingCarrier", "YearQuarter", "FareClass"]
+CUBE_MEASURES = ["Arrivals", "FareSum", "FareCount", "DistanceSum", "DistanceCount"]
+ROLLUP_COLUMNS = ["Arrivals", "TotalFare", "AvgFare", "AvgDistance"]
+
+
+def cube_to_frame(cube: dict) -> pd.DataFrame:
+    """Converte o acumulador de `flights_parser.update_cube` numa tabela."""
+    frame = pd.DataFrame(
+        [(*key, *cell) for key, cell in cube.items()],
+        columns=CUBE_DIMENSIONS + CUBE_MEASURES,
+    )
+    frame = frame.astype(
+        {
+            **{d: "category" for d in CUBE_DIMENSIONS},
+            "Arrivals": "int64",
+            "FareSum": "float64",
+            "FareCount": "int64",
+            "DistanceSum": "float64",
+            "DistanceCount": "int64",
+        }
+    )
+    return frame.sort_values(CUBE_DIMENSIONS, kind="stable").reset_index(drop=True)
+
+
+def save_cube(cube_df: pd.DataFrame, path: Path = CUBE_FILE) -> Path:
+    """Grava o cubo em Parquet, ordenado pelas dimensões."""
+    cube_df[CUBE_DIMENSIONS + CUBE_MEASURES].to_parquet(path, index=False)
+    return path
+
+
+def load_cube(path: Path = CUBE_FILE, **filters) -> pd.DataFrame:
+    """Lê o cubo indexado pelas dimensões.
+
+    Os filtros são listas de valores por dimensão, aplicados na leitura do
+    Parquet, ex.: ``load_cube(Origin=["JFK", "LAX"], YearQuarter=["20222"])``.
+    """
+    unknown = set(filters) - set(CUBE_DIMENSIONS)
+    if unknown:
+        raise ValueError(f"Dimensões desconhecidas no cubo: {', '.join(sorted(unknown))}")
+    conditions = [(dim, "in", list(values)) for dim, values in filters.items() if values]
+    cube_df = pd.read_parquet(path, filters=conditions or None)
+    return cube_df.set_index(CUBE_DIMENSIONS).sort_index()
+
+
+def rollup(cube_df: pd.DataFrame, by: Optional[list[str]] = None) -> pd.DataFrame:
+    """Agrega o cubo pelas dimensões ``by`` (todas somadas se vazio).
+
+    Retorna ``Arrivals``, ``TotalFare``, ``AvgFare`` e ``AvgDistance`` por
+    grupo. Aceita o cubo indexado (de `load_cube`) ou com as dimensões como
+    colunas (de `cube_to_frame`).
+    """
+    if isinstance(cube_df.index, pd.MultiIndex):
+        cube_df = cube_df.reset_index()
+    if by:
+        totals = cube_df.groupby(by, observed=True)[CUBE_MEASURES].sum()
+    else:
+        totals = cube_df[CUBE_MEASURES].sum().to_frame().T
+    return pd.DataFrame(
+        {
+            "Arrivals": totals["Arrivals"],
+            "TotalFare": totals["FareSum"],
+            "AvgFare": totals["FareSum"] / totals["FareCount"],
+            "AvgDistance": totals["DistanceSum"] / totals["DistanceCount"],
+        }
+    )
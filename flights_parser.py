@@ -1,7 +1,18 @@
+import contextlib
 import csv
+import itertools
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
+import instrumentation
 from config import DATA_RAW, DATA_PROCESSED
 
+# One ``flights_<quarter>.csv`` partition per DB1B input file
+FLIGHTS_DIR = DATA_PROCESSED / "flights_data"
+PARTITION_GLOB = "flights_*.csv"
+
 
 HEADER = [
     "TicketID",
@@ -21,17 +32,310 @@ HEADER = [
     "FareAmount",
 ]
 
+SEGMENT_COLUMNS = [
+    "TicketID",
+    "YearQuarter",
+    "SegmentNum",
+    "From",
+    "To",
+    "MarketingCarrier",
+    "OperatingCarrier",
+    "Distance",
+    "FareAmount",
+]
+SEGMENT_BATCH_ROWS = 100_000
+# Rows parsed before their numeric columns are converted in bulk
+PARSE_BATCH_ROWS = 10_000
+# Lines read by ``validate_sample`` before a file is fully scanned
+SAMPLE_LINES = 100
+NUMERIC_COLUMNS = {"Distance": HEADER.index("Distance"), "FareAmount": HEADER.index("FareAmount")}
+NUMERIC_SEGMENT_COLUMNS = {
+    "Distance": SEGMENT_COLUMNS.index("Distance"),
+    "FareAmount": SEGMENT_COLUMNS.index("FareAmount"),
+}
+
+
+def parse_quarter_code(code):
+    """Return ``(year, quarter)`` for a DB1B quarter code.
+
+    Accepts ``YYYYQ`` (e.g. ``'20222'``) and ``YYYYMM`` codes, where the month
+    identifies its quarter (e.g. ``'202206'`` -> ``(2022, 2)``).
+    """
+    code = str(code).strip()
+    if code.isdigit():
+        if len(code) == 5 and code[4] in "1234":
+            return int(code[:4]), int(code[4])
+        if len(code) == 6 and 1 <= int(code[4:]) <= 12:
+            return int(code[:4]), (int(code[4:]) - 1) // 3 + 1
+    raise ValueError(f"Invalid quarter code: {code!r}")
+
+
+def convert_numeric(values):
+    """Parse a column of numeric strings in one vectorized pass.
+
+    Returns ``(numbers, n_invalid)``: ``numbers`` holds floats, with
+    ``None`` where the value is empty or not a number, and ``n_invalid``
+    counts the non-empty values that could not be parsed.
+    """
+    import numpy as np
+    import pandas as pd
+
+    if not values:
+        return [], 0
+    raw = np.asarray(values, dtype=object)
+    try:
+        # Fast path: a clean column converts in a single C loop
+        parsed = raw.astype(np.float64)
+    except ValueError:
+        parsed = pd.to_numeric(raw, errors="coerce").astype(np.float64)
+    missing = np.isnan(parsed)
+    numbers = parsed.tolist()
+    if not missing.any():
+        return numbers, 0
+    for idx in np.flatnonzero(missing).tolist():
+        numbers[idx] = None
+    return numbers, int(np.count_nonzero(missing & (raw != "")))
+
+
+def file_quarter(file_path):
+    """Return ``(year, quarter)`` from a ``db1b.public.<code>.asc`` file name."""
+    return parse_quarter_code(Path(file_path).name.split(".")[2])
+
+
+def validate_sample(file_path, sample_lines=SAMPLE_LINES):
+    """Check the first lines of a DB1B file before scanning all of it.
+
+    Returns ``None`` when at least one sampled line has the DB1B layout
+    (21+ ``|``-separated fields), or a message explaining why the file
+    would yield nothing. Years are not checked here: a file may mix
+    quarters, so records are filtered line by line while scanning.
+    """
+    with open(file_path, "r") as infile:
+        for line in itertools.islice(infile, sample_lines):
+            if len(line.strip().split("|")) >= 21:
+                return None
+    return f"no DB1B records in the first {sample_lines} lines"
+
+
+def select_files(folder_path=DATA_RAW, quarter_from=None, quarter_to=None, validate=True):
+    """Return the DB1B files of ``folder_path`` to scan, pruned before opening them.
+
+    ``quarter_from``/``quarter_to`` (``YYYYQ`` or ``YYYYMM`` codes, inclusive)
+    are compared with the quarter code in each file name, so files outside
+    the window are never opened. With ``validate``, the remaining files go
+    through ``validate_sample`` and the ones that would yield nothing are
+    skipped with a warning.
+    """
+    lower = parse_quarter_code(quarter_from) if quarter_from else None
+    upper = parse_quarter_code(quarter_to) if quarter_to else None
+    selected = []
+    for file in sorted(Path(folder_path).glob("db1b.public.*.asc")):
+        if lower or upper:
+            try:
+                quarter = file_quarter(file)
+            except (IndexError, ValueError):
+                print(f"⚠️  {file.name}: no quarter code in the file name, skipped.")
+                continue
+            if (lower and quarter < lower) or (upper and quarter > upper):
+                continue
+        if validate:
+            problem = validate_sample(file)
+            if problem:
+                print(f"⚠️  {file.name}: {problem}, skipped.")
+                continue
+        selected.append(file)
+    return selected
+
+
+def _itinerary_segments(parts, ticket_id, year_quarter, origin, total_segments):
+    """Return every segment of an itinerary as ``SEGMENT_COLUMNS`` lists.
+
+    The departure airport of a segment is the itinerary origin for the first
+    one and the previous segment's arrival for the others. Distance and fare
+    are left as text, to be converted in bulk by ``_convert_batch``.
+    """
+    rows = []
+    departure = origin
+    for segment_num in range(1, total_segments + 1):
+        segment_start = 10 + (segment_num - 1) * 11
+        seg = parts[segment_start : segment_start + 11]
+        rows.append(
+            [
+                ticket_id,
+                year_quarter,
+                segment_num,
+                departure,
+                seg[6],
+                seg[0],
+                seg[2],
+                seg[5],
+                seg[10],
+            ]
+        )
+        departure = seg[6]
+    return rows
+
+
+def update_cube(cube, key, distance, fare):
+    """Add one LAS arrival to an aggregate cube.
+
+    ``cube`` maps ``(Origin, MarketingCarrier, YearQuarter, FareClass)`` to
+    ``[count, fare_sum, fare_count, distance_sum, distance_count]``; missing
+    fares or distances only skip their own sum/count.
+    """
+    cell = cube.get(key)
+    if cell is None:
+        cell = cube[key] = [0, 0.0, 0, 0.0, 0]
+    cell[0] += 1
+    if fare is not None:
+        cell[1] += fare
+        cell[2] += 1
+    if distance is not None:
+        cell[3] += distance
+        cell[4] += 1
+
+
+class TicketIndex:
+    """Memory-compact set of TicketIDs seen so far, for cross-file dedup.
+
+    IDs are stored as 64-bit hashes (``pd.util.hash_array``) in a few sorted
+    NumPy runs, 8 bytes per ID and no Python strings, so it scales to
+    hundreds of millions of tickets. New runs are merged with the previous
+    one while it is not larger (like a binary counter), which keeps
+    ``O(log n)`` runs and makes insertions amortized ``O(log n)`` per ID.
+    Two different IDs collide with probability ~``n**2 / 2**65`` (about
+    0.3% for 300 million IDs), in which case one ticket is wrongly dropped.
+
+    ``staged()`` returns an index whose additions only reach this one on
+    ``commit()``, so the IDs of a file that fails halfway can be discarded.
+    """
+
+    def __init__(self, parent=None):
+        self._runs = []
+        self._parent = parent
+
+    def __len__(self):
+        return sum(len(run) for run in self._runs)
+
+    @property
+    def nbytes(self):
+        return sum(run.nbytes for run in self._runs)
+
+    def add_new(self, ticket_ids):
+        """Add a batch of IDs; return a boolean mask of the ones not seen before.
+
+        Within the batch, only the first occurrence of an ID counts as new.
+        """
+        import numpy as np
+        import pandas as pd
+
+        hashes = pd.util.hash_array(np.asarray(ticket_ids, dtype=object), categorize=False)
+        unique, first = np.unique(hashes, return_index=True)
+        fresh = ~self._contains(unique)
+        mask = np.zeros(len(hashes), dtype=bool)
+        mask[first[fresh]] = True
+        self._push(unique[fresh])
+        return mask
+
+    def staged(self):
+        """Return an empty index that also sees these IDs (see ``commit``)."""
+        return TicketIndex(parent=self)
+
+    def commit(self):
+        """Move the IDs of a ``staged`` index into its parent."""
+        # The runs are sorted and disjoint from the parent, as _push expects
+        for run in self._runs:
+            self._parent._push(run)
+        self._runs = []
+
+    def _contains(self, hashes):
+        import numpy as np
+
+        found = np.zeros(len(hashes), dtype=bool)
+        for run in self._runs:
+            pos = np.minimum(np.searchsorted(run, hashes), len(run) - 1)
+            found |= run[pos] == hashes
+        if self._parent is not None:
+            found |= self._parent._contains(hashes)
+        return found
+
+    def _push(self, run):
+        import numpy as np
+
+        if not len(run):
+            return
+        self._runs.append(run)
+        while len(self._runs) > 1 and len(self._runs[-2]) <= len(self._runs[-1]):
+            newer = self._runs.pop()
+            # Two sorted runs: the stable sort (timsort) merges them in linear time
+            self._runs[-1] = np.sort(np.concatenate([self._runs[-1], newer]), kind="stable")
+
+
+def _convert_columns(rows, columns, errors):
+    """Convert ``columns`` (name -> index) of ``rows`` in place, counting errors."""
+    for name, idx in columns.items():
+        numbers, n_invalid = convert_numeric([row[idx] for row in rows])
+        for row, number in zip(rows, numbers):
+            row[idx] = number
+        if n_invalid:
+            errors[name] = errors.get(name, 0) + n_invalid
+
+
+def _convert_batch(rows, cube, row_segments, segments, errors, seen):
+    """Convert a batch of parsed rows and feed the cube/segments with it.
 
-def process_file(file_path, max_lines=None):
+    ``row_segments`` holds the segment rows of each row (when ``segments``
+    is collected). With ``seen``, rows whose TicketID was already seen are
+    dropped, together with their segments, before anything else.
+    """
+    if seen is not None:
+        fresh = seen.add_new([row[0] for row in rows]).tolist()
+        rows = [row for row, keep in zip(rows, fresh) if keep]
+        if segments is not None:
+            row_segments = [segs for segs, keep in zip(row_segments, fresh) if keep]
+    _convert_columns(rows, NUMERIC_COLUMNS, errors)
+    if cube is not None:
+        for row in rows:
+            update_cube(cube, (row[5], row[10], row[2], row[8]), row[12], row[14])
+    if segments is not None:
+        segment_rows = [seg for segs in row_segments for seg in segs]
+        _convert_columns(segment_rows, NUMERIC_SEGMENT_COLUMNS, {})
+        segments.extend(tuple(seg) for seg in segment_rows)
+    return rows
+
+
+def iter_las_rows(file_path, max_lines=None, cube=None, segments=None, errors=None, seen=None):
+    """Yield the LAS-arrival rows of a DB1B file one at a time.
+
+    Lines are parsed in batches of ``PARSE_BATCH_ROWS`` rows whose
+    ``Distance`` and ``FareAmount`` columns are converted in bulk (see
+    ``convert_numeric``); an invalid value only nulls its own field. The
+    number of invalid values per column is added to ``errors`` (a dict),
+    when given, and to the instrumentation counters.
+
+    Memory use does not grow with the file size. When ``cube`` is a dict,
+    each row is also aggregated into it during the same scan (see
+    ``update_cube``). When ``segments`` is a list, every segment of each
+    LAS-bound itinerary is appended to it as a ``SEGMENT_COLUMNS`` tuple
+    before the rows of its batch are yielded, so the caller can flush the
+    list between rows.
+
+    When ``seen`` is a ``TicketIndex``, itineraries whose TicketID is
+    already in it (from this or earlier files) are dropped and the new IDs
+    are added, so a ticket is counted once across overlapping quarters.
+    """
     filename = Path(file_path).name
     quarter_code = filename.split(".")[2]  # e.g., '202206'
-    yearquarter = quarter_code
-    rows = []
+    year = quarter_code[:4]
+    file_errors = {}
+    pending, pending_segments = [], []
+    kept = duplicates = lines_scanned = 0
 
     with open(file_path, "r") as infile:
-        for i, line in enumerate(infile):
-            if max_lines and i >= max_lines:
+        for line in infile:
+            if max_lines and lines_scanned >= max_lines:
                 break
+            lines_scanned += 1
 
             parts = line.strip().split("|")
             if len(parts) < 21:
@@ -48,7 +352,7 @@ def process_file(file_path, max_lines=None):
             roundtrip = parts[8]
             fare_class = parts[9]
 
-            if yq[:4] != yearquarter[:4]:
+            if yq[:4] != year:
                 continue
 
             # Loop through all flight segments in the record
@@ -63,13 +367,11 @@ def process_file(file_path, max_lines=None):
                 if segment_num != total_segments or arrival_airport != "LAS":
                     continue
 
-                try:
-                    distance = float(seg[5])
-                    fare = float(seg[10])
-                except ValueError:
-                    distance = fare = None
+                if segments is not None:
+                    pending_segments.append(_itinerary_segments(parts, ticket_id, yq, origin, total_segments))
 
-                rows.append(
+                kept += 1
+                pending.append(
                     [
                         ticket_id,
                         unique_carrier,
@@ -83,19 +385,49 @@ def process_file(file_path, max_lines=None):
                         segment_num,
                         seg[0],
                         seg[2],
-                        distance,
+                        seg[5],
                         arrival_airport,
-                        fare,
+                        seg[10],
                     ]
                 )
 
-    print(f"✅ {Path(file_path).name}: {len(rows)} LAS-arrival segments found.")
-    return rows
+            if len(pending) >= PARSE_BATCH_ROWS:
+                batch = _convert_batch(pending, cube, pending_segments, segments, file_errors, seen)
+                duplicates += len(pending) - len(batch)
+                pending, pending_segments = [], []
+                yield from batch
+
+    if pending:
+        batch = _convert_batch(pending, cube, pending_segments, segments, file_errors, seen)
+        duplicates += len(pending) - len(batch)
+        yield from batch
+    kept -= duplicates
+
+    instrumentation.count("flights.lines_scanned", lines_scanned)
+    instrumentation.count("flights.rows_kept", kept)
+    instrumentation.count("flights.duplicates", duplicates)
+    for name, n_invalid in file_errors.items():
+        instrumentation.count(f"flights.invalid.{name}", n_invalid)
+        if errors is not None:
+            errors[name] = errors.get(name, 0) + n_invalid
+    invalid = ", ".join(f"{name}={n}" for name, n in file_errors.items())
+    print(
+        f"✅ {filename}: {kept} LAS-arrival segments found."
+        + (f" Duplicate tickets dropped: {duplicates}." if duplicates else "")
+        + (f" Invalid values: {invalid}." if invalid else "")
+    )
 
 
-def get_flight_raw_data(folder_path=DATA_RAW, max_lines=None):
-    path = Path(folder_path)
-    files = sorted(path.glob("db1b.public.*.asc"))
+def process_file(file_path, max_lines=None, cube=None, segments=None, errors=None, seen=None):
+    """Return the LAS-arrival rows of a DB1B file as a list (see ``iter_las_rows``)."""
+    with instrumentation.span("flights.process_file", file=Path(file_path).name):
+        return list(iter_las_rows(file_path, max_lines, cube, segments, errors, seen))
+
+
+def get_flight_raw_data(
+    folder_path=DATA_RAW, max_lines=None, cube=None, errors=None, quarter_from=None, quarter_to=None, seen=None
+):
+    files = select_files(folder_path, quarter_from, quarter_to)
 
     if not files:
         print("No files found.")
@@ -104,11 +436,258 @@ def get_flight_raw_data(folder_path=DATA_RAW, max_lines=None):
     all_rows = []
     for file in files:
         print(f"🔍 Processing: {file.name}")
-        all_rows.extend(process_file(file, max_lines))
+        all_rows.extend(process_file(file, max_lines, cube=cube, errors=errors, seen=seen))
 
     return all_rows
 
 
+def write_flight_csv(
+    output_path,
+    folder_path=DATA_RAW,
+    max_lines=None,
+    cube=None,
+    segment_sink=None,
+    errors=None,
+    files=None,
+    quarter_from=None,
+    quarter_to=None,
+    seen=None,
+):
+    """Stream the LAS-arrival rows of every DB1B file straight into a CSV.
+
+    Produces the same ``;``-separated file as building a DataFrame from
+    ``get_flight_raw_data`` and calling ``to_csv``, but rows are written as
+    they are parsed, so memory stays flat regardless of how many files are
+    processed. Returns the number of rows written.
+
+    When ``segment_sink`` is given, every segment of the LAS-bound
+    itineraries is collected in the same scan and handed to it in batches
+    of ``SEGMENT_BATCH_ROWS`` (see ``iter_las_rows``); the batch list is
+    reused, so the sink must consume it before returning.
+
+    ``files`` restricts the scan to the given DB1B files instead of the ones
+    ``select_files`` picks from ``folder_path`` and the quarter bounds.
+    ``seen`` drops tickets already seen (see ``TicketIndex``).
+    """
+    if files is None:
+        files = select_files(folder_path, quarter_from, quarter_to)
+    if not files:
+        print("No files found.")
+
+    segments = [] if segment_sink is not None else None
+    written = 0
+    with open(output_path, "w", newline="") as outfile:
+        writer = csv.writer(outfile, delimiter=";", lineterminator="\n")
+        writer.writerow(HEADER)
+        for file in files:
+            print(f"🔍 Processing: {file.name}")
+            with instrumentation.span("flights.process_file", file=file.name):
+                for row in iter_las_rows(
+                    file, max_lines, cube=cube, segments=segments, errors=errors, seen=seen
+                ):
+                    writer.writerow(row)
+                    written += 1
+                    if segments is not None and len(segments) >= SEGMENT_BATCH_ROWS:
+                        segment_sink(segments)
+                        segments.clear()
+    if segments:
+        segment_sink(segments)
+    return written
+
+
+def merge_cube(cube, other):
+    """Add the cells of ``other`` into ``cube`` (both as in ``update_cube``)."""
+    for key, cell in other.items():
+        target = cube.get(key)
+        if target is None:
+            cube[key] = list(cell)
+        else:
+            for i, value in enumerate(cell):
+                target[i] += value
+
+
+def partition_files(path=FLIGHTS_DIR):
+    """Return the flight CSVs under ``path``: its partitions, or ``path`` itself if it is a file."""
+    path = Path(path)
+    if path.is_dir():
+        return sorted(path.glob(PARTITION_GLOB))
+    return [path]
+
+
+def _partition_paths(file, output_dir, segments_dir):
+    quarter_code = Path(file).name.split(".")[2]
+    target = Path(output_dir) / f"flights_{quarter_code}.csv"
+    segments_target = Path(segments_dir) / f"segments_{quarter_code}.parquet" if segments_dir else None
+    return target, segments_target
+
+
+def _params_path(target):
+    # Parse parameters of a partition, next to it (hidden, like the temp files)
+    return target.with_name(f".{target.name}.params")
+
+
+def _partition_params(max_lines, dedup):
+    """Parameters that change a partition's rows, recorded next to it."""
+    return {"max_lines": max_lines, "dedup": bool(dedup)}
+
+
+def _is_up_to_date(file, target, segments_target, params):
+    """A partition is reused only if newer than its file and written with the same ``params``."""
+    if not target.exists() or target.stat().st_mtime < Path(file).stat().st_mtime:
+        return False
+    if segments_target is not None and not segments_target.exists():
+        return False
+    try:
+        return json.loads(_params_path(target).read_text()) == params
+    except (OSError, ValueError):
+        return False
+
+
+def _tmp_path(target):
+    # Hidden name: ignored by the partition readers until it is renamed
+    return target.with_name(f".{target.name}.tmp")
+
+
+def _write_partition(file, output_dir, max_lines, with_cube, segments_dir, seen=None):
+    """Write the partition of one DB1B file; returns ``(rows, cube, errors)``.
+
+    The partition (and its segments file) is written under a temporary name
+    and atomically renamed on success, so readers never see a partial file.
+    Its parse parameters are recorded last (see ``_is_up_to_date``).
+    """
+    target, segments_target = _partition_paths(file, output_dir, segments_dir)
+    tmp_paths = [_tmp_path(target)] + ([_tmp_path(segments_target)] if segments_target else [])
+    cube = {} if with_cube else None
+    errors = {}
+    try:
+        with contextlib.ExitStack() as stack:
+            sink = None
+            if segments_target is not None:
+                from flights_segments import SegmentWriter
+
+                sink = stack.enter_context(SegmentWriter(tmp_paths[1])).write
+            written = write_flight_csv(
+                tmp_paths[0],
+                max_lines=max_lines,
+                cube=cube,
+                segment_sink=sink,
+                errors=errors,
+                files=[file],
+                seen=seen,
+            )
+        # Stale parameters must never describe the new rows, even after a crash
+        params_path = _params_path(target)
+        params_path.unlink(missing_ok=True)
+        if segments_target is not None:
+            os.replace(tmp_paths[1], segments_target)
+        # The CSV goes last: its presence means the whole partition is complete
+        os.replace(tmp_paths[0], target)
+    except BaseException:
+        for tmp in tmp_paths:
+            tmp.unlink(missing_ok=True)
+        raise
+    params_path.write_text(json.dumps(_partition_params(max_lines, seen is not None)))
+    return written, cube, errors
+
+
+def write_flight_partitions(
+    output_dir=FLIGHTS_DIR,
+    folder_path=DATA_RAW,
+    max_lines=None,
+    cube=None,
+    segments_dir=None,
+    errors=None,
+    jobs=1,
+    force=False,
+    quarter_from=None,
+    quarter_to=None,
+    dedup=False,
+):
+    """Write one ``flights_<quarter>.csv`` partition per DB1B file.
+
+    Each partition is published (atomic rename) as soon as its file is
+    parsed, with ``jobs`` files parsed in parallel processes, so readers can
+    start on early quarters and a failure only loses the failing quarter.
+    Partitions newer than their source file and written with the same
+    ``max_lines``/``dedup`` are kept as they are unless ``force`` is set
+    (a partition truncated by ``max_lines`` is rewritten by a full run);
+    with ``cube``, every file is parsed again so the cube
+    covers all quarters. ``segments_dir`` also writes a
+    ``segments_<quarter>.parquet`` per partition (see ``flights_segments``).
+    Only files inside ``quarter_from``/``quarter_to`` are read (see
+    ``select_files``); partitions of other quarters are left untouched.
+
+    With ``dedup``, a ticket already written for an earlier file (in file
+    name order) is dropped from later ones. The files then share one
+    ``TicketIndex``, so they are parsed one at a time in this process and
+    all of them are parsed again, as with ``cube``. A file's tickets join
+    the index only once its partition is published, so a failed file does
+    not drop them from the later ones.
+
+    Returns a dict mapping each written partition to its number of rows.
+    Raises ``RuntimeError`` naming the files that failed, after the others
+    are done.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    if segments_dir is not None:
+        Path(segments_dir).mkdir(parents=True, exist_ok=True)
+
+    files = select_files(folder_path, quarter_from, quarter_to)
+    if not files:
+        print("No files found.")
+    pending = []
+    params = _partition_params(max_lines, dedup)
+    for file in files:
+        target, segments_target = _partition_paths(file, output_dir, segments_dir)
+        if not force and cube is None and not dedup and _is_up_to_date(file, target, segments_target, params):
+            print(f"⏭️  {target.name} is up to date.")
+        else:
+            pending.append(file)
+
+    written, failed = {}, []
+
+    def collect(file, result):
+        rows, file_cube, file_errors = result
+        if cube is not None:
+            merge_cube(cube, file_cube)
+        if errors is not None:
+            for name, n_invalid in file_errors.items():
+                errors[name] = errors.get(name, 0) + n_invalid
+        target = _partition_paths(file, output_dir, segments_dir)[0]
+        written[target] = rows
+        print(f"💾 {target.name}: {rows} rows.")
+
+    args = (output_dir, max_lines, cube is not None, segments_dir)
+    if dedup or jobs <= 1 or len(pending) <= 1:
+        seen = TicketIndex() if dedup else None
+        for file in pending:
+            staged = seen.staged() if dedup else None
+            try:
+                collect(file, _write_partition(file, *args, seen=staged))
+                if dedup:
+                    staged.commit()
+            except Exception as e:
+                print(f"❌ {file.name}: {e}")
+                failed.append(file.name)
+    else:
+        # The pipeline runs stages in threads; forking a multithreaded process is unsafe
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(jobs, len(pending)), mp_context=context) as executor:
+            futures = {executor.submit(_write_partition, file, *args): file for file in pending}
+            for future in as_completed(futures):
+                file = futures[future]
+                try:
+                    collect(file, future.result())
+                except Exception as e:
+                    print(f"❌ {file.name}: {e}")
+                    failed.append(file.name)
+
+    if failed:
+        raise RuntimeError(f"Failed to process: {', '.join(sorted(failed))}")
+    return written
+
+
 if __name__ == "__main__":
     # Exemplo de uso para teste, se necessário
     raw_data = get_flight_raw_data(".", max_lines=100000)
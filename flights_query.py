@@ -0,0 +1,309 @@
+"""
+flights_query.py
+
+Agregações sobre os dados de voos processados sem carregar o arquivo inteiro
+no pandas. A entrada é a pasta de partições trimestrais do `fetch-flights`
+(todas as ``flights_*.csv`` são lidas juntas) ou um único CSV.
+
+Três backends executam a mesma consulta (contagem de chegadas, tarifa média e
+distância média agrupadas por colunas do `flights_parser.HEADER` ou pelo
+trimestre normalizado ``Quarter``):
+
+- ``duckdb``: SQL embarcado, multithread, lendo o CSV direto do disco;
+- ``polars``: `scan_csv` preguiçoso, com projeção e filtros empurrados para a
+  leitura (predicate pushdown) e execução paralela;
+- ``pandas``: leitura em blocos (sempre disponível, single-thread).
+
+DuckDB e Polars são dependências opcionais: instale com
+``pip install duckdb`` ou ``pip install polars``. Sem backend informado, usa
+o primeiro instalado, nessa ordem (`default_backend`). Voos sem
+``YearQuarter`` (ou outra chave) formam um grupo próprio, com chave nula, em
+todos os backends.
+
+O pandas só é importado pelo backend pandas: `BACKENDS` e `QUERIES` podem ser
+lidos sem custo (ex.: pelo parser de argumentos do `run.py`).
+"""
+
+import importlib
+import importlib.util
+import itertools
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+from flights_parser import FLIGHTS_DIR, HEADER, parse_quarter_code, partition_files
+from memory_budget import chunk_rows
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+BACKENDS = ("duckdb", "polars", "pandas")
+# Consultas prontas: nome -> colunas de agrupamento
+QUERIES = {
+    "fare-by-origin-quarter": ["Origin", "Quarter"],
+    "fare-by-quarter": ["Quarter"],
+    "fare-by-carrier-quarter": ["MarketingCarrier", "Quarter"],
+    "origin-mix": ["Origin"],
+    "fare-class-mix": ["FareClass", "Quarter"],
+}
+RESULT_COLUMNS = ["Arrivals", "AvgFare", "AvgDistance"]
+# Linhas por bloco do backend pandas
+CHUNK_SIZE = 500_000
+NUMERIC_COLUMNS = ["Distance", "FareAmount"]
+# Chaves lidas como texto (preserva zeros à esquerda e códigos como "20221")
+STRING_COLUMNS = [c for c in HEADER if c not in NUMERIC_COLUMNS]
+# Além das colunas do HEADER, é possível agrupar por ``Quarter`` (rótulo
+# ``YYYYQn`` derivado de `YearQuarter`, que pode vir como YYYYQ ou YYYYMM)
+GROUP_COLUMNS = HEADER + ["Quarter"]
+
+
+def _require(module: str):
+    """Importa um backend opcional ou explica como instalá-lo."""
+    try:
+        return importlib.import_module(module)
+    except ImportError:
+        raise RuntimeError(
+            f"O backend '{module}' não está instalado. Instale com: pip install {module}"
+        ) from None
+
+
+def default_backend() -> str:
+    """Primeiro backend de `BACKENDS` instalado (``pandas`` está sempre disponível)."""
+    for backend in BACKENDS:
+        if backend == "pandas" or importlib.util.find_spec(backend) is not None:
+            return backend
+
+
+def _quarter_label(code: str) -> str:
+    """Converte um código de trimestre (YYYYQ ou YYYYMM) no rótulo ``YYYYQn``."""
+    year, quarter = parse_quarter_code(code)
+    return f"{year}Q{quarter}"
+
+
+def _validate(group_by: list[str]):
+    unknown = [c for c in group_by if c not in GROUP_COLUMNS]
+    if unknown:
+        raise ValueError(f"Colunas desconhecidas para agrupamento: {', '.join(unknown)}")
+
+
+def _query_duckdb(paths, group_by, quarter_from, quarter_to, threads, memory_limit):
+    duckdb = _require("duckdb")
+    con = duckdb.connect()
+    try:
+        if threads:
+            con.execute(f"SET threads TO {int(threads)}")
+        if memory_limit:
+            # Acima do limite o DuckDB descarrega estados de agregação em disco
+            con.execute(f"SET memory_limit = '{int(memory_limit) // 1024**2}MB'")
+        keys = ", ".join(f'"{c}"' for c in group_by)
+        where, params = [], [paths]
+        if quarter_from:
+            where.append('"Quarter" >= ?')
+            params.append(quarter_from)
+        if quarter_to:
+            where.append('"Quarter" <= ?')
+            params.append(quarter_to)
+        types = ", ".join(f"'{c}': 'VARCHAR'" for c in STRING_COLUMNS)
+        sql = f"""
+            WITH flights AS (
+                SELECT *,
+                       substr("YearQuarter", 1, 4) || 'Q' || CASE
+                           WHEN length("YearQuarter") = 5 THEN substr("YearQuarter", 5, 1)
+                           ELSE CAST((CAST(substr("YearQuarter", 5, 2) AS INTEGER) + 2) // 3 AS VARCHAR)
+                       END AS "Quarter"
+                FROM read_csv(?, delim=';', header=true, types={{{types}}})
+            )
+            SELECT {keys},
+                   COUNT(*) AS "Arrivals",
+                   AVG("FareAmount") AS "AvgFare",
+                   AVG("Distance") AS "AvgDistance"
+            FROM flights
+            {"WHERE " + " AND ".join(where) if where else ""}
+            GROUP BY {keys}
+            ORDER BY {keys}
+        """
+        return con.execute(sql, params).df()
+    finally:
+        con.close()
+
+
+def _query_polars(paths, group_by, quarter_from, quarter_to, threads, memory_limit):
+    pl = _require("polars")
+    code = pl.col("YearQuarter")
+    quarter = (
+        pl.when(code.str.len_chars() == 5)
+        .then(code.str.slice(4, 1))
+        .otherwise(((code.str.slice(4, 2).cast(pl.Int32) + 2) // 3).cast(pl.Utf8))
+    )
+    lf = pl.scan_csv(
+        paths, separator=";", schema_overrides={c: pl.Utf8 for c in STRING_COLUMNS}
+    ).with_columns(pl.concat_str([code.str.slice(0, 4), pl.lit("Q"), quarter]).alias("Quarter"))
+    if quarter_from:
+        lf = lf.filter(pl.col("Quarter") >= quarter_from)
+    if quarter_to:
+        lf = lf.filter(pl.col("Quarter") <= quarter_to)
+    result = (
+        lf.group_by(group_by)
+        .agg(
+            pl.len().alias("Arrivals"),
+            pl.col("FareAmount").mean().alias("AvgFare"),
+            pl.col("Distance").mean().alias("AvgDistance"),
+        )
+        .sort(group_by, nulls_last=True)
+        # O motor de streaming processa o CSV em lotes, com memória limitada
+        .collect(engine="streaming" if memory_limit else "auto")
+    )
+    return result.to_pandas()
+
+
+def sum_flight_chunks(paths, group_by, columns, chunksize, prepare=None) -> "pd.DataFrame":
+    """Soma chegadas, tarifas e distâncias por ``group_by`` lendo ``paths`` em blocos.
+
+    Só ``columns``, ``FareAmount`` e ``Distance`` são lidas; ``prepare``
+    transforma cada bloco antes do agrupamento (ex.: deriva ``Quarter`` ou
+    filtra trimestres). Os somatórios parciais dos blocos são somados ao
+    final, então a memória depende do número de grupos e não dos dados.
+    Chaves nulas formam um grupo próprio, como no GROUP BY do SQL.
+
+    Retorna um DataFrame indexado por ``group_by`` com ``Arrivals``,
+    ``FareSum``, ``FareCount``, ``DistanceSum`` e ``DistanceCount`` (vazio
+    quando não há linhas).
+    """
+    import pandas as pd
+
+    partials = []
+    readers = (
+        pd.read_csv(
+            path,
+            sep=";",
+            usecols=sorted(set(columns) | set(NUMERIC_COLUMNS)),
+            dtype={**{c: str for c in STRING_COLUMNS}, **{c: "float64" for c in NUMERIC_COLUMNS}},
+            chunksize=chunksize,
+        )
+        for path in paths
+    )
+    for chunk in itertools.chain.from_iterable(readers):
+        if prepare is not None:
+            chunk = prepare(chunk)
+        grouped = chunk.groupby(group_by, dropna=False)
+        partials.append(
+            pd.DataFrame(
+                {
+                    "Arrivals": grouped.size(),
+                    "FareSum": grouped["FareAmount"].sum(),
+                    "FareCount": grouped["FareAmount"].count(),
+                    "DistanceSum": grouped["Distance"].sum(),
+                    "DistanceCount": grouped["Distance"].count(),
+                }
+            )
+        )
+    if not partials:
+        return pd.DataFrame()
+    return pd.concat(partials).groupby(level=list(range(len(group_by))), dropna=False).sum()
+
+
+def _query_pandas(paths, group_by, quarter_from, quarter_to, threads, memory_limit):
+    import pandas as pd
+
+    def add_quarter(chunk):
+        codes = chunk["YearQuarter"]
+        # Códigos ausentes ou inválidos viram Quarter nulo, como no SQL do DuckDB
+        month = pd.to_numeric(codes.str[4:6], errors="coerce")
+        quarter = codes.str[4].where(codes.str.len() == 5, ((month + 2) // 3).astype("Int64").astype("string"))
+        chunk = chunk.assign(Quarter=(codes.str[:4] + "Q" + quarter).astype(object))
+        if quarter_from:
+            chunk = chunk[chunk["Quarter"] >= quarter_from]
+        if quarter_to:
+            chunk = chunk[chunk["Quarter"] <= quarter_to]
+        return chunk
+
+    keys = [c for c in group_by if c != "Quarter"]
+    total = sum_flight_chunks(
+        paths, group_by, keys + ["YearQuarter"], chunk_rows(memory_limit, CHUNK_SIZE), prepare=add_quarter
+    )
+    if total.empty:
+        return pd.DataFrame(columns=group_by + RESULT_COLUMNS)
+
+    result = pd.DataFrame(
+        {
+            "Arrivals": total["Arrivals"],
+            "AvgFare": total["FareSum"] / total["FareCount"],
+            "AvgDistance": total["DistanceSum"] / total["DistanceCount"],
+        }
+    )
+    return result.sort_index().reset_index()
+
+
+_BACKENDS = {
+    "duckdb": _query_duckdb,
+    "polars": _query_polars,
+    "pandas": _query_pandas,
+}
+
+
+def aggregate_flights(
+    group_by: list[str],
+    path: Path = FLIGHTS_DIR,
+    backend: Optional[str] = None,
+    quarter_from: Optional[str] = None,
+    quarter_to: Optional[str] = None,
+    threads: Optional[int] = None,
+    memory_limit: Optional[int] = None,
+) -> "pd.DataFrame":
+    """Agrega os voos de ``path`` (pasta de partições ou CSV) por ``group_by`` no backend escolhido.
+
+    Retorna um DataFrame com as colunas de agrupamento seguidas de
+    ``Arrivals``, ``AvgFare`` e ``AvgDistance``, ordenado pelas chaves.
+    ``quarter_from``/``quarter_to`` (códigos YYYYQ ou YYYYMM, inclusivos)
+    filtram os trimestres antes da agregação. ``memory_limit`` (bytes)
+    limita a memória da consulta: vira o ``memory_limit`` do DuckDB, liga o
+    motor de streaming do Polars e reduz os blocos do pandas. ``threads``
+    só vale para o DuckDB; nos outros backends é ignorado com um aviso.
+    """
+    _validate(group_by)
+    backend = backend or default_backend()
+    quarter_from = _quarter_label(quarter_from) if quarter_from else None
+    quarter_to = _quarter_label(quarter_to) if quarter_to else None
+    if backend not in _BACKENDS:
+        raise ValueError(f"Backend desconhecido: {backend} (opções: {', '.join(BACKENDS)})")
+    if threads and backend != "duckdb":
+        print(f"Aviso: o número de threads só é configurável no backend duckdb; ignorado no {backend}.")
+    paths = [str(f) for f in partition_files(path)]
+    result = _BACKENDS[backend](paths, group_by, quarter_from, quarter_to, threads, memory_limit)
+    result["Arrivals"] = result["Arrivals"].astype("int64")
+    return result[group_by + RESULT_COLUMNS]
+
+
+def main(
+    query: str = "fare-by-origin-quarter",
+    group_by: Optional[list[str]] = None,
+    backend: Optional[str] = None,
+    quarter_from: Optional[str] = None,
+    quarter_to: Optional[str] = None,
+    threads: Optional[int] = None,
+    output: Optional[Path] = None,
+    flights_file: Optional[Path] = None,
+    memory_limit: Optional[int] = None,
+):
+    """Executa uma consulta pronta (ou um agrupamento livre) e mostra/salva o resultado."""
+    group_by = group_by or QUERIES[query]
+    path = Path(flights_file or FLIGHTS_DIR)
+    if not path.exists() or not partition_files(path):
+        print(f"Erro: dados de voos não encontrados em {path}")
+        print("Execute 'python run.py fetch-flights' primeiro.")
+        return None
+
+    result = aggregate_flights(
+        group_by,
+        path=path,
+        backend=backend,
+        quarter_from=quarter_from,
+        quarter_to=quarter_to,
+        threads=threads,
+        memory_limit=memory_limit,
+    )
+    if output:
+        result.to_csv(output, index=False, sep=";")
+        print(f"✅ {len(result)} linhas salvas em: {output}")
+    else:
+        print(result.to_string(index=False))
+    return result
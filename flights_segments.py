@@ -0,0 +1,113 @@
+"""
+flights_segments.py
+
+Tabela normalizada de segmentos dos itinerários que terminam em LAS, gerada
+durante o `fetch-flights --segments`.
+
+As partições trimestrais ``flights_<trimestre>.csv`` do `fetch-flights`
+(em `flights_parser.FLIGHTS_DIR`) guardam só o último segmento de cada
+itinerário (a chegada em LAS) e descartam as conexões. Com ``--segments``, a
+leitura de cada arquivo DB1B também emite todos os segmentos desses
+itinerários, um por linha (`flights_parser.SEGMENT_COLUMNS`: bilhete, trimestre, número do
+segmento, aeroportos de partida/chegada, companhias, distância e tarifa),
+o que permite analisar rotas (quais hubs alimentam LAS) sem reler os voos.
+
+Os segmentos são gravados em Parquet (colunar, comprimido com zstd), um
+arquivo ``segments_<trimestre>.parquet`` por partição de voos em
+`SEGMENTS_DIR`, em lotes, à medida que a leitura avança: cada lote vira um
+row group, então a memória usada não depende do tamanho da base.
+"""
+
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+from config import DATA_PROCESSED
+from flights_parser import SEGMENT_COLUMNS
+
+SEGMENTS_DIR = DATA_PROCESSED / "flights_segments"
+# Colunas de baixa cardinalidade, lidas como categóricas
+CATEGORICAL_COLUMNS = ["YearQuarter", "From", "To", "MarketingCarrier", "OperatingCarrier"]
+
+
+def segment_schema():
+    import pyarrow as pa
+
+    types = {"SegmentNum": pa.int16(), "Distance": pa.float64(), "FareAmount": pa.float64()}
+    return pa.schema([(name, types.get(name, pa.string())) for name in SEGMENT_COLUMNS])
+
+
+class SegmentWriter:
+    """Grava lotes de segmentos num Parquet; usar como ``segment_sink``.
+
+    Exemplo::
+
+        with SegmentWriter(path) as writer:
+            write_flight_csv(csv_path, segment_sink=writer.write)
+    """
+
+    def __init__(self, path: Path):
+        import pyarrow.parquet as pq
+
+        self.path = Path(path)
+        self.schema = segment_schema()
+        self.rows_written = 0
+        self._writer = pq.ParquetWriter(self.path, self.schema, compression="zstd")
+
+    def write(self, rows: list[tuple]):
+        """Converte um lote de tuplas `SEGMENT_COLUMNS` num row group."""
+        import pyarrow as pa
+
+        if not rows:
+            return
+        columns = [
+            pa.array(values, type=field.type) for values, field in zip(zip(*rows), self.schema)
+        ]
+        self._writer.write_table(pa.Table.from_arrays(columns, schema=self.schema))
+        self.rows_written += len(rows)
+
+    def close(self):
+        self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def load_segments(path: Path = SEGMENTS_DIR, columns: Optional[list[str]] = None, **filters) -> pd.DataFrame:
+    """Lê os segmentos (pasta de partições ou um arquivo), com filtros aplicados na leitura do Parquet.
+
+    Os filtros são listas de valores por coluna, ex.:
+    ``load_segments(YearQuarter=["20222"], MarketingCarrier=["WN"])``.
+    """
+    unknown = set(filters) - set(SEGMENT_COLUMNS)
+    if unknown:
+        raise ValueError(f"Colunas desconhecidas nos segmentos: {', '.join(sorted(unknown))}")
+    conditions = [(col, "in", list(values)) for col, values in filters.items() if values]
+    segments = pd.read_parquet(path, columns=columns, filters=conditions or None)
+    categorical = [c for c in CATEGORICAL_COLUMNS if c in segments.columns]
+    return segments.astype({c: "category" for c in categorical})
+
+
+def las_feeders(segments: pd.DataFrame) -> pd.DataFrame:
+    """Hubs de conexão que alimentam LAS.
+
+    Para cada itinerário com conexão, o hub é o aeroporto de partida do
+    último segmento (o que chega em LAS). Retorna, por hub, o número de
+    itinerários, a participação entre os itinerários com conexão e a tarifa
+    média do último segmento, do hub mais usado para o menos usado.
+    """
+    last = segments.sort_values(["YearQuarter", "TicketID", "SegmentNum"]).drop_duplicates(
+        ["YearQuarter", "TicketID"], keep="last"
+    )
+    connecting = last[(last["SegmentNum"] > 1) & (last["To"] == "LAS")]
+    feeders = connecting.groupby("From", observed=True).agg(
+        Itineraries=("TicketID", "size"), AvgFare=("FareAmount", "mean")
+    )
+    feeders.insert(1, "Share", feeders["Itineraries"] / feeders["Itineraries"].sum())
+    feeders.index.name = "Hub"
+    return feeders.sort_values("Itineraries", ascending=False)
@@ -0,0 +1,204 @@
+"""
+instrumentation.py
+
+Instrumentação leve dos trechos críticos do projeto: spans (blocos
+cronometrados), contadores (linhas lidas, linhas mantidas, chamadas HTTP,
+acertos de cache, ...) e pico de memória do processo.
+
+Fica desligada por padrão e, desligada, custa só a leitura de uma variável
+global: `span` devolve um contexto vazio compartilhado e `count` retorna de
+imediato. Para ligar numa execução:
+
+    TCC_PROFILE=1 python run.py analyze-vegas
+    python run.py --profile analyze-vegas
+
+Ligada, cada processo grava um arquivo JSON lines em `config.PERF_REPORTS`
+(``metrics_<data>_<pid>.jsonl``) com um registro por span concluído e, ao
+final, um registro com os totais dos contadores. Processos filhos (pools de
+renderização, por exemplo) herdam a variável de ambiente e gravam o próprio
+arquivo.
+"""
+
+import atexit
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Optional
+
+from config import PERF_REPORTS
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ENV_VAR = "TCC_PROFILE"
+
+_enabled = False
+_lock = threading.Lock()
+_local = threading.local()
+_counters: dict[str, int] = defaultdict(int)
+_output = None
+_output_path: Optional[Path] = None
+# Valor de `ENV_VAR` antes de `enable`, restaurado por `disable`
+_previous_env: Optional[str] = None
+_NULL_SPAN = contextlib.nullcontext()
+
+
+def enabled() -> bool:
+    """Diz se a instrumentação está ligada neste processo."""
+    return _enabled
+
+
+def peak_rss_kb() -> Optional[int]:
+    """Pico de memória residente do processo, em KB (None se indisponível)."""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def enable(output_dir: Optional[Path] = None) -> Path:
+    """Liga a instrumentação e abre o arquivo de métricas deste processo.
+
+    Também exporta `ENV_VAR` para que processos filhos sejam instrumentados
+    (até `disable`). Retorna o caminho do arquivo de métricas.
+    """
+    global _enabled, _output, _output_path, _previous_env
+    with _lock:
+        if _output is None:
+            _previous_env = os.environ.get(ENV_VAR)
+            output_dir = Path(output_dir or PERF_REPORTS)
+            output_dir.mkdir(parents=True, exist_ok=True)
+            stamp = time.strftime("%Y%m%d-%H%M%S")
+            _output_path = output_dir / f"metrics_{stamp}_{os.getpid()}.jsonl"
+            _output = open(_output_path, "a", buffering=1)
+            atexit.register(disable)
+        os.environ[ENV_VAR] = "1"
+        _enabled = True
+    return _output_path
+
+
+def disable():
+    """Grava os contadores acumulados, fecha o arquivo e desliga a instrumentação.
+
+    Restaura `ENV_VAR` ao valor anterior a `enable`.
+    """
+    global _enabled, _output
+    with _lock:
+        if _output is None:
+            _enabled = False
+            return
+        _write({"type": "counters", "values": dict(_counters), "rss_peak_kb": peak_rss_kb()})
+        _output.close()
+        _output = None
+        _counters.clear()
+        _enabled = False
+        if _previous_env is None:
+            os.environ.pop(ENV_VAR, None)
+        else:
+            os.environ[ENV_VAR] = _previous_env
+
+
+def _write(record: dict):
+    record.setdefault("pid", os.getpid())
+    _output.write(json.dumps(record, default=str) + "\n")
+
+
+def count(name: str, n: int = 1):
+    """Soma ``n`` ao contador ``name`` (não faz nada se desligada)."""
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] += n
+
+
+def emit(record: dict):
+    """Grava um registro avulso no arquivo de métricas (não faz nada se desligada)."""
+    if not _enabled:
+        return
+    with _lock:
+        if _output is not None:
+            _write(dict(record))
+
+
+class _Span:
+    """Contexto que cronometra um bloco e grava o resultado ao sair."""
+
+    __slots__ = ("name", "attrs", "start", "parent")
+
+    def __init__(self, name: str, attrs: dict):
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        stack = _local.__dict__.setdefault("stack", [])
+        self.parent = stack[-1] if stack else None
+        stack.append(self.name)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.start
+        _local.stack.pop()
+        record = {
+            "type": "span",
+            "name": self.name,
+            "parent": self.parent,
+            "duration_s": round(duration, 6),
+            "rss_peak_kb": peak_rss_kb(),
+            "thread": threading.current_thread().name,
+            "error": exc_type.__name__ if exc_type else None,
+        }
+        if self.attrs:
+            record["attrs"] = self.attrs
+        with _lock:
+            if _output is not None:
+                _write(record)
+        return False
+
+
+def span(name: str, **attrs):
+    """Cronometra um bloco ``with``; ``attrs`` são gravados junto com o span."""
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name, attrs)
+
+
+def instrumented(name: Optional[str] = None):
+    """Decorador que envolve cada chamada da função num `span`."""
+
+    def decorator(func):
+        span_name = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Span(span_name, {}):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def _after_fork_in_child():
+    """Processos criados por fork recebem o próprio arquivo de métricas."""
+    global _lock, _output
+    _lock = threading.Lock()
+    _counters.clear()
+    if _output is not None:
+        _output = None
+        enable(_output_path.parent)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+if os.environ.get(ENV_VAR, "") not in ("", "0"):
+    enable()
@@ -0,0 +1,119 @@
+"""
+join_datasets.py
+
+Une os dados de voos (chegadas em LAS) aos dados de turismo de Las Vegas
+num índice mensal comum.
+
+O DB1B é uma amostra trimestral, então os voos são agregados por trimestre
+(`YearQuarter`) e cada mês da tabela de turismo recebe os agregados do seu
+trimestre. As partições trimestrais de voos (ou um único CSV) são lidas em
+blocos (`chunksize`), com apenas as colunas necessárias, e os agregados
+parciais de cada bloco são somados ao final, de modo que o consumo de
+memória não depende do tamanho dos dados.
+
+A tabela final ('vegas_flights_tourism.csv') tem uma linha por mês com as
+métricas de turismo da região e, para o trimestre do mês:
+- ``LASArrivals``: número de itinerários com chegada em LAS;
+- ``AvgFare`` e ``AvgDistance``: tarifa e distância médias;
+- ``OriginShare_<AEROPORTO>``: fração das chegadas vindas de cada um dos
+  principais aeroportos de origem (o restante em ``OriginShare_Other``).
+"""
+
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+import instrumentation
+from config import DATA_PROCESSED
+from flights_parser import FLIGHTS_DIR, parse_quarter_code, partition_files
+from flights_query import sum_flight_chunks
+from tourism_store import STORE_FILE, load_store, long_to_wide
+
+JOINED_FILE = DATA_PROCESSED / "vegas_flights_tourism.csv"
+CHUNK_SIZE = 500_000
+
+
+def quarter_period(code) -> pd.Period:
+    """Converte um código `YearQuarter` do DB1B em `pd.Period` trimestral."""
+    year, quarter = parse_quarter_code(code)
+    return pd.Period(year=year, quarter=quarter, freq="Q")
+
+
+def aggregate_flights(
+    path: Path = FLIGHTS_DIR, chunksize: int = CHUNK_SIZE, top_origins: int = 10
+) -> pd.DataFrame:
+    """Agrega as chegadas em LAS por trimestre numa leitura em blocos.
+
+    ``path`` é a pasta de partições do `fetch-flights` ou um único CSV.
+
+    Retorna um DataFrame indexado por trimestre (`PeriodIndex`) com
+    ``LASArrivals``, ``AvgFare``, ``AvgDistance`` e as colunas
+    ``OriginShare_*`` dos ``top_origins`` aeroportos com mais chegadas.
+    """
+    def count_rows(chunk):
+        instrumentation.count("join.flight_rows", len(chunk))
+        return chunk
+
+    keys = ["YearQuarter", "Origin"]
+    # Uma só leitura: os totais do trimestre são a soma dos de cada origem
+    sums = sum_flight_chunks(partition_files(path), keys, keys, chunksize, prepare=count_rows)
+    if sums.empty:
+        return pd.DataFrame()
+    sums = sums[sums.index.get_level_values("YearQuarter").notna()]
+
+    # Códigos diferentes do mesmo trimestre (ex: '20222' e '202206') são somados
+    quarters = [quarter_period(code) for code in sums.index.get_level_values("YearQuarter")]
+    total = sums.groupby(quarters).sum()
+    # Voos sem origem contam nas chegadas do trimestre, mas só em ``Other``
+    by_origin = sums["Arrivals"].groupby([quarters, sums.index.get_level_values("Origin")]).sum()
+    by_origin = by_origin.unstack(fill_value=0)
+
+    result = pd.DataFrame(
+        {
+            "LASArrivals": total["Arrivals"],
+            "AvgFare": total["FareSum"] / total["FareCount"],
+            "AvgDistance": total["DistanceSum"] / total["DistanceCount"],
+        }
+    )
+    top = by_origin.sum().nlargest(top_origins).index
+    shares = by_origin[top].div(total["Arrivals"], axis=0)
+    shares["Other"] = 1 - shares.sum(axis=1)
+    result = result.join(shares.add_prefix("OriginShare_"))
+    result.index = pd.PeriodIndex(result.index, name="Quarter")
+    return result.sort_index()
+
+
+def join_flights_tourism(tourism: pd.DataFrame, flights: pd.DataFrame) -> pd.DataFrame:
+    """Anexa a cada mês da tabela de turismo os agregados de voos do seu trimestre."""
+    joined = tourism.copy()
+    joined["Quarter"] = joined.index.to_period("Q")
+    joined = joined.join(flights, on="Quarter")
+    joined["Quarter"] = joined["Quarter"].astype(str)
+    return joined
+
+
+def main(
+    region: str = "Las Vegas",
+    flights_file: Optional[Path] = None,
+    chunksize: int = CHUNK_SIZE,
+    top_origins: int = 10,
+):
+    """Gera a tabela mensal única de turismo + voos.
+
+    Retorna o caminho da tabela, ou None se faltar um arquivo de entrada.
+    """
+    flights_file = Path(flights_file or FLIGHTS_DIR)
+    try:
+        tourism = long_to_wide(load_store(STORE_FILE, regions=[region]), region)
+        flights = aggregate_flights(flights_file, chunksize=chunksize, top_origins=top_origins)
+    except FileNotFoundError as e:
+        print(f"Erro: arquivo de entrada não encontrado: {e.filename}")
+        print("Execute 'python run.py fetch-flights' e 'python run.py preprocess-vegas' primeiro.")
+        return
+
+    joined = join_flights_tourism(tourism, flights)
+    joined.to_csv(JOINED_FILE)
+    print(f"{len(flights)} trimestres de voos unidos a {len(tourism)} meses de turismo.")
+    print(f"Tabela salva em: {JOINED_FILE}")
+    return JOINED_FILE
@@ -0,0 +1,142 @@
+"""
+memory_budget.py
+
+Execução com orçamento de memória e medição do pico de memória por etapa.
+
+Com ``run.py --memory-budget 4G``, o orçamento é convertido nos parâmetros
+que controlam o consumo de cada etapa: linhas por bloco nas leituras em
+blocos (`join-data`, `analyze-flights`), número de processos de leitura
+(`fetch-flights`), número de processos de renderização e tamanho dos blocos
+do bootstrap (`analyze-vegas`) e o limite de memória do DuckDB. As estimativas por linha/processo abaixo são
+conservadoras e foram medidas com os geradores de `benchmarks/`.
+
+`track_memory` mede o pico de memória residente (RSS) de uma etapa e,
+opcionalmente, o pico de alocações Python via `tracemalloc` (mais preciso
+por etapa, mas deixa código com muitas alocações ~2x mais lento).
+"""
+
+import contextlib
+import re
+import sys
+import time
+import tracemalloc
+from typing import Optional
+
+import instrumentation
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Fração do orçamento reservada para os blocos de dados; o resto cobre o
+# interpretador, bibliotecas importadas e temporários.
+DATA_FRACTION = 0.5
+# Bytes por linha de voos num bloco do pandas (4-6 colunas, strings incluídas)
+FLIGHT_ROW_BYTES = 400
+# Memória de um processo de renderização (matplotlib + pivô + figura)
+RENDER_WORKER_BYTES = 250 * 1024**2
+# Memória de um processo de leitura do DB1B (lotes de linhas, cubo e buffer
+# dos segmentos em Parquet); constante, pois as linhas são gravadas em fluxo
+PARSER_WORKER_BYTES = 200 * 1024**2
+# Arrays temporários simultâneos por valor reamostrado em `impact_significance`
+SIGNIFICANCE_ARRAYS = 4
+MIN_CHUNK_ROWS = 10_000
+
+_UNITS = {"": 1024**2, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+
+
+def parse_size(text: str) -> int:
+    """Converte ``"512M"``, ``"4G"``, ``"1.5g"`` ou ``"800"`` (MB) em bytes."""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?)I?B?\s*", str(text).upper())
+    if not match:
+        raise ValueError(f"Tamanho de memória inválido: {text!r} (use ex.: 512M, 4G)")
+    return int(float(match.group(1)) * _UNITS[match.group(2)])
+
+
+def format_size(n_bytes: Optional[int]) -> str:
+    if n_bytes is None:
+        return "?"
+    return f"{n_bytes / 1024**2:,.0f} MB"
+
+
+def current_rss() -> Optional[int]:
+    """Memória residente atual do processo, em bytes (None se indisponível)."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * resource.getpagesize()
+    except (OSError, AttributeError, ValueError):
+        return None
+
+
+def peak_rss() -> Optional[int]:
+    """Pico de memória residente do processo desde o início, em bytes."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def chunk_rows(budget: Optional[int], default: int, row_bytes: int = FLIGHT_ROW_BYTES) -> int:
+    """Linhas por bloco que cabem na fração de dados do orçamento."""
+    if not budget:
+        return default
+    return max(MIN_CHUNK_ROWS, min(default, int(budget * DATA_FRACTION) // row_bytes))
+
+
+def worker_count(budget: Optional[int], requested: int, worker_bytes: int = RENDER_WORKER_BYTES) -> int:
+    """Número de processos auxiliares que cabem no orçamento (ao menos 1)."""
+    if not budget:
+        return requested
+    return max(1, min(requested, int(budget * DATA_FRACTION) // worker_bytes))
+
+
+def block_elements(budget: Optional[int], default: int) -> int:
+    """Valores reamostrados por bloco em `event_impact.impact_significance`."""
+    if not budget:
+        return default
+    return max(1, min(default, int(budget * DATA_FRACTION) // (8 * SIGNIFICANCE_ARRAYS)))
+
+
+@contextlib.contextmanager
+def track_memory(stage: str, budget: Optional[int] = None, trace: bool = False):
+    """Mede a memória de uma etapa e imprime um resumo ao final.
+
+    Informa o RSS ao final e o pico de RSS do processo; com ``trace``,
+    também o pico de alocações Python da etapa (`tracemalloc`). Com a
+    instrumentação ligada, o resumo também vai para o arquivo de métricas.
+    Avisa quando o pico passa de ``budget``.
+    """
+    started_tracing = trace and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    elif trace:
+        tracemalloc.reset_peak()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        traced_peak = tracemalloc.get_traced_memory()[1] if trace else None
+        if started_tracing:
+            tracemalloc.stop()
+        summary = {
+            "type": "memory",
+            "stage": stage,
+            "duration_s": round(time.perf_counter() - start, 3),
+            "rss_bytes": current_rss(),
+            "peak_rss_bytes": max(filter(None, (peak_rss(), current_rss())), default=None),
+            "traced_peak_bytes": traced_peak,
+            "budget_bytes": budget,
+        }
+        instrumentation.emit(summary)
+        line = (
+            f"🧠 {stage}: RSS {format_size(summary['rss_bytes'])}, "
+            f"pico {format_size(summary['peak_rss_bytes'])}"
+        )
+        if trace:
+            line += f", pico de alocações Python {format_size(traced_peak)}"
+        print(line)
+        if budget and summary["peak_rss_bytes"] and summary["peak_rss_bytes"] > budget:
+            print(f"⚠️  {stage}: pico de memória acima do orçamento de {format_size(budget)}.")
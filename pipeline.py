@@ -0,0 +1,235 @@
+"""
+pipeline.py
+
+Executor do pipeline completo (coleta → pré-processamento → análise) como um
+grafo de dependências (DAG).
+
+Cada etapa corresponde a um subcomando do `run.py` e declara:
+
+- ``deps``: etapas que precisam terminar antes dela;
+- ``inputs``: arquivos (ou padrões glob) que ela lê;
+- ``outputs``: arquivos (ou padrões glob) que ela produz.
+
+Cada execução de etapa retorna os arquivos que gravou ou confirmou em dia
+(ex.: partições de voos e gráficos mantidos pelos caches); sem arquivos, a
+etapa falhou. Com um arquivo de estado (`STATE_FILE`, usado pelo `run.py`),
+cada sucesso fica registrado com essas saídas, as entradas lidas e o horário
+de início, e uma etapa é pulada quando as saídas registradas ainda existem e
+nenhuma entrada foi adicionada, removida ou modificada desde então. Sem
+registro, vale a regra do ``make``: todas as saídas existem e são mais
+novas que todas as entradas. Etapas sem entradas declaradas (coletas de
+APIs externas) só rodam se alguma saída estiver faltando ou com ``force``.
+Etapas independentes (artistas, Reddit, voos, planilhas) rodam ao mesmo tempo
+numa pool de threads: são dominadas por rede e disco, não por CPU.
+"""
+
+import json
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+from config import DATA_PROCESSED, DATA_RAW, GRAPH_OUTPUT
+
+# Último sucesso de cada etapa: saídas, entradas e horário de início
+STATE_FILE = DATA_PROCESSED / "pipeline_state.json"
+
+STAGES = {
+    "fetch-artists": {
+        "deps": [],
+        "inputs": [],
+        "outputs": [DATA_PROCESSED / "artists_data.csv"],
+    },
+    "fetch-reddit": {
+        "deps": [],
+        "inputs": [],
+        "outputs": [DATA_PROCESSED / "reddit_comments.csv"],
+    },
+    "fetch-flights": {
+        "deps": [],
+        "inputs": [DATA_RAW / "db1b.public.*.asc"],
+        "outputs": [DATA_PROCESSED / "flights_data" / "flights_*.csv"],
+    },
+    "preprocess-vegas": {
+        "deps": [],
+        "inputs": [DATA_RAW / "*.xlsx"],
+        "outputs": [
+            DATA_PROCESSED / "vegas_tourism.parquet",
+            DATA_PROCESSED / "vegas_tourism_yearly.csv",
+        ],
+    },
+    "analyze-vegas": {
+        "deps": ["preprocess-vegas"],
+        "inputs": [DATA_PROCESSED / "vegas_tourism.parquet"],
+        "outputs": [GRAPH_OUTPUT / "*.png"],
+    },
+    "join-data": {
+        "deps": ["fetch-flights", "preprocess-vegas"],
+        "inputs": [
+            DATA_PROCESSED / "flights_data" / "flights_*.csv",
+            DATA_PROCESSED / "vegas_tourism.parquet",
+        ],
+        "outputs": [DATA_PROCESSED / "vegas_flights_tourism.csv"],
+    },
+}
+
+
+def _expand(patterns: Iterable[Path]) -> tuple[list[Path], bool]:
+    """Expande os padrões; retorna os arquivos e se todos os padrões casaram."""
+    files, complete = [], True
+    for pattern in patterns:
+        pattern = Path(pattern)
+        matches = sorted(pattern.parent.glob(pattern.name))
+        complete &= bool(matches)
+        files.extend(matches)
+    return files, complete
+
+
+def is_up_to_date(stage: dict, record: Optional[dict] = None) -> bool:
+    """Diz se a etapa está em dia.
+
+    Com ``record`` (o registro do último sucesso, ver `run_pipeline`), as
+    saídas registradas devem existir e as entradas devem ser as mesmas e
+    não mais novas que o início daquela execução. Sem registro, todas as
+    saídas declaradas devem existir e ser mais novas que as entradas.
+    """
+    if record is not None:
+        inputs, _ = _expand(stage["inputs"])
+        return (
+            bool(record["outputs"])
+            and all(Path(p).exists() for p in record["outputs"])
+            and [str(p) for p in inputs] == record["inputs"]
+            and all(p.stat().st_mtime <= record["started"] for p in inputs)
+        )
+    outputs, complete = _expand(stage["outputs"])
+    if not stage["outputs"] or not complete:
+        return False
+    inputs, _ = _expand(stage["inputs"])
+    if not inputs:
+        return True
+    return min(p.stat().st_mtime for p in outputs) >= max(p.stat().st_mtime for p in inputs)
+
+
+def load_state(path: Optional[Path]) -> dict:
+    """Registros de sucesso por etapa (vazio se ``path`` é None ou não existe)."""
+    if path is None or not Path(path).exists():
+        return {}
+    try:
+        return json.loads(Path(path).read_text())
+    except ValueError:
+        return {}
+
+
+def plan(stages: dict, targets: Optional[list[str]] = None) -> list[str]:
+    """Etapas necessárias para ``targets`` (e suas dependências), em ordem topológica.
+
+    Levanta ValueError para etapas desconhecidas ou dependências cíclicas.
+    """
+    unknown = [t for t in targets or [] if t not in stages]
+    if unknown:
+        raise ValueError(f"Etapas desconhecidas: {', '.join(unknown)}")
+
+    order, state = [], {}
+
+    def visit(name):
+        if state.get(name) == "done":
+            return
+        if state.get(name) == "visiting":
+            raise ValueError(f"Dependência cíclica envolvendo a etapa '{name}'")
+        state[name] = "visiting"
+        for dep in stages[name]["deps"]:
+            if dep not in stages:
+                raise ValueError(f"Etapa '{name}' depende de etapa desconhecida '{dep}'")
+            visit(dep)
+        state[name] = "done"
+        order.append(name)
+
+    for name in targets or list(stages):
+        visit(name)
+    return order
+
+
+def run_pipeline(
+    run_stage: Callable[[str], Optional[Iterable[Path]]],
+    stages: dict = STAGES,
+    targets: Optional[list[str]] = None,
+    jobs: int = 4,
+    force: bool = False,
+    dry_run: bool = False,
+    state_file: Optional[Path] = None,
+) -> dict[str, str]:
+    """Executa as etapas respeitando as dependências.
+
+    ``run_stage(nome)`` executa uma etapa e retorna os arquivos que ela
+    gravou ou confirmou em dia. Uma etapa é liberada assim que todas as suas
+    dependências terminam; até ``jobs`` etapas rodam ao mesmo tempo. Se uma
+    etapa falha, as que dependem dela não são executadas, mas os ramos
+    independentes continuam. Também conta como falha a etapa que não
+    retorna saídas, ou retorna arquivos inexistentes: os ``main`` dos
+    módulos avisam e retornam None, sem exceção, quando falta uma entrada.
+    Com ``state_file``, os sucessos são registrados nele (ver `is_up_to_date`).
+
+    Retorna o estado final de cada etapa: ``"ok"``, ``"skipped"`` (saídas em
+    dia), ``"failed"``, ``"blocked"`` (dependência falhou) ou ``"planned"``
+    (com ``dry_run``).
+    """
+    order = plan(stages, targets)
+    status: dict[str, str] = {}
+    pending = list(order)
+    running = {}
+    started: dict[str, float] = {}
+    records = load_state(state_file)
+
+    def dispatch(executor):
+        for name in list(pending):
+            deps = [status.get(dep) for dep in stages[name]["deps"]]
+            if any(s in ("failed", "blocked") for s in deps):
+                status[name] = "blocked"
+                print(f"⏭️  {name}: dependência falhou, etapa não executada.")
+            elif all(s in ("ok", "skipped", "planned") for s in deps):
+                # Dependência que seria executada deixa esta etapa desatualizada
+                if not force and "planned" not in deps and is_up_to_date(stages[name], records.get(name)):
+                    status[name] = "skipped"
+                    print(f"✔️  {name}: saídas em dia, etapa pulada.")
+                elif dry_run:
+                    status[name] = "planned"
+                    print(f"📝 {name}: seria executada.")
+                else:
+                    print(f"▶️  {name}: iniciando...")
+                    started[name] = time.time()
+                    running[executor.submit(run_stage, name)] = name
+            else:
+                continue
+            pending.remove(name)
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        # `pending` está em ordem topológica: etapas puladas numa passada já
+        # liberam as dependentes na mesma passada
+        dispatch(executor)
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    outputs = [Path(p) for p in future.result() or []]
+                except Exception as e:
+                    status[name] = "failed"
+                    print(f"❌ {name}: falhou ({e}).")
+                    continue
+                if not outputs or not all(p.exists() for p in outputs):
+                    status[name] = "failed"
+                    print(f"❌ {name}: terminou sem gerar as saídas esperadas.")
+                    continue
+                status[name] = "ok"
+                print(f"✅ {name}: concluída.")
+                if state_file is not None:
+                    inputs, _ = _expand(stages[name]["inputs"])
+                    records[name] = {
+                        "outputs": [str(p) for p in outputs],
+                        "inputs": [str(p) for p in inputs],
+                        "started": started[name],
+                    }
+                    Path(state_file).write_text(json.dumps(records, indent=2))
+            dispatch(executor)
+
+    return {name: status[name] for name in order if name in status}
@@ -8,21 +8,25 @@ de turismo de Las Vegas para um ano específico.
 O processo consiste em:
 1. Encontrar todos os arquivos de dados anuais na pasta `DATA_RAW`.
 2. Para cada arquivo, extrair as métricas e datas usando uma estrutura similar
-   à do script `analyze_excel.py` original.
-3. Unificar todos os dados em um único DataFrame do Pandas.
-4. Salvar o resultado como um único arquivo CSV limpo e padronizado na
-   pasta `DATA_PROCESSED`, pronto para a análise.
-
-O arquivo de saída ('vegas_tourism_yearly.csv') terá uma estrutura "tidy",
-facilitando a análise e a plotagem de gráficos comparativos.
+   à do script `analyze_excel.py` original. Todas as regiões pedidas (abas
+   "Las Vegas", "Downtown", "Laughlin", "Mesquite"...) são lidas numa única
+   abertura do arquivo.
+3. Unificar todos os dados em uma tabela longa (Date, Region, Metric, Value)
+   com tipos explícitos.
+4. Salvar o resultado na pasta `DATA_PROCESSED`: o store colunar
+   ('vegas_tourism.parquet'), lido pela análise, e uma exportação larga em
+   CSV ('vegas_tourism_yearly.csv') para inspeção manual.
 """
 
+import numpy as np
 import pandas as pd
 from pathlib import Path
 import re
 from typing import Optional
 
+import instrumentation
 from config import DATA_RAW, DATA_PROCESSED
+from tourism_store import long_to_wide, save_store, to_store_frame
 
 # Mapeamento das colunas e linhas nos arquivos Excel.
 # Assumimos que a estrutura é consistente entre os anos.
@@ -30,6 +34,14 @@ LINHA_DATAS = 6
 COLUNAS_DATAS = list(range(1, 25, 2))
 COLUNA_NOMES_METRICAS = 0
 ABA_EXCEL = "Las Vegas "  # Assumindo que o nome da aba é consistente
+# Prefixo da aba de cada região nas planilhas da LVCVA (a aba é "<prefixo><ano>")
+REGIOES_EXCEL = {
+    "Las Vegas": ABA_EXCEL,
+    "Downtown": "Downtown ",
+    "Laughlin": "Laughlin ",
+    "Mesquite": "Mesquite ",
+}
+REGIAO_PADRAO = "Las Vegas"
 # Palavras-chave que indicam o início de um rodapé e, portanto, o fim das métricas
 FOOTER_KEYWORDS = ["source", "nota", "notes"]
 
@@ -42,30 +54,34 @@ def detect_metric_bounds(df: pd.DataFrame) -> tuple[int, int]:
     encontrar uma linha vazia ou um texto que indique rodapé (por exemplo,
     "Source"). O índice final retornado é exclusivo, compatível com slicing
     do pandas.
-    """
-
-    start_row = LINHA_DATAS + 1
-    # Avança até encontrar a primeira linha com valor na coluna de nomes
-    while start_row < len(df):
-        cell = df.iloc[start_row, COLUNA_NOMES_METRICAS]
-        if pd.isna(cell) or (isinstance(cell, str) and cell.strip() == ""):
-            start_row += 1
-            continue
-        break
-
-    end_row = start_row
-    while end_row < len(df):
-        cell = df.iloc[end_row, COLUNA_NOMES_METRICAS]
 
-        # Fim quando célula vazia ou linha toda vazia
-        if pd.isna(cell) or (isinstance(cell, str) and cell.strip() == "") or df.iloc[end_row].isna().all():
-            break
-
-        # Fim quando rodapé conhecido é encontrado
-        if isinstance(cell, str) and cell.strip().lower().startswith(tuple(FOOTER_KEYWORDS)):
-            break
-
-        end_row += 1
+    As máscaras de células vazias, rodapés e linhas inteiramente vazias são
+    calculadas de uma só vez sobre a planilha inteira; o início e o fim do
+    bloco são então derivados com NumPy, sem acessar célula por célula.
+    """
+    n_rows = len(df)
+    first_row = LINHA_DATAS + 1
+    if first_row >= n_rows:
+        return first_row, first_row
+
+    names = df.iloc[:, COLUNA_NOMES_METRICAS]
+    missing = names.isna().to_numpy()
+    text = names.astype(str).str.strip()
+
+    # Célula vazia: NaN ou texto composto só de espaços
+    empty = missing | (text == "").to_numpy()
+    # Rodapé: texto que começa com uma das palavras-chave conhecidas
+    footer = ~missing & text.str.lower().str.startswith(tuple(FOOTER_KEYWORDS)).to_numpy(dtype=bool)
+    # Linha inteira vazia
+    blank_row = df.isna().to_numpy().all(axis=1)
+
+    # Primeira linha com valor na coluna de nomes
+    filled = np.flatnonzero(~empty[first_row:])
+    start_row = first_row + int(filled[0]) if filled.size else n_rows
+
+    # Primeira linha, a partir do início, que encerra o bloco de métricas
+    stop = np.flatnonzero((empty | footer | blank_row)[start_row:])
+    end_row = start_row + int(stop[0]) if stop.size else n_rows
 
     return start_row, end_row
 
@@ -77,14 +93,8 @@ def extract_year_from_filename(path: Path) -> Optional[int]:
     print(f"Aviso: Não foi possível extrair o ano do arquivo {path.name}. Ignorando.")
     return None
 
-def process_single_file(file_path: Path, year: int) -> Optional[pd.DataFrame]:
-    """Carrega e processa um único arquivo Excel, retornando um DataFrame limpo."""
-    try:
-        df_raw = pd.read_excel(file_path, sheet_name=ABA_EXCEL + str(year), header=None)
-    except Exception as e:
-        print(f"Erro ao ler o arquivo {file_path.name}: {e}")
-        return None
-
+def parse_metrics_sheet(df_raw: pd.DataFrame, year: int) -> pd.DataFrame:
+    """Extrai as métricas mensais de uma aba bruta, uma coluna por métrica."""
     # Detecta dinamicamente o intervalo das métricas
     start_row, end_row = detect_metric_bounds(df_raw)
     df_metrics = df_raw.iloc[start_row:end_row]
@@ -95,23 +105,71 @@ def process_single_file(file_path: Path, year: int) -> Optional[pd.DataFrame]:
     # Extrai valores mensais
     monthly_data = df_metrics.iloc[:, COLUNAS_DATAS].T
     monthly_data.columns = metric_names
-    
+
     # Limpa e converte para numérico
-    for col in monthly_data.columns:
-        monthly_data[col] = pd.to_numeric(monthly_data[col], errors='coerce')
+    monthly_data = monthly_data.apply(pd.to_numeric, errors='coerce')
 
     # Adiciona data (mês e ano)
     monthly_data['Year'] = year
     monthly_data['Month'] = range(1, len(monthly_data) + 1)
-    
+
     return monthly_data.dropna(how='all')
 
-def main():
+def to_long_format(monthly_data: pd.DataFrame, region: str) -> pd.DataFrame:
+    """Converte a tabela larga de uma aba em formato longo (uma linha por valor)."""
+    long_df = monthly_data.melt(id_vars=['Year', 'Month'], var_name='Metric', value_name='Value')
+    long_df.insert(0, 'Region', region)
+    return long_df.dropna(subset=['Value'])
+
+def sheet_name_for(region: str, year: int) -> str:
+    """Nome da aba de uma região para um ano (ex: 'Laughlin 2022')."""
+    return REGIOES_EXCEL.get(region, f"{region} ") + str(year)
+
+def process_single_file(
+    file_path: Path, year: int, regions: Optional[list[str]] = None
+) -> Optional[pd.DataFrame]:
+    """Carrega e processa um arquivo Excel, retornando uma tabela longa.
+
+    Todas as abas das regiões pedidas são lidas numa única abertura do
+    arquivo. O resultado tem as colunas ``Region``, ``Year``, ``Month``,
+    ``Metric`` e ``Value``. Regiões sem aba no arquivo são ignoradas com
+    um aviso.
+    """
+    regions = regions or [REGIAO_PADRAO]
+    try:
+        with pd.ExcelFile(file_path) as xls:
+            sheets = {region: sheet_name_for(region, year) for region in regions}
+            missing = [region for region, sheet in sheets.items() if sheet not in xls.sheet_names]
+            for region in missing:
+                print(f"Aviso: aba '{sheets[region]}' não encontrada em {file_path.name}. Ignorando.")
+                del sheets[region]
+            if not sheets:
+                return None
+            with instrumentation.span("excel.read", file=file_path.name, sheets=len(sheets)):
+                raw_sheets = pd.read_excel(xls, sheet_name=list(sheets.values()), header=None)
+    except Exception as e:
+        print(f"Erro ao ler o arquivo {file_path.name}: {e}")
+        return None
+
+    frames = [
+        to_long_format(parse_metrics_sheet(raw_sheets[sheet], year), region)
+        for region, sheet in sheets.items()
+    ]
+    return pd.concat(frames, ignore_index=True)
+
+def main(regions: Optional[list[str]] = None):
     """
     Função principal que orquestra a leitura, processamento e salvamento dos dados.
+
+    ``regions`` define as regiões (abas) lidas de cada planilha; por padrão,
+    apenas Las Vegas. Todas as regiões são salvas no store tipado
+    ``vegas_tourism.parquet`` (ver `tourism_store`) e a tabela larga da
+    região padrão continua em ``vegas_tourism_yearly.csv``.
+
+    Retorna os arquivos gravados, ou None se nenhum dado foi processado.
     """
     print("Iniciando pré-processamento dos dados de turismo de Las Vegas...")
-    
+
     source_files = list(DATA_RAW.glob("*.xlsx"))
     if not source_files:
         print("Nenhum arquivo Excel (.xlsx) encontrado em data/raw/. Encerrando.")
@@ -122,30 +180,34 @@ def main():
         year = extract_year_from_filename(file)
         if year:
             print(f"Processando arquivo: {file.name} para o ano {year}...")
-            df_year = process_single_file(file, year)
+            df_year = process_single_file(file, year, regions)
             if df_year is not None:
                 all_data.append(df_year)
 
     if not all_data:
         print("Nenhum dado foi processado com sucesso. Encerrando.")
         return
-        
-    # Concatena todos os DataFrames em um só
-    final_df = pd.concat(all_data, ignore_index=True)
-    
-    # Cria uma coluna de data completa para facilitar a plotagem
-    final_df['Date'] = pd.to_datetime(final_df['Year'].astype(str) + '-' + final_df['Month'].astype(str) + '-01')
-    final_df = final_df.set_index('Date')
-
-    # Salva o arquivo CSV final
+
+    # Concatena todos os DataFrames em um só e converte para o formato tipado
+    store_df = to_store_frame(pd.concat(all_data, ignore_index=True))
+    store_path = save_store(store_df, DATA_PROCESSED / "vegas_tourism.parquet")
+
+    regions = regions or [REGIAO_PADRAO]
+    primary_region = REGIAO_PADRAO if REGIAO_PADRAO in regions else regions[0]
+    final_df = long_to_wide(store_df, primary_region)
+
+    # Mantém a exportação larga em CSV para inspeção manual
     output_path = DATA_PROCESSED / "vegas_tourism_yearly.csv"
     final_df.to_csv(output_path)
-    
+
     print("-" * 50)
     print(f"✅ Processamento concluído!")
     print(f"Dados de {len(final_df['Year'].unique())} anos foram consolidados.")
-    print(f"Arquivo de saída salvo em: {output_path}")
+    print(f"Regiões: {', '.join(store_df['Region'].cat.categories)}")
+    print(f"Dados tipados (todas as regiões) salvos em: {store_path}")
+    print(f"Tabela larga de {primary_region} salva em: {output_path}")
     print("-" * 50)
+    return [store_path, output_path]
 
 if __name__ == "__main__":
     main()
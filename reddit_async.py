@@ -0,0 +1,388 @@
+"""
+reddit_async.py
+
+Coleta assíncrona de comentários do Reddit, alternativa ao caminho síncrono
+do `reddit_scraper` (PRAW).
+
+No PRAW, cada submission e cada árvore de comentários é carregada sob
+demanda, uma requisição bloqueante de cada vez. Aqui, um cliente OAuth fino
+(fluxo ``client_credentials``, o mesmo "app-only" usado pelo PRAW com id e
+segredo) fala direto com a API JSON do Reddit:
+
+- as buscas dos pares de termos rodam concorrentemente e, a cada página de
+  resultados, as árvores de comentários dos posts encontrados já começam a
+  ser baixadas (pipeline busca → comentários);
+- um `asyncio.Semaphore` limita as requisições simultâneas e um limitador de
+  taxa espaça o início delas (padrão: 100 por minuto, o limite da API para
+  clientes OAuth), respeitando também os cabeçalhos ``X-Ratelimit-*``;
+- com ``--expand-more N``, os comentários recolhidos (nós ``more``) de cada
+  post são carregados via ``/api/morechildren`` em lotes paralelos, dentro de
+  um orçamento de N requisições por post (e, opcionalmente, de uma
+  profundidade máxima), parando assim que ``comment_limit`` comentários
+  forem encontrados;
+- as conexões HTTP são reaproveitadas (keep-alive) pelo pool de uma
+  `requests.Session`; cada requisição roda numa thread via
+  `asyncio.to_thread`, sem dependências novas.
+
+As URLs da API são parâmetros do cliente, o que permite testar contra uma
+API falsa local (ver `tests/test_reddit_async.py`). As linhas geradas são as
+mesmas do caminho síncrono (`reddit_scraper.comment_row`).
+
+Uso pelo `run.py`:
+
+    python run.py fetch-reddit --async --concurrency 8 --expand-more 4
+"""
+
+import asyncio
+import logging
+import re
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import instrumentation
+from reddit_scraper import build_query, comment_row, match_terms, reddit_credentials, term_pairs
+
+API_BASE = "https://oauth.reddit.com"
+AUTH_URL = "https://www.reddit.com/api/v1/access_token"
+DEFAULT_CONCURRENCY = 8
+# Limite da API do Reddit para clientes OAuth: 100 requisições por minuto
+DEFAULT_RATE = 100 / 60
+SEARCH_PAGE_SIZE = 100
+MAX_RETRIES = 3
+TIMEOUT = 30
+# IDs por chamada a /api/morechildren (máximo aceito pela API)
+MORE_CHILDREN_BATCH = 100
+# Chamadas a /api/morechildren simultâneas por post
+MORE_PARALLEL = 4
+
+
+class RateLimiter:
+    """Espaça o início das requisições para no máximo ``rate`` por segundo.
+
+    Quando uma resposta avisa (``X-Ratelimit-Remaining``) que a cota da
+    janela acabou, as próximas requisições esperam o fim da janela
+    (``X-Ratelimit-Reset``).
+    """
+
+    def __init__(self, rate: float = DEFAULT_RATE):
+        self.interval = 1 / rate if rate else 0.0
+        self._next = 0.0
+
+    async def acquire(self):
+        # Sem await entre a leitura e a escrita de _next: atômico no event loop
+        now = time.monotonic()
+        start = max(now, self._next)
+        self._next = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    def update(self, headers):
+        """Ajusta o limitador com os cabeçalhos ``X-Ratelimit-*`` de uma resposta."""
+        remaining = headers.get("x-ratelimit-remaining")
+        reset = headers.get("x-ratelimit-reset")
+        if remaining is not None and reset is not None and float(remaining) < 1:
+            self._next = max(self._next, time.monotonic() + float(reset))
+
+
+def flatten_comments(listing: dict) -> tuple[list[dict], list[dict]]:
+    """Achata uma árvore de comentários da API em largura, como ``comments.list()`` do PRAW.
+
+    A ordem importa: com ``comments_limit``, ela decide quais comentários
+    ficam, e deve ser a mesma do caminho síncrono. Retorna os comentários
+    carregados (o ``data`` de cada nó ``t1``) e os nós ``more`` (comentários
+    recolhidos, não carregados).
+    """
+    comments, more = [], []
+    queue = deque(listing["data"]["children"])
+    while queue:
+        node = queue.popleft()
+        if node["kind"] == "more":
+            more.append(node["data"])
+            continue
+        if node["kind"] != "t1":
+            continue
+        data = node["data"]
+        comments.append(data)
+        replies = data.get("replies")
+        if replies:
+            queue.extend(replies["data"]["children"])
+    return comments, more
+
+
+class AsyncRedditClient:
+    """Cliente OAuth assíncrono mínimo para a API JSON do Reddit.
+
+    ``concurrency`` limita as requisições em andamento (e o tamanho do pool
+    de conexões) e ``rate`` o número de requisições iniciadas por segundo.
+    Deve ser criado dentro do event loop que vai usá-lo.
+    """
+
+    def __init__(
+        self,
+        client_id: str,
+        client_secret: str,
+        user_agent: str,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        rate: float = DEFAULT_RATE,
+        api_base: str = API_BASE,
+        auth_url: str = AUTH_URL,
+    ):
+        self.api_base = api_base.rstrip("/")
+        self.auth_url = auth_url
+        self._credentials = (client_id, client_secret)
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = user_agent
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.limiter = RateLimiter(rate)
+        self.requests = 0
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._token = None
+        self._token_expires = 0.0
+        self._token_lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def close(self):
+        self.session.close()
+
+    async def _authorization(self) -> str:
+        async with self._token_lock:
+            if self._token is None or time.monotonic() >= self._token_expires:
+                response = await asyncio.to_thread(
+                    self.session.post,
+                    self.auth_url,
+                    auth=self._credentials,
+                    data={"grant_type": "client_credentials"},
+                    timeout=TIMEOUT,
+                )
+                response.raise_for_status()
+                payload = response.json()
+                self._token = payload["access_token"]
+                # Renova um minuto antes de expirar
+                self._token_expires = time.monotonic() + payload.get("expires_in", 3600) - 60
+            return f"bearer {self._token}"
+
+    async def get(self, path: str, **params):
+        """GET na API, com limite de concorrência e de taxa.
+
+        Respostas 429/5xx são repetidas até `MAX_RETRIES` vezes (esperando
+        ``Retry-After``, se informado); um 401 renova o token.
+        """
+        params.setdefault("raw_json", 1)
+        for attempt in range(MAX_RETRIES + 1):
+            headers = {"Authorization": await self._authorization()}
+            async with self._semaphore:
+                await self.limiter.acquire()
+                instrumentation.count("http.calls")
+                self.requests += 1
+                response = await asyncio.to_thread(
+                    self.session.get, self.api_base + path, params=params, headers=headers, timeout=TIMEOUT
+                )
+            self.limiter.update(response.headers)
+            if attempt < MAX_RETRIES:
+                if response.status_code == 401:
+                    self._token = None
+                    continue
+                if response.status_code == 429 or response.status_code >= 500:
+                    await asyncio.sleep(float(response.headers.get("retry-after", 2**attempt)))
+                    continue
+            response.raise_for_status()
+            return response.json()
+
+    async def search(self, query: str, limit: int, subreddit: str = "all"):
+        """Gera páginas de posts (o ``data`` de cada ``t3``) da busca, até ``limit`` posts."""
+        fetched, after = 0, None
+        while fetched < limit:
+            listing = await self.get(
+                f"/r/{subreddit}/search",
+                q=query,
+                limit=min(SEARCH_PAGE_SIZE, limit - fetched),
+                syntax="lucene",
+                type="link",
+                after=after,
+            )
+            posts = [child["data"] for child in listing["data"]["children"] if child["kind"] == "t3"]
+            if not posts:
+                return
+            posts = posts[: limit - fetched]
+            fetched += len(posts)
+            yield posts
+            after = listing["data"].get("after")
+            if not after:
+                return
+
+    async def comments(self, post_id: str) -> tuple[list[dict], list[dict]]:
+        """Comentários carregados de um post e os nós ``more`` (ver `flatten_comments`)."""
+        _, listing = await self.get(f"/comments/{post_id}")
+        return flatten_comments(listing)
+
+    async def more_children(self, post_id: str, children: list[str]) -> tuple[list[dict], list[dict]]:
+        """Carrega comentários recolhidos de um post (até `MORE_CHILDREN_BATCH` IDs).
+
+        Retorna os comentários e os novos nós ``more``, como `comments`.
+        """
+        payload = await self.get(
+            "/api/morechildren",
+            link_id=f"t3_{post_id}",
+            children=",".join(children),
+            api_type="json",
+            limit_children="false",
+        )
+        return flatten_comments({"data": {"children": payload["json"]["data"]["things"]}})
+
+
+def _more_ids(more, more_depth):
+    """IDs recolhidos dos nós ``more`` até a profundidade ``more_depth``.
+
+    Nós sem IDs ("continue this thread") são ignorados.
+    """
+    return [
+        cid
+        for node in more
+        if more_depth is None or node.get("depth", 0) <= more_depth
+        for cid in node.get("children", ())
+    ]
+
+
+async def _post_rows(
+    client, post, hobby, insult, hobby_regex, insult_regex, comments_limit, more_requests=0, more_depth=None
+):
+    """Comentários de um post com o par de termos, até ``comments_limit``.
+
+    Com ``more_requests`` > 0, os nós ``more`` são expandidos em rodadas de
+    até `MORE_PARALLEL` chamadas simultâneas, até gastar ``more_requests``
+    chamadas, esgotar os nós (até ``more_depth``, se informado) ou atingir
+    ``comments_limit``.
+    """
+    comments, more = await client.comments(post["id"])
+    instrumentation.count("reddit.posts")
+    rows = []
+
+    def scan(comments):
+        instrumentation.count("reddit.comments_scanned", len(comments))
+        for c in comments:
+            if len(rows) >= comments_limit:
+                return
+            body = c.get("body", "")
+            if match_terms(body, hobby_regex, insult_regex):
+                rows.append(
+                    comment_row(
+                        hobby, insult, post["id"], post["subreddit"], c["id"], c.get("author"), c.get("score"),
+                        c["created_utc"], body,
+                    )
+                )
+
+    scan(comments)
+    pending = _more_ids(more, more_depth)
+    budget = more_requests
+    while pending and budget > 0 and len(rows) < comments_limit:
+        batches = [
+            pending[i : i + MORE_CHILDREN_BATCH]
+            for i in range(0, len(pending), MORE_CHILDREN_BATCH)
+        ][: min(budget, MORE_PARALLEL)]
+        pending = pending[sum(len(b) for b in batches) :]
+        budget -= len(batches)
+        instrumentation.count("reddit.more_requests", len(batches))
+        results = await asyncio.gather(
+            *(client.more_children(post["id"], batch) for batch in batches), return_exceptions=True
+        )
+        # Processa na ordem dos lotes, para a saída não depender do tempo de resposta
+        for result in results:
+            if isinstance(result, BaseException):
+                logging.warning(f"Erro expandindo comentários do post {post['id']}: {result}")
+                continue
+            new_comments, new_more = result
+            scan(new_comments)
+            pending.extend(_more_ids(new_more, more_depth))
+    instrumentation.count("reddit.comments_kept", len(rows))
+    logging.info(f"  → Encontrados {len(rows)} comentários em post {post['id']}")
+    return rows
+
+
+async def fetch_comments_for_pair(
+    client, hobby, insult, posts_limit=50, comments_limit=20, more_requests=0, more_depth=None
+):
+    """Versão assíncrona de `reddit_scraper.fetch_comments_for_pair`.
+
+    As árvores de comentários de cada página de resultados começam a ser
+    baixadas enquanto a próxima página da busca ainda está chegando.
+    """
+    hobby_regex = re.compile(hobby, re.IGNORECASE)
+    insult_regex = re.compile(insult, re.IGNORECASE)
+    tasks = []
+    async for posts in client.search(build_query(hobby, insult), posts_limit):
+        for post in posts:
+            tasks.append(
+                asyncio.create_task(
+                    _post_rows(
+                        client, post, hobby, insult, hobby_regex, insult_regex, comments_limit,
+                        more_requests, more_depth,
+                    )
+                )
+            )
+
+    rows = []
+    for post_rows in await asyncio.gather(*tasks, return_exceptions=True):
+        if isinstance(post_rows, BaseException):
+            logging.warning(f"Erro num post de {hobby}|{insult}: {post_rows}")
+        else:
+            rows.extend(post_rows)
+    return rows
+
+
+async def collect(
+    client, pairs, post_limit=50, comment_limit=20, more_requests=0, more_depth=None
+) -> list[dict]:
+    """Busca todos os pares concorrentemente; as linhas saem na ordem dos pares."""
+    results = await asyncio.gather(
+        *(
+            fetch_comments_for_pair(client, h, i, post_limit, comment_limit, more_requests, more_depth)
+            for h, i in pairs
+        ),
+        return_exceptions=True,
+    )
+    rows = []
+    for (hobby, insult), result in zip(pairs, results):
+        if isinstance(result, BaseException):
+            logging.warning(f"Erro em {hobby}|{insult}: {result}")
+        else:
+            rows.extend(result)
+    return rows
+
+
+def get_reddit_raw_data(
+    post_limit=50,
+    comment_limit=20,
+    concurrency=DEFAULT_CONCURRENCY,
+    rate=DEFAULT_RATE,
+    more_requests=0,
+    more_depth=None,
+):
+    """Mesma saída de `reddit_scraper.get_reddit_raw_data`, coletada de forma assíncrona.
+
+    ``more_requests`` é o orçamento de chamadas a ``/api/morechildren`` por
+    post (0 = só a primeira página de cada árvore) e ``more_depth`` a
+    profundidade máxima dos comentários recolhidos a expandir.
+    """
+    cid, cs, ua = reddit_credentials()
+    pairs = term_pairs()
+
+    async def run():
+        async with AsyncRedditClient(cid, cs, ua, concurrency=concurrency, rate=rate) as client:
+            rows = await collect(client, pairs, post_limit, comment_limit, more_requests, more_depth)
+            logging.info(f"{client.requests} requisições à API para {len(pairs)} pares.")
+            return rows
+
+    rows = asyncio.run(run())
+    logging.info("✅ Coleta de dados do Reddit concluída!")
+    return rows
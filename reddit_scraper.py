@@ -22,7 +22,7 @@ import random
 import logging
 import argparse
 from datetime import datetime
-import praw
+import instrumentation
 from config import (
     DATA_PROCESSED,
     FEMALE_TERMS,
@@ -60,49 +60,91 @@ def match_terms(text: str, hobby_regex: re.Pattern, insult_regex: re.Pattern) ->
     return hobby_regex.search(text) and insult_regex.search(text)
 
 
+def build_query(hobby: str, insult: str) -> str:
+    """Consulta lucene: título ou corpo com o hobby E o insulto."""
+    hobby_query = re.sub(r"\W+", " ", hobby).strip()
+    insult_query = re.sub(r"\W+", " ", insult).strip()
+    return (
+        f'title:"{hobby_query}" AND title:"{insult_query}" '
+        f'OR selftext:"{hobby_query}" AND selftext:"{insult_query}"'
+    )
+
+
+def comment_row(hobby, insult, post_id, subreddit, comment_id, author, score, created_utc, body):
+    """Linha do CSV de saída para um comentário encontrado (já enriquecida)."""
+    row = {
+        "pair": f"{hobby}|{insult}",
+        "post_id": post_id,
+        "comment_id": comment_id,
+        "subreddit": str(subreddit),
+        "author": str(author),
+        "score": score,
+        "created_utc": datetime.utcfromtimestamp(created_utc).isoformat(),
+        "body": body.replace("\n", " "),
+    }
+    return enrich_row(row)
+
+
 # ————— Busca de comentários —————
+def _matching_rows(comments, sub_id, subreddit, hobby, insult, hobby_regex, insult_regex, rows, limit):
+    """Anexa a ``rows`` os comentários com o par, até ``limit`` linhas."""
+    for c in comments:
+        if len(rows) >= limit:
+            break
+        if match_terms(c.body, hobby_regex, insult_regex):
+            rows.append(
+                comment_row(hobby, insult, sub_id, subreddit, c.id, c.author, c.score, c.created_utc, c.body)
+            )
+
+
 def fetch_comments_for_pair(
-    reddit, hobby, insult, posts_limit=50, comments_limit=20, sort="hot"
+    reddit, hobby, insult, posts_limit=50, comments_limit=20, sort="hot", more_requests=0
 ):
     """
     1) Busca submissions em r/all (ou subreddit especificado) cujo título
        ou corpo contenha hobby E insulto.
     2) Itera comentários desses posts, filtrando aqueles que contenham ambos.
+
+    Com ``more_requests`` > 0, os comentários recolhidos (`MoreComments`) de
+    cada post também são carregados, um por requisição (os maiores
+    primeiro), até gastar ``more_requests`` requisições por post, não
+    restar nenhum ou encontrar ``comments_limit`` comentários. Com 0, os
+    recolhidos são descartados (só a primeira página da árvore).
     """
     rows = []
-    hobby_query = re.sub(r"\W+", " ", hobby).strip()
-    insult_query = re.sub(r"\W+", " ", insult).strip()
-    query = (
-        f'title:"{hobby_query}" AND title:"{insult_query}" '
-        f'OR selftext:"{hobby_query}" AND selftext:"{insult_query}"'
-    )
     submissions = reddit.subreddit("all").search(
-        query, limit=posts_limit, syntax="lucene"
+        build_query(hobby, insult), limit=posts_limit, syntax="lucene"
     )
 
     hobby_regex = re.compile(hobby, re.IGNORECASE)
     insult_regex = re.compile(insult, re.IGNORECASE)
 
     for sub in submissions:
-        sub.comments.replace_more(limit=0)
-        count = 0
-        for c in sub.comments.list():
-            if match_terms(c.body, hobby_regex, insult_regex):
-                row = {
-                    "pair": f"{hobby}|{insult}",
-                    "post_id": sub.id,
-                    "comment_id": c.id,
-                    "subreddit": str(sub.subreddit),
-                    "author": str(c.author),
-                    "score": c.score,
-                    "created_utc": datetime.utcfromtimestamp(c.created_utc).isoformat(),
-                    "body": c.body.replace("\n", " "),
-                }
-                rows.append(enrich_row(row))
-                count += 1
-                if count >= comments_limit:
-                    break
-        logging.info(f"  → Encontrados {count} comentários em post {sub.id}")
+        instrumentation.count("reddit.posts")
+        post_rows = []
+        if more_requests <= 0:
+            sub.comments.replace_more(limit=0)
+        seen = set()
+        budget = more_requests
+        while True:
+            # MoreComments não têm corpo; só os comentários novos são lidos
+            forest = sub.comments.list()
+            comments = [c for c in forest if hasattr(c, "body") and c.id not in seen]
+            seen.update(c.id for c in comments)
+            instrumentation.count("reddit.comments_scanned", len(comments))
+            _matching_rows(
+                comments, sub.id, sub.subreddit, hobby, insult, hobby_regex, insult_regex, post_rows, comments_limit
+            )
+            has_more = any(not hasattr(c, "body") for c in forest)
+            if len(post_rows) >= comments_limit or budget <= 0 or not has_more:
+                break
+            # Um MoreComments por vez: cada um custa exatamente uma requisição
+            sub.comments.replace_more(limit=1, threshold=0)
+            instrumentation.count("reddit.more_requests")
+            budget -= 1
+        rows.extend(post_rows)
+        instrumentation.count("reddit.comments_kept", len(post_rows))
+        logging.info(f"  → Encontrados {len(post_rows)} comentários em post {sub.id}")
         # human_delay()
     return rows
 
@@ -143,24 +185,36 @@ def parse_args():
     return parser.parse_args()
 
 
-# ————— Inicialização do cliente PRAW —————
-def init_reddit_client():
+def term_pairs():
+    """Todos os pares (hobby, termo depreciativo) buscados."""
+    # Listas fixas de hobbies e termos depreciativos
+    female = FEMALE_TERMS
+    male = MALE_TERMS
+    demean = DEMEAN_TERMS
+    return [(h, d) for h in (female + male) for d in demean]
+
+
+def reddit_credentials():
     cid = os.getenv("REDDIT_CID")
     cs = os.getenv("REDDIT_CSECRET")
     ua = os.getenv("REDDIT_USER_AGENT")
     if not cid or not cs or not ua:
         raise RuntimeError("Defina REDDIT_CID, REDDIT_CSECRET e REDDIT_USER_AGENT.")
+    return cid, cs, ua
+
+
+# ————— Inicialização do cliente PRAW —————
+def init_reddit_client():
+    cid, cs, ua = reddit_credentials()
+    # Importado aqui: o praw é lento de importar e só é necessário na coleta
+    import praw
+
     return praw.Reddit(client_id=cid, client_secret=cs, user_agent=ua)
 
 
-def get_reddit_raw_data(post_limit=50, comment_limit=20):
+def get_reddit_raw_data(post_limit=50, comment_limit=20, more_requests=0):
     reddit = init_reddit_client()
-
-    # Listas fixas de hobbies e termos depreciativos
-    female = FEMALE_TERMS
-    male = MALE_TERMS
-    demean = DEMEAN_TERMS
-    pairs = [(h, d) for h in (female + male) for d in demean]
+    pairs = term_pairs()
 
     all_comments = []
     for hobby, insult in pairs:
@@ -172,6 +226,7 @@ def get_reddit_raw_data(post_limit=50, comment_limit=20):
                 insult,
                 posts_limit=post_limit,
                 comments_limit=comment_limit,
+                more_requests=more_requests,
             )
             all_comments.extend(rows)
         except Exception as e:
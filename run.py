@@ -1,48 +1,164 @@
 import argparse
-import pandas as pd
+import contextlib
+import instrumentation
 from config import DATA_PROCESSED
 
+# pandas e os módulos de cada etapa são importados dentro das funções run_*:
+# assim `run.py --help` e os subcomandos leves não pagam o custo de importá-los.
+# As funções run_* retornam os arquivos que a etapa gravou (ou confirmou em
+# dia), usados pelo `pipeline`; None indica que a etapa não gerou saídas.
+
 
 def run_fetch_artists(args):
     print("▶️ Executando o módulo 'artists_info'...")
+    import pandas as pd
     from artists_info import get_artist_raw_data
     raw_data = get_artist_raw_data()
     df = pd.DataFrame(raw_data)
     output_path = DATA_PROCESSED / "artists_data.csv"
     df.to_csv(output_path, index=False, sep=";")
     print(f"✅ Dados de artistas salvos em: {output_path}")
+    return [output_path]
 
 
 def run_fetch_flights(args):
     print("▶️ Executando o módulo 'flights_parser'...")
-    from flights_parser import get_flight_raw_data, HEADER
-    raw_data = get_flight_raw_data(max_lines=args.max_lines)
-    output_path = DATA_PROCESSED / "flights_data.csv"
-    df = pd.DataFrame(raw_data, columns=HEADER)
-    df.to_csv(output_path, index=False, sep=";")
-    print(f"✅ Dados de voos salvos em: {output_path}")
+    from flights_parser import FLIGHTS_DIR, partition_files, write_flight_partitions
+    from memory_budget import PARSER_WORKER_BYTES, worker_count
+    cube = {} if args.cubes else None
+    segments_dir = None
+    if args.segments:
+        from flights_segments import SEGMENTS_DIR as segments_dir
+    # Uma partição por trimestre, publicada assim que o arquivo termina;
+    # linhas gravadas à medida que são lidas: memória constante por processo
+    written = write_flight_partitions(
+        FLIGHTS_DIR,
+        max_lines=args.max_lines,
+        cube=cube,
+        segments_dir=segments_dir,
+        jobs=worker_count(args.memory_budget, args.jobs, PARSER_WORKER_BYTES),
+        force=args.force,
+        quarter_from=args.quarter_from,
+        quarter_to=args.quarter_to,
+        dedup=args.dedup,
+    )
+    print(f"✅ {sum(written.values())} chegadas em LAS em {len(written)} partições novas em: {FLIGHTS_DIR}")
+    if segments_dir is not None:
+        print(f"✅ Segmentos salvos em: {segments_dir}")
+    if cube is not None:
+        from flights_cube import cube_to_frame, save_cube
+        cube_path = save_cube(cube_to_frame(cube))
+        print(f"✅ Cubo de agregados ({len(cube)} células) salvo em: {cube_path}")
+    # Partições gravadas agora e as mantidas por estarem em dia
+    return partition_files(FLIGHTS_DIR) or None
 
 
 def run_fetch_reddit(args):
     print("▶️ Executando o módulo 'reddit_scraper'...")
-    from reddit_scraper import get_reddit_raw_data
-    raw_data = get_reddit_raw_data(post_limit=args.post_limit, comment_limit=args.comment_limit)
+    import pandas as pd
+    if args.use_async:
+        from reddit_async import get_reddit_raw_data
+        raw_data = get_reddit_raw_data(
+            post_limit=args.post_limit,
+            comment_limit=args.comment_limit,
+            concurrency=args.concurrency,
+            more_requests=args.expand_more,
+            more_depth=args.more_depth,
+        )
+    else:
+        from reddit_scraper import get_reddit_raw_data
+        raw_data = get_reddit_raw_data(
+            post_limit=args.post_limit, comment_limit=args.comment_limit, more_requests=args.expand_more
+        )
     df = pd.DataFrame(raw_data)
     output_path = DATA_PROCESSED / "reddit_comments.csv"
     df.to_csv(output_path, index=False, sep=";")
     print(f"✅ Dados do Reddit salvos em: {output_path}")
+    return [output_path]
 
 
 def run_preprocess_vegas(args):
     print("▶️ Executando o pré-processamento dos dados de Las Vegas...")
     from preprocess_data import main as preprocess_main
-    preprocess_main()
+    return preprocess_main(regions=args.regions)
 
 
 def run_analyze_vegas(args):
     print("▶️ Executando a análise dos dados de Las Vegas...")
     from analyze_processed_data import main as analyze_main
-    analyze_main(metrics=args.metrics)
+    from event_impact import MAX_BLOCK_ELEMENTS
+    from memory_budget import block_elements, worker_count
+    return analyze_main(
+        metrics=args.metrics,
+        jobs=worker_count(args.memory_budget, args.jobs),
+        use_cache=not args.no_cache,
+        events_file=args.events,
+        significance=args.significance,
+        n_resamples=args.resamples,
+        max_block_elements=block_elements(args.memory_budget, MAX_BLOCK_ELEMENTS),
+    )
+
+
+def run_baseline_vegas(args):
+    print("▶️ Ajustando baselines sazonais dos dados de Las Vegas...")
+    from baseline_model import main as baseline_main
+    baseline_main(args.events, regions=args.regions, use_cache=not args.no_cache)
+
+
+def run_join_data(args):
+    print("▶️ Unindo dados de voos e de turismo...")
+    from join_datasets import main as join_main
+    from memory_budget import chunk_rows
+    return join_main(
+        region=args.region,
+        chunksize=chunk_rows(args.memory_budget, args.chunksize),
+        top_origins=args.top_origins,
+    )
+
+
+def run_analyze_flights(args):
+    from flights_query import default_backend, main as query_main
+    backend = args.backend or default_backend()
+    print(f"▶️ Agregando dados de voos (backend: {backend})...")
+    query_main(
+        query=args.query,
+        group_by=args.group_by,
+        backend=backend,
+        quarter_from=args.quarter_from,
+        quarter_to=args.quarter_to,
+        threads=args.threads,
+        output=args.output,
+        memory_limit=args.memory_budget,
+    )
+
+
+def run_pipeline(args):
+    print("▶️ Executando o pipeline completo...")
+    import matplotlib
+    from pipeline import STATE_FILE, run_pipeline as pipeline_main
+
+    # As etapas rodam em threads: o pyplot fora da thread principal exige um
+    # backend não interativo, escolhido antes de qualquer etapa importá-lo
+    matplotlib.use("Agg")
+
+    def run_stage(name):
+        stage_args = build_parser().parse_args([name])
+        stage_args.memory_budget = args.memory_budget
+        stage_args.trace_memory = args.trace_memory
+        # Etapas concorrentes compartilham o processo: os picos de cada uma
+        # incluem a memória das que rodam ao mesmo tempo
+        with _memory_tracking(args, name), instrumentation.span("pipeline.stage", stage=name):
+            return stage_args.func(stage_args)
+
+    status = pipeline_main(
+        run_stage,
+        targets=args.targets,
+        jobs=args.jobs,
+        force=args.force,
+        dry_run=args.dry_run,
+        state_file=STATE_FILE,
+    )
+    print("Resumo: " + ", ".join(f"{name}={state}" for name, state in status.items()))
 
 
 def main():
@@ -58,16 +174,127 @@ def main():
         # Coleta de dados
         python run.py fetch-artists
         python run.py fetch-flights --max-lines 100000
+        python run.py fetch-flights --cubes
+        python run.py fetch-flights --segments
+        python run.py fetch-flights --jobs 8 --force
+        python run.py fetch-flights --from 20221 --to 20224
+        python run.py fetch-flights --dedup
         python run.py fetch-reddit --post-limit 10 --comment-limit 5
+        python run.py fetch-reddit --async --concurrency 8
+        python run.py fetch-reddit --async --expand-more 4 --more-depth 3
 
         # Processamento e Análise
         python run.py preprocess-vegas
+        python run.py preprocess-vegas --regions "Las Vegas" Downtown Laughlin Mesquite
         python run.py analyze-vegas --metrics "Visitors" "Average Room Rate"
+        python run.py analyze-vegas --jobs 4
+        python run.py analyze-vegas --events data/raw/events.csv
+        python run.py analyze-vegas --events data/raw/events.csv --significance --jobs 4
+        python run.py baseline-vegas --events data/raw/events.csv
+        python run.py join-data --top-origins 15
+        python run.py analyze-flights --query fare-by-origin-quarter --backend duckdb
+        python run.py analyze-flights --group-by Origin FareClass --from 20221 --to 20224 --backend polars
+
+        # Instrumentação (métricas em performance_reports/)
+        python run.py --profile analyze-vegas
+        TCC_PROFILE=1 python run.py join-data
+        python run.py --sample-profile fetch-flights
+        python run.py --memory-budget 4G fetch-flights --cubes
+        python run.py --memory-budget 2G --trace-memory pipeline
+
+        # Pipeline completo (etapas em dia são puladas)
+        python run.py pipeline --jobs 4
+        python run.py pipeline --targets analyze-vegas --dry-run
     """
+    parser = build_parser()
+    args = parser.parse_args()
+    if getattr(args, "more_depth", None) is not None and not args.use_async:
+        parser.error("--more-depth só é suportado com --async (o PRAW não informa a profundidade dos recolhidos).")
+    if args.profile:
+        metrics_path = instrumentation.enable()
+        print(f"📊 Instrumentação ligada; métricas em: {metrics_path}")
+    with contextlib.ExitStack() as stack:
+        if args.sample_profile:
+            from sampling_profiler import SamplingProfiler
+            profiler = SamplingProfiler(interval=args.sample_interval)
+            # Registrado antes do profiler: roda depois de ele parar, mesmo se a
+            # etapa falhar (a execução que falhou é a que mais precisa do perfil)
+            stack.callback(_save_samples, profiler, args.module)
+            stack.enter_context(profiler)
+        stack.enter_context(_memory_tracking(args, args.module))
+        stack.enter_context(instrumentation.span(f"run.{args.module}"))
+        args.func(args)
+
+
+def _save_samples(profiler, stage):
+    collapsed, speedscope = profiler.save(stage)
+    print(f"📊 {profiler.samples} amostras; pilhas em: {collapsed}")
+    print(f"📊 Perfil para o speedscope em: {speedscope}")
+
+
+def _memory_tracking(args, stage):
+    """Relatório de memória da etapa, se pedido com --memory-budget ou --trace-memory."""
+    if not (args.memory_budget or args.trace_memory):
+        return contextlib.nullcontext()
+    from memory_budget import track_memory
+    return track_memory(stage, budget=args.memory_budget, trace=args.trace_memory)
+
+
+def _quarter_code(text):
+    from flights_parser import parse_quarter_code
+    try:
+        parse_quarter_code(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return text
+
+
+def _memory_size(text):
+    from memory_budget import parse_size
+    try:
+        return parse_size(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def build_parser():
+    """Monta o parser de argumentos com todos os subcomandos."""
+    # Leve: o flights_query só importa o pandas ao executar uma consulta
+    from flights_query import BACKENDS, QUERIES
     parser = argparse.ArgumentParser(
         description="Orquestrador de scripts do projeto TCC.",
         formatter_class=argparse.RawTextHelpFormatter,
     )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Liga a instrumentação (spans, contadores, memória e cProfile) nesta execução;\n"
+        "equivale a TCC_PROFILE=1. As métricas vão para performance_reports/.",
+    )
+    parser.add_argument(
+        "--sample-profile",
+        action="store_true",
+        help="Amostra as pilhas de todas as threads durante a execução (custo baixo) e grava\n"
+        "pilhas colapsadas e um perfil do speedscope em performance_reports/.",
+    )
+    parser.add_argument(
+        "--sample-interval",
+        type=float,
+        default=0.01,
+        help="Intervalo entre amostras do --sample-profile, em segundos (padrão: 0.01).",
+    )
+    parser.add_argument(
+        "--memory-budget",
+        type=_memory_size,
+        default=None,
+        help="Orçamento de memória (ex.: 512M, 4G): limita blocos de leitura, processos e o\n"
+        "DuckDB para manter o pico de RSS abaixo dele, e mostra o uso de memória da etapa.",
+    )
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="Mostra também o pico de alocações Python de cada etapa (tracemalloc; mais lento).",
+    )
     subparsers = parser.add_subparsers(dest="module", required=True)
 
     # --- Subparsers de Coleta (Fetch) ---
@@ -80,6 +307,44 @@ def main():
         "fetch-flights", help="Processa arquivos brutos de voos para chegadas em LAS."
     )
     fetch_flights_parser.add_argument("--max-lines", type=int, default=None, help="Número máximo de linhas por arquivo para processar.")
+    fetch_flights_parser.add_argument(
+        "--cubes",
+        action="store_true",
+        help="Também grava o cubo de agregados (Origin × Carrier × YearQuarter × FareClass) em flights_cube.parquet.",
+    )
+    fetch_flights_parser.add_argument(
+        "--segments",
+        action="store_true",
+        help="Também grava todos os segmentos dos itinerários para LAS em flights_segments/ (Parquet).",
+    )
+    fetch_flights_parser.add_argument(
+        "--jobs",
+        type=int,
+        default=4,
+        help="Arquivos trimestrais processados em paralelo, um processo por arquivo (padrão: 4).",
+    )
+    fetch_flights_parser.add_argument(
+        "--from",
+        dest="quarter_from",
+        type=_quarter_code,
+        help="Primeiro trimestre (YYYYQ ou YYYYMM, inclusivo); arquivos anteriores nem são abertos.",
+    )
+    fetch_flights_parser.add_argument(
+        "--to",
+        dest="quarter_to",
+        type=_quarter_code,
+        help="Último trimestre (YYYYQ ou YYYYMM, inclusivo); arquivos posteriores nem são abertos.",
+    )
+    fetch_flights_parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help="Descarta TicketIDs repetidos entre trimestres (lê os arquivos um a um, sem --jobs).",
+    )
+    fetch_flights_parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Reprocessa também os trimestres cuja partição já está em dia.",
+    )
     fetch_flights_parser.set_defaults(func=run_fetch_flights)
 
     fetch_reddit_parser = subparsers.add_parser(
@@ -87,12 +352,40 @@ def main():
     )
     fetch_reddit_parser.add_argument("--post-limit", type=int, default=50, help="Máximo de posts por par de termos.")
     fetch_reddit_parser.add_argument("--comment-limit", type=int, default=20, help="Máximo de comentários por post.")
+    fetch_reddit_parser.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help="Coleta assíncrona: buscas e árvores de comentários em paralelo, com limite de taxa da API.",
+    )
+    fetch_reddit_parser.add_argument(
+        "--concurrency", type=int, default=8, help="Com --async, máximo de requisições simultâneas (padrão: 8)."
+    )
+    fetch_reddit_parser.add_argument(
+        "--expand-more",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Carrega comentários recolhidos com até N requisições extras por post (padrão: 0, não carrega).",
+    )
+    fetch_reddit_parser.add_argument(
+        "--more-depth",
+        type=int,
+        default=None,
+        metavar="D",
+        help="Com --async e --expand-more, só expande comentários recolhidos até a profundidade D.",
+    )
     fetch_reddit_parser.set_defaults(func=run_fetch_reddit)
 
     # --- Subparsers de Processamento e Análise ---
     preprocess_vegas_parser = subparsers.add_parser(
         "preprocess-vegas", help="Consolida e padroniza os dados de turismo de Las Vegas a partir dos arquivos Excel."
     )
+    preprocess_vegas_parser.add_argument(
+        "--regions",
+        nargs="*",
+        help="Regiões (abas) a extrair de cada planilha, ex.: 'Las Vegas' Laughlin (padrão: Las Vegas)",
+    )
     preprocess_vegas_parser.set_defaults(func=run_preprocess_vegas)
 
     analyze_vegas_parser = subparsers.add_parser(
@@ -104,10 +397,111 @@ def main():
         nargs="*",
         help="Lista de indicadores a analisar (padrão: todos)",
     )
+    analyze_vegas_parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Número de processos para renderizar gráficos em paralelo (padrão: 1)",
+    )
+    analyze_vegas_parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Regenera todos os gráficos, mesmo os que não mudaram.",
+    )
+    analyze_vegas_parser.add_argument(
+        "--events",
+        help="CSV de eventos (Event, Year, Month); salva o impacto de cada evento em cada métrica.",
+    )
+    analyze_vegas_parser.add_argument(
+        "--significance",
+        action="store_true",
+        help="Com --events, inclui intervalos bootstrap e p-valores de permutação (usa --jobs).",
+    )
+    analyze_vegas_parser.add_argument(
+        "--resamples",
+        type=int,
+        default=2000,
+        help="Número de reamostragens do bootstrap/permutação (padrão: 2000).",
+    )
     analyze_vegas_parser.set_defaults(func=run_analyze_vegas)
 
-    args = parser.parse_args()
-    args.func(args)
+    baseline_vegas_parser = subparsers.add_parser(
+        "baseline-vegas",
+        help="Ajusta baselines sazonais (tendência + sazonalidade) e calcula os resíduos dos eventos.",
+    )
+    baseline_vegas_parser.add_argument(
+        "--events", required=True, help="CSV de eventos (Event, Year, Month)."
+    )
+    baseline_vegas_parser.add_argument(
+        "--regions", nargs="*", help="Regiões a modelar (padrão: todas do store)."
+    )
+    baseline_vegas_parser.add_argument(
+        "--no-cache", action="store_true", help="Reajusta os modelos, ignorando o cache."
+    )
+    baseline_vegas_parser.set_defaults(func=run_baseline_vegas)
+
+    join_data_parser = subparsers.add_parser(
+        "join-data",
+        help="Une as chegadas em LAS (por trimestre) aos dados mensais de turismo numa só tabela.",
+    )
+    join_data_parser.add_argument("--region", default="Las Vegas", help="Região dos dados de turismo.")
+    join_data_parser.add_argument(
+        "--chunksize", type=int, default=500_000, help="Linhas de voos lidas por bloco."
+    )
+    join_data_parser.add_argument(
+        "--top-origins", type=int, default=10, help="Número de aeroportos de origem detalhados."
+    )
+    join_data_parser.set_defaults(func=run_join_data)
+
+    analyze_flights_parser = subparsers.add_parser(
+        "analyze-flights",
+        help="Agrega os voos processados direto do disco (DuckDB, Polars ou pandas em blocos).",
+    )
+    analyze_flights_parser.add_argument(
+        "--query",
+        default="fare-by-origin-quarter",
+        choices=list(QUERIES),
+        help="Consulta pronta a executar (padrão: fare-by-origin-quarter).",
+    )
+    analyze_flights_parser.add_argument(
+        "--group-by", nargs="+", help="Colunas de agrupamento livres (substituem --query), ex.: Origin Quarter."
+    )
+    analyze_flights_parser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        help="Motor da consulta; duckdb e polars são opcionais (padrão: o primeiro instalado, nessa ordem).",
+    )
+    analyze_flights_parser.add_argument(
+        "--from", dest="quarter_from", type=_quarter_code, help="Primeiro trimestre (YYYYQ ou YYYYMM, inclusivo)."
+    )
+    analyze_flights_parser.add_argument(
+        "--to", dest="quarter_to", type=_quarter_code, help="Último trimestre (YYYYQ ou YYYYMM, inclusivo)."
+    )
+    analyze_flights_parser.add_argument(
+        "--threads", type=int, default=None, help="Threads do DuckDB (padrão: todos os núcleos; só no duckdb)."
+    )
+    analyze_flights_parser.add_argument("--output", help="Salva o resultado em CSV em vez de mostrar na tela.")
+    analyze_flights_parser.set_defaults(func=run_analyze_flights)
+
+    pipeline_parser = subparsers.add_parser(
+        "pipeline",
+        help="Executa coleta, pré-processamento e análise respeitando as dependências (pula etapas em dia).",
+    )
+    pipeline_parser.add_argument(
+        "--targets", nargs="+", help="Etapas finais desejadas (padrão: todas); dependências entram automaticamente."
+    )
+    pipeline_parser.add_argument(
+        "--jobs", type=int, default=4, help="Máximo de etapas independentes em paralelo (padrão: 4)."
+    )
+    pipeline_parser.add_argument(
+        "--force", action="store_true", help="Executa todas as etapas, mesmo com as saídas em dia."
+    )
+    pipeline_parser.add_argument(
+        "--dry-run", action="store_true", help="Só mostra quais etapas seriam executadas."
+    )
+    pipeline_parser.set_defaults(func=run_pipeline)
+
+    return parser
 
 
 if __name__ == "__main__":
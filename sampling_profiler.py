@@ -0,0 +1,156 @@
+"""
+sampling_profiler.py
+
+Profiler estatístico (por amostragem) para etapas longas do pipeline.
+
+Ao contrário do cProfile, que intercepta cada chamada de função e distorce
+laços quentes como `flights_parser.process_file`, este profiler apenas
+fotografa as pilhas de todas as threads a intervalos regulares, numa thread
+de fundo (via `sys._current_frames`). O custo é proporcional ao número de
+amostras, não ao número de chamadas, e fica desprezível em execuções longas.
+
+O resultado pode ser gravado em dois formatos:
+
+- pilhas colapsadas (``thread;func_a;func_b 42``), lidas por `flamegraph.pl`,
+  `inferno` e similares;
+- JSON do speedscope (https://www.speedscope.app), com um perfil por thread.
+
+Uso pelo `run.py`:
+
+    python run.py --sample-profile fetch-flights
+    python run.py --sample-profile --sample-interval 0.05 pipeline
+"""
+
+import json
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Optional
+
+from config import PERF_REPORTS
+
+DEFAULT_INTERVAL = 0.01
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+
+def _frame_key(frame) -> tuple[str, str, int]:
+    code = frame.f_code
+    return code.co_name, code.co_filename, code.co_firstlineno
+
+
+class SamplingProfiler:
+    """Amostra periodicamente as pilhas de todas as threads do processo.
+
+    Cada amostra é agregada num contador de pilhas ``(thread, quadros...)``,
+    do quadro mais externo para o mais interno, então a memória usada cresce
+    com o número de pilhas distintas e não com a duração da execução.
+    """
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._stop.clear()
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+            self.elapsed += time.perf_counter() - self._started
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_key(frame))
+                    frame = frame.f_back
+                stack.reverse()
+                self.stacks[(names.get(thread_id, str(thread_id)), *stack)] += 1
+            self.samples += 1
+
+    def collapsed(self) -> list[str]:
+        """Linhas no formato de pilhas colapsadas, da mais frequente à menos."""
+        lines = []
+        for (thread, *frames), count in self.stacks.most_common():
+            names = [thread] + [f"{name} ({Path(file).name}:{line})" for name, file, line in frames]
+            lines.append(f"{';'.join(n.replace(';', ':') for n in names)} {count}")
+        return lines
+
+    def write_collapsed(self, path: Path) -> Path:
+        Path(path).write_text("\n".join(self.collapsed()) + "\n")
+        return Path(path)
+
+    def speedscope(self, name: str = "profile") -> dict:
+        """Perfil no formato de arquivo do speedscope (um perfil por thread)."""
+        frames, frame_index = [], {}
+        by_thread: dict[str, list] = {}
+        for (thread, *stack), count in self.stacks.items():
+            indices = []
+            for key in stack:
+                if key not in frame_index:
+                    frame_index[key] = len(frames)
+                    frames.append({"name": key[0], "file": key[1], "line": key[2]})
+                indices.append(frame_index[key])
+            by_thread.setdefault(thread, []).append((indices, count * self.interval))
+
+        profiles = []
+        for thread, entries in by_thread.items():
+            total = sum(weight for _, weight in entries)
+            profiles.append(
+                {
+                    "type": "sampled",
+                    "name": thread,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": total,
+                    "samples": [indices for indices, _ in entries],
+                    "weights": [weight for _, weight in entries],
+                }
+            )
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": name,
+            "exporter": "sampling_profiler",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": profiles,
+        }
+
+    def write_speedscope(self, path: Path, name: str = "profile") -> Path:
+        Path(path).write_text(json.dumps(self.speedscope(name)))
+        return Path(path)
+
+    def save(self, label: str, output_dir: Optional[Path] = None) -> tuple[Path, Path]:
+        """Grava os dois formatos em ``output_dir`` (padrão: `PERF_REPORTS`)."""
+        output_dir = Path(output_dir or PERF_REPORTS)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        stem = f"sample_{label}_{time.strftime('%Y%m%d-%H%M%S')}"
+        return (
+            self.write_collapsed(output_dir / f"{stem}.collapsed.txt"),
+            self.write_speedscope(output_dir / f"{stem}.speedscope.json", name=label),
+        )
@@ -1,11 +1,13 @@
 import pandas as pd
 import pytest
-from unittest.mock import patch
+from unittest.mock import ANY, patch
  
 from analyze_processed_data import (
     load_data,
     plot_yearly_comparison,
     comparative_analysis,
+    render_charts,
+    build_monthly_pivot,
     main,
 )
 
@@ -46,6 +48,24 @@ def test_load_data_success(monkeypatch, tmp_path, sample_df):
     # parse_dates in read_csv can affect index type, so we compare values
     pd.testing.assert_frame_equal(loaded_df, sample_df)
 
+def test_load_data_from_store_applies_filters(monkeypatch, tmp_path, sample_df):
+    """Tests that the typed Parquet store is read back as a wide frame."""
+    from tourism_store import save_store, to_store_frame
+
+    long_df = sample_df.melt(
+        id_vars=["Year", "Month"], var_name="Metric", value_name="Value"
+    )
+    long_df.insert(0, "Region", "Las Vegas")
+    file_path = save_store(to_store_frame(long_df), tmp_path / "store.parquet")
+    monkeypatch.setattr("analyze_processed_data.PROCESSED_DATA_FILE", file_path)
+
+    loaded_df = load_data(metrics=["Visitors"], start="2022-01-01")
+
+    assert list(loaded_df.columns) == ["Visitors", "Year", "Month"]
+    assert loaded_df.index.min() == pd.Timestamp("2022-03-01")
+    assert loaded_df.loc["2022-04-01", "Visitors"] == 200
+
+
 def test_load_data_file_not_found(monkeypatch, capsys):
     """Tests that it handles a missing file gracefully."""
     monkeypatch.setattr("analyze_processed_data.PROCESSED_DATA_FILE", "non_existent.csv")
@@ -77,6 +97,53 @@ def test_plot_yearly_comparison(mock_plt, tmp_path, monkeypatch, sample_df):
     mock_plt.savefig.assert_called_with(expected_path)
     mock_plt.close.assert_called_once()
 
+
+def test_build_monthly_pivot_matches_per_metric_pivot_table(sample_df):
+    """Tests that the shared pivot matches a per-metric pivot_table."""
+    pivot = build_monthly_pivot(sample_df, ["Visitors", "Revenue"])
+
+    assert list(pivot.columns.names) == ["Metric", "Year"]
+    for metric in ["Visitors", "Revenue"]:
+        expected = sample_df.pivot_table(
+            index=sample_df.index.month, columns=sample_df.index.year, values=metric
+        )
+        pd.testing.assert_frame_equal(
+            pivot[metric], expected, check_names=False, check_dtype=False
+        )
+
+
+@patch("analyze_processed_data.plt")
+def test_plot_yearly_comparison_skips_unchanged_chart(mock_plt, tmp_path, monkeypatch, sample_df):
+    """Tests that an unchanged chart is not rendered again."""
+    monkeypatch.setattr("analyze_processed_data.GRAPH_OUTPUT", tmp_path)
+    mock_plt.savefig.side_effect = lambda path: path.write_bytes(b"png")
+
+    png = plot_yearly_comparison(sample_df, "Visitors", "Test Title", "Test YLabel")
+    # A cache hit still reports the chart (the pipeline checks reported outputs)
+    assert plot_yearly_comparison(sample_df, "Visitors", "Test Title", "Test YLabel") == png
+    assert png == tmp_path / "comparison_visitors.png"
+    assert mock_plt.savefig.call_count == 1
+
+    # Changed data or parameters invalidate the cache
+    changed = sample_df.assign(Visitors=sample_df["Visitors"] + 1)
+    plot_yearly_comparison(changed, "Visitors", "Test Title", "Test YLabel")
+    plot_yearly_comparison(changed, "Visitors", "Other Title", "Test YLabel")
+    assert mock_plt.savefig.call_count == 3
+
+    plot_yearly_comparison(changed, "Visitors", "Other Title", "Test YLabel", use_cache=False)
+    assert mock_plt.savefig.call_count == 4
+
+
+def test_render_charts_in_process_pool(tmp_path, monkeypatch, sample_df):
+    """Tests that charts rendered by worker processes land in GRAPH_OUTPUT."""
+    monkeypatch.setattr("analyze_processed_data.GRAPH_OUTPUT", tmp_path)
+
+    render_charts(sample_df, ["Visitors", "Revenue"], jobs=2)
+
+    assert (tmp_path / "comparison_visitors.png").stat().st_size > 0
+    assert (tmp_path / "comparison_revenue.png").stat().st_size > 0
+
+
 def test_comparative_analysis_prints_correctly(capsys, sample_df):
     """Tests the quantitative analysis output."""
     comparative_analysis(sample_df, ["Visitors", "Revenue"])
@@ -111,13 +178,14 @@ def test_main_full_run(mock_analysis, mock_plot, mock_load, sample_df):
 
     mock_load.assert_called_once()
     assert mock_plot.call_count == 2  # For 'Visitors' and 'Revenue'
-    mock_analysis.assert_called_once_with(sample_df, ["Visitors", "Revenue"])
+    mock_analysis.assert_called_once_with(sample_df, ["Visitors", "Revenue"], pivot=ANY)
 
 
 @patch("analyze_processed_data.load_data")
-def test_main_with_missing_metric(mock_load, capsys, sample_df):
+def test_main_with_missing_metric(mock_load, capsys, tmp_path, monkeypatch, sample_df):
     """Tests that a warning is printed for metrics that don't exist."""
     mock_load.return_value = sample_df
+    monkeypatch.setattr("analyze_processed_data.GRAPH_OUTPUT", tmp_path)
 
     main(metrics=["Visitors", "NonExistentMetric"])
 
@@ -127,12 +195,30 @@ def test_main_with_missing_metric(mock_load, capsys, sample_df):
 
 @patch("analyze_processed_data.load_data")
 @patch("analyze_processed_data.comparative_analysis")
-def test_main_with_no_metrics(mock_analysis, mock_load, sample_df):
+def test_main_with_no_metrics(mock_analysis, mock_load, tmp_path, monkeypatch, sample_df):
     """Tests that calling main with no metrics analyzes all available ones."""
     mock_load.return_value = sample_df
+    monkeypatch.setattr("analyze_processed_data.GRAPH_OUTPUT", tmp_path)
 
     main(metrics=None)  # Explicitly pass None
 
     mock_load.assert_called_once()
     # Should be called with all available metrics from the sample_df
-    mock_analysis.assert_called_once_with(sample_df, ["Visitors", "Revenue"])
+    mock_analysis.assert_called_once_with(sample_df, ["Visitors", "Revenue"], pivot=ANY)
+
+
+@patch("analyze_processed_data.load_data")
+@patch("analyze_processed_data.plot_yearly_comparison")
+def test_main_with_events_file_saves_impacts(mock_plot, mock_load, tmp_path, monkeypatch, sample_df):
+    """Tests that an events table produces one impact row per (event, metric)."""
+    mock_load.return_value = sample_df
+    events_path = tmp_path / "events.csv"
+    events_path.write_text("Event,Year,Month\nShows BTS,2022,4\nOther,2023,4\n")
+    monkeypatch.setattr("event_impact.IMPACTS_FILE", tmp_path / "impacts.csv")
+
+    main(events_file=events_path)
+
+    impacts = pd.read_csv(tmp_path / "impacts.csv")
+    assert len(impacts) == 4
+    bts = impacts[(impacts["Event"] == "Shows BTS") & (impacts["Metric"] == "Visitors")]
+    assert bts["ImpactPct"].round(2).item() == 53.85
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from baseline_model import (
+    design_matrix,
+    event_residuals,
+    fit_baselines,
+    fit_baselines_cached,
+    series_matrix,
+    training_mask,
+)
+
+
+@pytest.fixture
+def store_df():
+    """Long store with trend + seasonality, a COVID collapse and an event spike."""
+    dates = pd.date_range("2015-01-01", "2023-12-01", freq="MS", name="Date")
+    t = np.arange(len(dates)) / 12
+    season = np.tile(np.linspace(-10, 10, 12), len(dates) // 12)
+    frames = []
+    for region, scale in [("Las Vegas", 1.0), ("Laughlin", 0.2)]:
+        for metric, level in [("Visitors", 300.0), ("Room Rate", 100.0)]:
+            values = scale * (level + 5 * t + season)
+            covid = (dates >= "2020-03-01") & (dates <= "2021-06-01")
+            values = np.where(covid, values * 0.2, values)
+            values = np.where(dates == "2022-04-01", values * 1.5, values)
+            frames.append(
+                pd.DataFrame(
+                    {"Region": region, "Metric": metric, "Value": values}, index=dates
+                )
+            )
+    df = pd.concat(frames)
+    df = df.drop(df[(df["Metric"] == "Room Rate") & (df.index == "2016-02-01")].index[:1])
+    return df
+
+
+@pytest.fixture
+def events():
+    return pd.DataFrame({"Event": ["BTS"], "Year": [2022], "Month": [4]})
+
+
+def test_training_mask_excludes_covid_and_events(events):
+    index = pd.date_range("2020-01-01", "2022-12-01", freq="MS")
+    keep = training_mask(index, events)
+    assert keep[index.get_loc(pd.Timestamp("2020-02-01"))]
+    assert not keep[index.get_loc(pd.Timestamp("2020-04-01"))]
+    assert not keep[index.get_loc(pd.Timestamp("2022-04-01"))]
+
+
+def test_fit_baselines_matches_per_series_least_squares(store_df, events):
+    wide = series_matrix(store_df)
+    baselines = fit_baselines(wide, events)
+
+    X = design_matrix(wide.index)
+    train = training_mask(wide.index, events)
+    for column in wide.columns:
+        y = wide[column].to_numpy()
+        rows = train & ~np.isnan(y)
+        beta, *_ = np.linalg.lstsq(X[rows], y[rows], rcond=None)
+        np.testing.assert_allclose(baselines[column].to_numpy(), X @ beta, rtol=1e-6)
+
+
+def test_event_residuals_recover_event_effect(store_df, events):
+    wide = series_matrix(store_df, regions=["Las Vegas"])
+    residuals = event_residuals(wide, fit_baselines(wide, events), events)
+
+    assert set(residuals["Region"]) == {"Las Vegas"}
+    assert residuals["ResidualPct"].to_numpy() == pytest.approx([50.0, 50.0], rel=1e-6)
+
+
+def test_fit_baselines_cached_reuses_results(tmp_path, store_df, events, monkeypatch):
+    wide = series_matrix(store_df)
+    first = fit_baselines_cached(wide, events, cache_dir=tmp_path)
+    assert len(list(tmp_path.glob("*.parquet"))) == 1
+
+    monkeypatch.setattr("baseline_model.fit_baselines", None)  # would fail if called
+    second = fit_baselines_cached(wide, events, cache_dir=tmp_path)
+    pd.testing.assert_frame_equal(first, second, check_freq=False)
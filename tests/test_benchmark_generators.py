@@ -0,0 +1,33 @@
+import re
+
+from benchmarks.generators import make_comments, write_db1b_dir, write_lvcva_workbook
+from config import DEMEAN_TERMS
+from flights_parser import get_flight_raw_data
+from preprocess_data import process_single_file
+from reddit_scraper import match_terms
+
+
+def test_db1b_generator_matches_parser(tmp_path):
+    n_las = write_db1b_dir(tmp_path, ["20221", "202206"], n_lines=200, las_ratio=0.25)
+
+    rows = get_flight_raw_data(tmp_path)
+    assert n_las == 100
+    assert len(rows) == n_las
+    assert {row[13] for row in rows} == {"LAS"}
+
+
+def test_lvcva_workbook_generator_matches_preprocess(tmp_path):
+    path = write_lvcva_workbook(tmp_path / "lvcva_2022.xlsx", 2022, n_metrics=5, regions=("Las Vegas", "Laughlin"))
+
+    long_df = process_single_file(path, 2022, regions=["Las Vegas", "Laughlin"])
+    assert len(long_df) == 2 * 5 * 12
+    assert set(long_df["Region"]) == {"Las Vegas", "Laughlin"}
+
+
+def test_comment_generator_is_deterministic():
+    comments = make_comments(500, match_ratio=0.2, seed=1)
+    assert comments == make_comments(500, match_ratio=0.2, seed=1)
+
+    insult = re.compile("|".join(DEMEAN_TERMS), re.IGNORECASE)
+    matched = sum(bool(match_terms(c, re.compile(r"\w+"), insult)) for c in comments)
+    assert 50 < matched < 150
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analyze_processed_data import build_monthly_pivot
+from event_impact import (
+    compute_event_impacts,
+    impact_significance,
+    load_events,
+    pivot_to_cube,
+)
+
+
+@pytest.fixture
+def pivot():
+    dates = pd.date_range("2019-01-01", "2023-12-01", freq="MS")
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {
+            "Visitors": rng.uniform(100, 200, len(dates)),
+            "Revenue": rng.uniform(1000, 2000, len(dates)),
+        },
+        index=dates,
+    )
+    df.loc["2021-06-01", "Revenue"] = np.nan
+    return df, build_monthly_pivot(df, ["Visitors", "Revenue"])
+
+
+def test_pivot_to_cube_layout(pivot):
+    df, pv = pivot
+    cube, months, years, metrics = pivot_to_cube(pv)
+
+    assert cube.shape == (12, 5, 2)
+    assert cube[months.get_loc(4), years.get_loc(2022), metrics.get_loc("Visitors")] == df.loc["2022-04-01", "Visitors"]
+
+
+def test_compute_event_impacts_matches_scalar_computation(pivot):
+    df, pv = pivot
+    events = pd.DataFrame(
+        {"Event": ["BTS", "Gaga", "Missing"], "Year": [2022, 2021, 2030], "Month": [4, 6, 1]}
+    )
+
+    impacts = compute_event_impacts(pv, events).set_index(["Event", "Metric"])
+
+    assert set(impacts.index.get_level_values("Event")) == {"BTS", "Gaga"}
+    for (event, metric), row in impacts.iterrows():
+        year, month = {"BTS": (2022, 4), "Gaga": (2021, 6)}[event]
+        same_month = df[df.index.month == month][metric]
+        others = same_month[same_month.index.year != year]
+        expected = (same_month[str(year)].iloc[0] - others.mean()) / others.mean() * 100
+        assert row["ImpactPct"] == pytest.approx(expected)
+        assert row["BaselineYears"] == others.notna().sum()
+    # Revenue for Jun/2021 is missing, so that pair is omitted
+    assert ("Gaga", "Revenue") not in impacts.index
+
+
+def test_compute_event_impacts_can_exclude_other_events(pivot):
+    df, pv = pivot
+    events = pd.DataFrame({"Event": ["A", "B"], "Year": [2022, 2023], "Month": [4, 4]})
+
+    impacts = compute_event_impacts(pv, events, exclude_other_events=True)
+
+    row = impacts[(impacts["Event"] == "A") & (impacts["Metric"] == "Visitors")].iloc[0]
+    assert row["BaselineYears"] == 3
+    aprils = df[(df.index.month == 4) & (df.index.year < 2022)]["Visitors"]
+    assert row["Baseline"] == pytest.approx(aprils.mean())
+
+
+def test_impact_significance_flags_extreme_event(pivot):
+    df, _ = pivot
+    df = df.copy()
+    df.loc["2022-04-01", "Visitors"] = 10_000  # far above every other April
+    pv = build_monthly_pivot(df, ["Visitors", "Revenue"])
+    events = pd.DataFrame({"Event": ["BTS"], "Year": [2022], "Month": [4]})
+
+    stats = impact_significance(pv, events, n_resamples=4000, seed=1).set_index("Metric")
+
+    visitors = stats.loc["Visitors"]
+    assert visitors["CILow"] <= visitors["ImpactPct"] <= visitors["CIHigh"]
+    # 4 baseline years + the event: the event is the most extreme of 5 months
+    assert visitors["PValue"] == pytest.approx(1 / 5, abs=0.03)
+    assert stats.loc["Revenue", "PValue"] > visitors["PValue"]
+
+
+def test_impact_significance_is_independent_of_jobs_and_blocks(pivot):
+    _, pv = pivot
+    events = pd.DataFrame(
+        {"Event": [f"E{m}" for m in range(1, 13)], "Year": [2022] * 12, "Month": range(1, 13)}
+    )
+
+    serial = impact_significance(pv, events, n_resamples=200, max_block_elements=2_000)
+    parallel = impact_significance(pv, events, n_resamples=200, max_block_elements=2_000, jobs=2)
+
+    pd.testing.assert_frame_equal(serial, parallel)
+    assert len(serial) == 24
+    assert serial["PValue"].between(0, 1).all()
+
+
+def test_load_events_validates_columns(tmp_path):
+    path = tmp_path / "events.csv"
+    path.write_text("Event,Year\nBTS,2022\n")
+    with pytest.raises(ValueError):
+        load_events(path)
+
+    path.write_text("Event,Year,Month,Notes\nBTS,2022,4,x\n")
+    assert load_events(path).to_dict("records") == [{"Event": "BTS", "Year": 2022, "Month": 4}]
@@ -0,0 +1,62 @@
+import pytest
+
+from flights_cube import cube_to_frame, load_cube, rollup, save_cube
+from flights_parser import process_file
+
+
+@pytest.fixture
+def raw_file(tmp_path):
+    def line(ticket, origin, fare_class, carrier, distance, fare):
+        itinerary = [ticket, "XX", "20222", "1", "1", origin, "", "91", "0", fare_class]
+        segment = [carrier, "1", carrier, "", "", distance, "LAS", "", "", "", fare]
+        # Um campo extra garante as 21 colunas mínimas exigidas pelo parser
+        return "|".join(itinerary + segment + [""])
+
+    lines = [
+        line("T1", "JFK", "Y", "B6", "2000", "300"),
+        line("T2", "JFK", "Y", "B6", "2000", "500"),
+        line("T3", "JFK", "F", "B6", "2000", "900"),
+        line("T4", "LAX", "Y", "WN", "200", "100"),
+        line("T5", "LAX", "Y", "WN", "200", "n/a"),
+    ]
+    path = tmp_path / "db1b.public.20222.asc"
+    path.write_text("\n".join(lines) + "\n")
+    return path
+
+
+def test_process_file_accumulates_cube_in_same_scan(raw_file):
+    cube = {}
+    rows = process_file(raw_file, cube=cube)
+
+    assert len(rows) == 5
+    assert cube[("JFK", "B6", "20222", "Y")] == [2, 800.0, 2, 4000.0, 2]
+    # Tarifa inválida: conta a chegada, mas fica fora das somas e médias de
+    # tarifa; a distância da mesma linha continua valendo
+    assert cube[("LAX", "WN", "20222", "Y")] == [2, 100.0, 1, 400.0, 2]
+
+
+def test_cube_round_trip_and_rollup(raw_file, tmp_path):
+    cube = {}
+    process_file(raw_file, cube=cube)
+    path = save_cube(cube_to_frame(cube), tmp_path / "cube.parquet")
+
+    by_origin = rollup(load_cube(path), by=["Origin"])
+    assert by_origin.loc["JFK", "Arrivals"] == 3
+    assert by_origin.loc["JFK", "AvgFare"] == pytest.approx(1700 / 3)
+    assert by_origin.loc["LAX", "AvgFare"] == pytest.approx(100.0)
+
+    total = rollup(load_cube(path))
+    assert total["Arrivals"].iloc[0] == 5
+
+
+def test_load_cube_filters(raw_file, tmp_path):
+    cube = {}
+    process_file(raw_file, cube=cube)
+    path = save_cube(cube_to_frame(cube), tmp_path / "cube.parquet")
+
+    subset = load_cube(path, Origin=["JFK"], FareClass=["Y"])
+    assert subset.index.get_level_values("Origin").unique().tolist() == ["JFK"]
+    assert subset["Arrivals"].sum() == 2
+
+    with pytest.raises(ValueError, match="Dimensões desconhecidas"):
+        load_cube(path, Airport=["JFK"])
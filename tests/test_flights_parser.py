@@ -44,3 +44,224 @@ def test_get_flight_raw_data(mock_raw_flight_files, monkeypatch):
 
     # Ensure the header is not included in the raw data
     assert raw_data[0] != HEADER
+
+
+def test_write_flight_csv_streams_same_output_as_dataframe(tmp_path):
+    import pandas as pd
+    from benchmarks.generators import write_db1b_dir
+    from flights_parser import write_flight_csv
+
+    raw_dir = tmp_path / "raw"
+    write_db1b_dir(raw_dir, ["20221", "20222"], n_lines=300, las_ratio=0.2)
+    expected = tmp_path / "expected.csv"
+    pd.DataFrame(get_flight_raw_data(raw_dir), columns=HEADER).to_csv(expected, index=False, sep=";")
+
+    cube = {}
+    streamed = tmp_path / "streamed.csv"
+    assert write_flight_csv(streamed, raw_dir, cube=cube) == 120
+    assert streamed.read_text() == expected.read_text()
+    assert sum(cell[0] for cell in cube.values()) == 120
+
+
+def test_convert_numeric_keeps_valid_values_and_counts_errors():
+    from flights_parser import convert_numeric
+
+    assert convert_numeric(["1.5", "200", "3e2"]) == ([1.5, 200.0, 300.0], 0)
+    # Vazio é ausente (não é erro); texto inválido é erro
+    assert convert_numeric(["1.5", "", "n/a", "7"]) == ([1.5, None, None, 7.0], 1)
+    assert convert_numeric([]) == ([], 0)
+
+
+def test_invalid_field_only_nulls_itself(tmp_path):
+    lines = [
+        "T1|XX|20222|1|1|JFK||91|0|Y|B6|1|B6|||bad|LAS||||300|",
+        "T2|XX|20222|1|1|JFK||91|0|Y|B6|1|B6|||2000|LAS||||oops|",
+        "T3|XX|20222|1|1|JFK||91|0|Y|B6|1|B6|||2000|LAS|||||",
+    ]
+    path = tmp_path / "db1b.public.20222.asc"
+    path.write_text("\n".join(lines) + "\n")
+
+    errors = {}
+    rows = process_file(path, errors=errors)
+    assert [(r[12], r[14]) for r in rows] == [(None, 300.0), (2000.0, None), (2000.0, None)]
+    assert errors == {"Distance": 1, "FareAmount": 1}
+
+
+def test_write_flight_partitions_one_file_per_quarter(tmp_path):
+    import os
+
+    from benchmarks.generators import write_db1b_dir
+    from flights_parser import write_flight_csv, write_flight_partitions
+
+    raw_dir = tmp_path / "raw"
+    write_db1b_dir(raw_dir, ["20221", "20222", "20223"], n_lines=200, las_ratio=0.1)
+    out_dir = tmp_path / "flights"
+
+    cube = {}
+    written = write_flight_partitions(out_dir, raw_dir, cube=cube, jobs=2)
+    assert sorted(p.name for p in written) == ["flights_20221.csv", "flights_20222.csv", "flights_20223.csv"]
+    assert sorted(p.name for p in out_dir.glob("flights_*")) == sorted(p.name for p in written)
+    assert sum(written.values()) == 60
+    assert sum(cell[0] for cell in cube.values()) == 60
+
+    single = tmp_path / "single.csv"
+    write_flight_csv(single, files=[raw_dir / "db1b.public.20222.asc"])
+    assert (out_dir / "flights_20222.csv").read_text() == single.read_text()
+
+    # Só o trimestre cujo arquivo mudou é reescrito
+    earlier = (raw_dir / "db1b.public.20223.asc").stat().st_mtime - 10
+    os.utime(out_dir / "flights_20223.csv", (earlier, earlier))
+    assert [p.name for p in write_flight_partitions(out_dir, raw_dir)] == ["flights_20223.csv"]
+    assert write_flight_partitions(out_dir, raw_dir) == {}
+
+    # Partições truncadas por max_lines ou deduplicadas não valem para uma execução completa
+    assert sorted(write_flight_partitions(out_dir, raw_dir, max_lines=5)) == sorted(written)
+    assert write_flight_partitions(out_dir, raw_dir, max_lines=5) == {}
+    assert sum(write_flight_partitions(out_dir, raw_dir).values()) == 60
+    write_flight_partitions(out_dir, raw_dir, dedup=True)
+    assert sum(write_flight_partitions(out_dir, raw_dir).values()) == 60
+
+
+def test_write_flight_partitions_keeps_good_quarters_on_failure(tmp_path, monkeypatch):
+    import flights_parser
+    from benchmarks.generators import write_db1b_dir
+    from flights_parser import write_flight_partitions
+
+    raw_dir = tmp_path / "raw"
+    write_db1b_dir(raw_dir, ["20221", "20222"], n_lines=100, las_ratio=0.1)
+    original = flights_parser.iter_las_rows
+
+    def flaky(file_path, *args, **kwargs):
+        if "20222" in str(file_path):
+            raise OSError("disco cheio")
+        return original(file_path, *args, **kwargs)
+
+    monkeypatch.setattr(flights_parser, "iter_las_rows", flaky)
+    out_dir = tmp_path / "flights"
+    with pytest.raises(RuntimeError, match="db1b.public.20222.asc"):
+        write_flight_partitions(out_dir, raw_dir, jobs=1)
+    # Nenhum arquivo parcial fica para trás
+    assert sorted(p.name for p in out_dir.iterdir()) == [".flights_20221.csv.params", "flights_20221.csv"]
+
+
+def test_select_files_prunes_by_file_name_quarter(tmp_path, monkeypatch):
+    from benchmarks.generators import write_db1b_dir
+    from flights_parser import select_files
+
+    write_db1b_dir(tmp_path, ["20214", "20221", "202206", "20224", "20231"], n_lines=20)
+    opened = []
+    real_open = open
+
+    def tracking_open(file, *args, **kwargs):
+        opened.append(Path(file).name)
+        return real_open(file, *args, **kwargs)
+
+    monkeypatch.setattr("builtins.open", tracking_open)
+    selected = select_files(tmp_path, quarter_from="20221", quarter_to="202212")
+
+    names = ["db1b.public.202206.asc", "db1b.public.20221.asc", "db1b.public.20224.asc"]
+    assert [f.name for f in selected] == names
+    # Só os arquivos da janela são abertos (para a amostra)
+    assert opened == names
+    assert [f.name for f in select_files(tmp_path, quarter_to="20214")] == ["db1b.public.20214.asc"]
+
+
+def test_select_files_skips_files_failing_the_sample(tmp_path, capsys):
+    from benchmarks.generators import write_db1b_file
+    from flights_parser import select_files, validate_sample
+
+    good = tmp_path / "db1b.public.20222.asc"
+    write_db1b_file(good, n_lines=20)
+    wrong_year = tmp_path / "db1b.public.20232.asc"
+    wrong_year.write_text(good.read_text())
+    (tmp_path / "db1b.public.20242.asc").write_text("not|a|db1b|file\n" * 5)
+
+    assert validate_sample(good) is None
+    # O ano é filtrado linha a linha: um arquivo misto não é descartado pelo início
+    assert validate_sample(wrong_year) is None
+    assert [f.name for f in select_files(tmp_path)] == ["db1b.public.20222.asc", "db1b.public.20232.asc"]
+    assert "no DB1B records" in capsys.readouterr().out
+
+
+def test_lines_scanned_counter_respects_max_lines(tmp_path, monkeypatch):
+    import instrumentation
+    from benchmarks.generators import write_db1b_file
+
+    path = tmp_path / "db1b.public.20222.asc"
+    write_db1b_file(path, n_lines=20)
+    counters = []
+    monkeypatch.setattr(
+        instrumentation, "count", lambda name, n=1: counters.append(n) if name == "flights.lines_scanned" else None
+    )
+    process_file(path, max_lines=5)
+    process_file(path)
+    assert counters == [5, 20]
+
+
+def test_ticket_index_reports_only_unseen_ids():
+    from flights_parser import TicketIndex
+
+    index = TicketIndex()
+    assert index.add_new(["A", "B", "A", "C"]).tolist() == [True, True, False, True]
+    for start in range(0, 1000, 100):
+        index.add_new([f"T{i}" for i in range(start, start + 100)])
+    assert len(index) == 1003
+    assert index.nbytes == 8 * 1003
+    assert index.add_new(["T5", "T999", "C", "D", "D"]).tolist() == [False, False, False, True, False]
+
+    staged = index.staged()
+    assert staged.add_new(["A", "E"]).tolist() == [False, True]
+    assert index.add_new(["F"]).tolist() == [True]
+    staged.commit()
+    assert len(index) == 1006
+    assert index.add_new(["E"]).tolist() == [False]
+
+
+def test_dedup_drops_tickets_repeated_across_quarters(tmp_path):
+    from flights_parser import write_flight_partitions
+
+    def line(ticket, quarter):
+        fields = [ticket, "XX", quarter, "1", "1", "JFK", "", "91", "0", "Y"]
+        return "|".join(fields + ["B6", "1", "B6", "", "", "2000", "LAS", "", "", "", "300", ""])
+
+    raw_dir = tmp_path / "raw"
+    raw_dir.mkdir()
+    (raw_dir / "db1b.public.20221.asc").write_text("\n".join(line(t, "20221") for t in ["T1", "T2", "T2"]))
+    # Arquivo reprocessado que se sobrepõe ao anterior
+    (raw_dir / "db1b.public.20222.asc").write_text("\n".join(line(t, "20222") for t in ["T2", "T3"]))
+
+    segments = tmp_path / "segments"
+    assert sum(write_flight_partitions(tmp_path / "all", raw_dir).values()) == 5
+    written = write_flight_partitions(tmp_path / "dedup", raw_dir, segments_dir=segments, dedup=True, jobs=4)
+    assert {p.name: n for p, n in written.items()} == {"flights_20221.csv": 2, "flights_20222.csv": 1}
+
+    from flights_segments import load_segments
+
+    assert sorted(load_segments(segments)["TicketID"]) == ["T1", "T2", "T3"]
+
+
+def test_dedup_forgets_tickets_of_a_failed_quarter(tmp_path, monkeypatch):
+    import flights_parser
+    from flights_parser import write_flight_partitions
+
+    def line(ticket, quarter):
+        fields = [ticket, "XX", quarter, "1", "1", "JFK", "", "91", "0", "Y"]
+        return "|".join(fields + ["B6", "1", "B6", "", "", "2000", "LAS", "", "", "", "300", ""])
+
+    raw_dir = tmp_path / "raw"
+    raw_dir.mkdir()
+    (raw_dir / "db1b.public.20221.asc").write_text("\n".join(line(t, "20221") for t in ["T1", "T2"]))
+    (raw_dir / "db1b.public.20222.asc").write_text("\n".join(line(t, "20222") for t in ["T2", "T3"]))
+    original = flights_parser.iter_las_rows
+
+    def fails_after_parsing(file_path, *args, **kwargs):
+        # Os tickets do trimestre já passaram pelo índice quando a falha acontece
+        yield from original(file_path, *args, **kwargs)
+        if "20221" in str(file_path):
+            raise OSError("disco cheio")
+
+    monkeypatch.setattr(flights_parser, "iter_las_rows", fails_after_parsing)
+    out_dir = tmp_path / "flights"
+    with pytest.raises(RuntimeError, match="db1b.public.20221.asc"):
+        write_flight_partitions(out_dir, raw_dir, dedup=True)
+    assert (out_dir / "flights_20222.csv").read_text().count("\n") == 3
@@ -0,0 +1,143 @@
+import sys
+
+import pandas as pd
+import pytest
+
+from flights_parser import HEADER
+from flights_query import aggregate_flights, main
+
+
+@pytest.fixture
+def flights_csv(tmp_path):
+    def row(yq, origin, carrier, distance, fare):
+        values = dict.fromkeys(HEADER, "x")
+        values.update(
+            YearQuarter=yq,
+            Origin=origin,
+            MarketingCarrier=carrier,
+            Distance=distance,
+            FareAmount=fare,
+        )
+        return [values[column] for column in HEADER]
+
+    rows = [
+        row("202203", "JFK", "B6", 2000.0, 300.0),
+        row("202203", "LAX", "WN", 200.0, 100.0),
+        row("202203", "JFK", "DL", 2000.0, None),
+        row("202206", "SFO", "WN", 400.0, 200.0),
+        row("20222", "JFK", "B6", 2000.0, 400.0),
+        row("20231", "LAX", "WN", 200.0, 120.0),
+    ]
+    path = tmp_path / "flights_data.csv"
+    pd.DataFrame(rows, columns=HEADER).to_csv(path, index=False, sep=";")
+    return path
+
+
+@pytest.fixture
+def flights_partitions(flights_csv, tmp_path):
+    """Os mesmos voos divididos em partições, como grava o `fetch-flights`."""
+    df = pd.read_csv(flights_csv, sep=";", dtype=str)
+    folder = tmp_path / "flights_data"
+    folder.mkdir()
+    for code, part in df.groupby("YearQuarter"):
+        part.to_csv(folder / f"flights_{code}.csv", index=False, sep=";")
+    (folder / ".flights_20301.csv.tmp").write_text("lixo de uma escrita interrompida")
+    return folder
+
+def _backend(name):
+    if name != "pandas":
+        pytest.importorskip(name)
+    return name
+
+
+@pytest.mark.parametrize("backend", ["pandas", "duckdb", "polars"])
+def test_fare_by_origin_quarter(flights_csv, backend):
+    result = aggregate_flights(["Origin", "Quarter"], path=flights_csv, backend=_backend(backend))
+
+    assert list(result.columns) == ["Origin", "Quarter", "Arrivals", "AvgFare", "AvgDistance"]
+    jfk = result.set_index(["Origin", "Quarter"]).loc[("JFK", "2022Q1")]
+    assert jfk["Arrivals"] == 2
+    assert jfk["AvgFare"] == pytest.approx(300.0)
+    # 202206 e 20222 são o mesmo trimestre
+    assert result.set_index(["Origin", "Quarter"]).loc[("JFK", "2022Q2"), "Arrivals"] == 1
+    assert set(result["Quarter"]) == {"2022Q1", "2022Q2", "2023Q1"}
+
+
+@pytest.mark.parametrize("backend", ["duckdb", "polars"])
+def test_backends_match_pandas(flights_csv, backend):
+    expected = aggregate_flights(["MarketingCarrier", "Quarter"], path=flights_csv, backend="pandas")
+    result = aggregate_flights(
+        ["MarketingCarrier", "Quarter"], path=flights_csv, backend=_backend(backend)
+    )
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+@pytest.mark.parametrize("backend", ["pandas", "duckdb", "polars"])
+def test_quarter_filters_accept_both_code_formats(flights_csv, backend):
+    result = aggregate_flights(
+        ["Quarter"],
+        path=flights_csv,
+        backend=_backend(backend),
+        quarter_from="202204",
+        quarter_to="20224",
+    )
+    assert result["Quarter"].tolist() == ["2022Q2"]
+    assert result["Arrivals"].tolist() == [2]
+
+
+@pytest.mark.parametrize("backend", ["pandas", "duckdb", "polars"])
+def test_missing_keys_form_their_own_group(flights_csv, backend):
+    df = pd.read_csv(flights_csv, sep=";", dtype=str)
+    df.loc[len(df)] = df.iloc[0]
+    df.loc[len(df) - 1, ["YearQuarter", "Origin"]] = None
+    df.to_csv(flights_csv, index=False, sep=";")
+
+    result = aggregate_flights(["Origin", "Quarter"], path=flights_csv, backend=_backend(backend))
+    assert result["Arrivals"].sum() == 7
+    last = result.iloc[-1]
+    assert pd.isna(last["Origin"]) and pd.isna(last["Quarter"]) and last["Arrivals"] == 1
+    if backend != "pandas":
+        expected = aggregate_flights(["Origin", "Quarter"], path=flights_csv, backend="pandas")
+        pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_default_backend_falls_back_when_optional_ones_are_missing(flights_csv, monkeypatch):
+    from flights_query import default_backend
+
+    monkeypatch.setitem(sys.modules, "duckdb", None)
+    monkeypatch.setitem(sys.modules, "polars", None)
+    assert default_backend() == "pandas"
+    result = aggregate_flights(["Origin"], path=flights_csv)
+    assert result.set_index("Origin")["Arrivals"].to_dict() == {"JFK": 3, "LAX": 2, "SFO": 1}
+
+
+def test_threads_warns_outside_duckdb(flights_csv, capsys):
+    aggregate_flights(["Origin"], path=flights_csv, backend="pandas", threads=2)
+    assert "threads" in capsys.readouterr().out
+
+
+def test_unknown_group_column_raises(flights_csv):
+    with pytest.raises(ValueError, match="desconhecidas"):
+        aggregate_flights(["Nope"], path=flights_csv, backend="pandas")
+
+
+def test_missing_backend_raises_runtime_error(flights_csv, monkeypatch):
+    # Um módulo None em sys.modules faz o import falhar com ImportError
+    monkeypatch.setitem(sys.modules, "duckdb", None)
+    with pytest.raises(RuntimeError, match="pip install duckdb"):
+        aggregate_flights(["Origin"], path=flights_csv, backend="duckdb")
+
+
+def test_main_saves_output(flights_csv, tmp_path):
+    output = tmp_path / "result.csv"
+    main(query="origin-mix", backend="pandas", output=output, flights_file=flights_csv)
+
+    saved = pd.read_csv(output, sep=";")
+    assert saved.set_index("Origin")["Arrivals"].to_dict() == {"JFK": 3, "LAX": 2, "SFO": 1}
+
+
+@pytest.mark.parametrize("backend", ["pandas", "duckdb", "polars"])
+def test_reads_partition_directory(flights_csv, flights_partitions, backend):
+    expected = aggregate_flights(["Origin", "Quarter"], path=flights_csv, backend="pandas")
+    result = aggregate_flights(["Origin", "Quarter"], path=flights_partitions, backend=_backend(backend))
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
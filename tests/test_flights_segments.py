@@ -0,0 +1,88 @@
+import pytest
+
+from flights_parser import SEGMENT_COLUMNS, process_file, write_flight_csv
+from flights_segments import SegmentWriter, las_feeders, load_segments
+
+
+def _line(ticket, origin, legs):
+    """Itinerário com ``legs`` = [(carrier, distance, arrival, fare), ...]."""
+    fields = [ticket, "XX", "20222", str(len(legs)), "1", origin, "", "91", "0", "Y"]
+    for i, (carrier, distance, arrival, fare) in enumerate(legs, start=1):
+        fields += [carrier, str(i), carrier, "", "", distance, arrival, "", "", "", fare]
+    return "|".join(fields + [""])
+
+
+@pytest.fixture
+def raw_dir(tmp_path):
+    lines = [
+        _line("T1", "JFK", [("AA", "700", "ORD", "150"), ("AA", "1500", "LAS", "250")]),
+        _line("T2", "BOS", [("DL", "950", "ATL", "120"), ("DL", "1000", "DEN", "90"), ("UA", "600", "LAS", "n/a")]),
+        _line("T3", "SEA", [("AS", "870", "LAS", "200")]),
+        _line("T4", "MIA", [("AA", "1200", "ORD", "180"), ("AA", "1500", "LAS", "220")]),
+        # Não termina em LAS: nenhum segmento é emitido
+        _line("T5", "LAS", [("WN", "250", "LAX", "80")]),
+    ]
+    folder = tmp_path / "raw"
+    folder.mkdir()
+    (folder / "db1b.public.20222.asc").write_text("\n".join(lines) + "\n")
+    return folder
+
+
+def test_process_file_emits_every_segment_in_same_scan(raw_dir):
+    segments = []
+    rows = process_file(raw_dir / "db1b.public.20222.asc", segments=segments)
+
+    assert len(rows) == 4
+    assert len(segments) == 8
+    assert all(len(s) == len(SEGMENT_COLUMNS) for s in segments)
+    t2 = [s for s in segments if s[0] == "T2"]
+    assert [(s[2], s[3], s[4]) for s in t2] == [(1, "BOS", "ATL"), (2, "ATL", "DEN"), (3, "DEN", "LAS")]
+    assert t2[0][5:] == ("DL", "DL", 950.0, 120.0)
+    assert t2[2][8] is None
+
+
+def test_segments_parquet_round_trip_in_batches(raw_dir, tmp_path, monkeypatch):
+    import flights_parser
+
+    monkeypatch.setattr(flights_parser, "SEGMENT_BATCH_ROWS", 3)
+    monkeypatch.setattr(flights_parser, "PARSE_BATCH_ROWS", 1)
+    path = tmp_path / "segments.parquet"
+    with SegmentWriter(path) as writer:
+        n_rows = write_flight_csv(tmp_path / "flights.csv", raw_dir, segment_sink=writer.write)
+
+    assert n_rows == 4
+    assert writer.rows_written == 8
+
+    import pyarrow.parquet as pq
+
+    assert pq.ParquetFile(path).num_row_groups > 1
+    segments = load_segments(path)
+    assert segments.columns.tolist() == SEGMENT_COLUMNS
+    assert segments["SegmentNum"].tolist() == [1, 2, 1, 2, 3, 1, 1, 2]
+
+    only_aa = load_segments(path, MarketingCarrier=["AA"])
+    assert set(only_aa["TicketID"]) == {"T1", "T4"}
+    with pytest.raises(ValueError, match="Colunas desconhecidas"):
+        load_segments(path, Hub=["ORD"])
+
+
+def test_las_feeders_counts_connecting_hubs(raw_dir, tmp_path):
+    path = tmp_path / "segments.parquet"
+    with SegmentWriter(path) as writer:
+        write_flight_csv(tmp_path / "flights.csv", raw_dir, segment_sink=writer.write)
+
+    feeders = las_feeders(load_segments(path))
+    assert feeders.index.tolist() == ["ORD", "DEN"]
+    assert feeders.loc["ORD", "Itineraries"] == 2
+    assert feeders.loc["ORD", "Share"] == pytest.approx(2 / 3)
+    assert feeders.loc["ORD", "AvgFare"] == pytest.approx(235.0)
+
+
+def test_partitioned_segments_are_read_as_one_table(raw_dir, tmp_path):
+    from flights_parser import write_flight_partitions
+
+    segments_dir = tmp_path / "segments"
+    write_flight_partitions(tmp_path / "flights", raw_dir, segments_dir=segments_dir)
+
+    assert [p.name for p in segments_dir.iterdir()] == ["segments_20222.parquet"]
+    assert len(load_segments(segments_dir)) == 8
@@ -0,0 +1,97 @@
+import json
+import os
+
+import pytest
+
+import instrumentation
+import utils
+
+
+@pytest.fixture
+def metrics_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv(instrumentation.ENV_VAR, "0")
+    yield tmp_path
+    instrumentation.disable()
+
+
+def _records(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_disabled_is_a_no_op(metrics_dir):
+    assert not instrumentation.enabled()
+    assert instrumentation.span("x") is instrumentation.span("y")
+    instrumentation.count("lines", 10)
+
+    with instrumentation.span("x"):
+        pass
+    assert list(metrics_dir.iterdir()) == []
+
+
+def test_spans_and_counters_are_written_as_json_lines(metrics_dir):
+    path = instrumentation.enable(metrics_dir)
+
+    with instrumentation.span("outer", file="a.asc"):
+        with instrumentation.span("inner"):
+            instrumentation.count("flights.lines_scanned", 5)
+        instrumentation.count("flights.lines_scanned", 2)
+        instrumentation.count("http.calls")
+    instrumentation.disable()
+
+    inner, outer, counters = _records(path)
+    assert inner["name"] == "inner" and inner["parent"] == "outer"
+    assert outer["attrs"] == {"file": "a.asc"} and outer["parent"] is None
+    assert outer["duration_s"] >= inner["duration_s"] >= 0
+    assert counters["type"] == "counters"
+    assert counters["values"] == {"flights.lines_scanned": 7, "http.calls": 1}
+
+
+def test_disable_restores_environment(metrics_dir, monkeypatch):
+    instrumentation.enable(metrics_dir)
+    assert os.environ[instrumentation.ENV_VAR] == "1"
+    instrumentation.disable()
+    assert os.environ[instrumentation.ENV_VAR] == "0"
+
+    monkeypatch.delenv(instrumentation.ENV_VAR)
+    instrumentation.enable(metrics_dir)
+    instrumentation.disable()
+    assert instrumentation.ENV_VAR not in os.environ
+
+
+def test_span_records_errors(metrics_dir):
+    path = instrumentation.enable(metrics_dir)
+    with pytest.raises(KeyError):
+        with instrumentation.span("failing"):
+            raise KeyError("x")
+    instrumentation.disable()
+
+    assert _records(path)[0]["error"] == "KeyError"
+
+
+def test_time_function_emits_span_only_when_enabled(metrics_dir):
+    @utils.time_function
+    def work(x):
+        return x * 2
+
+    assert work(2) == 4
+    path = instrumentation.enable(metrics_dir)
+    assert work(3) == 6
+    instrumentation.disable()
+
+    spans = [r for r in _records(path) if r["type"] == "span"]
+    assert [s["name"] for s in spans] == ["work"]
+
+
+def test_profile_function_only_profiles_when_enabled(metrics_dir, monkeypatch):
+    monkeypatch.setattr(utils, "PERF_REPORTS", metrics_dir / "reports")
+
+    @utils.profile_function
+    def work():
+        return 1
+
+    assert work() == 1
+    assert not (metrics_dir / "reports").exists()
+
+    instrumentation.enable(metrics_dir)
+    assert work() == 1
+    assert (metrics_dir / "reports" / "work_profile.txt").exists()
@@ -0,0 +1,76 @@
+import pandas as pd
+import pytest
+
+from flights_parser import HEADER
+from join_datasets import aggregate_flights, join_flights_tourism, quarter_period
+
+
+@pytest.fixture
+def flights_csv(tmp_path):
+    def row(ticket, yq, origin, distance, fare):
+        values = dict.fromkeys(HEADER, "x")
+        values.update(
+            TicketID=ticket, YearQuarter=yq, Origin=origin, Distance=distance, FareAmount=fare
+        )
+        return [values[column] for column in HEADER]
+
+    rows = [
+        row("T1", "202203", "JFK", 2000.0, 300.0),
+        row("T2", "202203", "LAX", 200.0, 100.0),
+        row("T3", "202203", "JFK", 2000.0, None),
+        row("T4", "202206", "SFO", 400.0, 200.0),
+        row("T5", "20222", "JFK", 2000.0, 400.0),
+    ]
+    path = tmp_path / "flights_data.csv"
+    pd.DataFrame(rows, columns=HEADER).to_csv(path, index=False, sep=";")
+    return path
+
+
+@pytest.fixture
+def flights_partitions(flights_csv, tmp_path):
+    """Os mesmos voos divididos em partições, como grava o `fetch-flights`."""
+    df = pd.read_csv(flights_csv, sep=";", dtype=str)
+    folder = tmp_path / "flights_data"
+    folder.mkdir()
+    for code, part in df.groupby("YearQuarter"):
+        part.to_csv(folder / f"flights_{code}.csv", index=False, sep=";")
+    (folder / ".flights_20301.csv.tmp").write_text("lixo de uma escrita interrompida")
+    return folder
+
+def test_quarter_period_accepts_both_code_formats():
+    assert quarter_period("202206") == pd.Period("2022Q2")
+    assert quarter_period("20223") == pd.Period("2022Q3")
+    with pytest.raises(ValueError):
+        quarter_period("2022Q1")
+
+
+def test_aggregate_flights_streams_chunks(flights_csv):
+    flights = aggregate_flights(flights_csv, chunksize=2, top_origins=1)
+
+    assert list(flights.index) == [pd.Period("2022Q1"), pd.Period("2022Q2")]
+    q1, q2 = flights.loc[pd.Period("2022Q1")], flights.loc[pd.Period("2022Q2")]
+    assert q1["LASArrivals"] == 3
+    assert q1["AvgFare"] == pytest.approx(200.0)  # missing fare is ignored
+    assert q2["LASArrivals"] == 2  # '202206' and '20222' are the same quarter
+    assert q2["AvgDistance"] == pytest.approx(1200.0)
+    assert q1["OriginShare_JFK"] == pytest.approx(2 / 3)
+    assert q1["OriginShare_Other"] == pytest.approx(1 / 3)
+
+
+def test_join_flights_tourism_uses_month_quarter(flights_csv):
+    tourism = pd.DataFrame(
+        {"Visitors": [1.0, 2.0, 3.0]},
+        index=pd.DatetimeIndex(["2022-03-01", "2022-04-01", "2022-07-01"], name="Date"),
+    )
+    joined = join_flights_tourism(tourism, aggregate_flights(flights_csv))
+
+    assert list(joined["Quarter"]) == ["2022Q1", "2022Q2", "2022Q3"]
+    assert list(joined["LASArrivals"].iloc[:2]) == [3, 2]
+    assert pd.isna(joined["LASArrivals"].iloc[2])
+
+
+def test_aggregate_flights_reads_partition_directory(flights_csv, flights_partitions):
+    pd.testing.assert_frame_equal(
+        aggregate_flights(flights_partitions, chunksize=2, top_origins=1),
+        aggregate_flights(flights_csv, chunksize=2, top_origins=1),
+    )
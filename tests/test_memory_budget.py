@@ -0,0 +1,61 @@
+import json
+
+import pytest
+
+import instrumentation
+from memory_budget import (
+    MIN_CHUNK_ROWS,
+    PARSER_WORKER_BYTES,
+    block_elements,
+    chunk_rows,
+    parse_size,
+    track_memory,
+    worker_count,
+)
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [("512M", 512 * 1024**2), ("4G", 4 * 1024**3), ("1.5g", int(1.5 * 1024**3)), ("800", 800 * 1024**2), ("2GB", 2 * 1024**3)],
+)
+def test_parse_size(text, expected):
+    assert parse_size(text) == expected
+
+
+def test_parse_size_rejects_garbage():
+    with pytest.raises(ValueError, match="inválido"):
+        parse_size("lots")
+
+
+def test_budget_bounds_parameters():
+    budget = parse_size("1G")
+    assert chunk_rows(None, 500_000) == 500_000
+    assert chunk_rows(budget, 5_000_000) < 5_000_000
+    assert chunk_rows(parse_size("1M"), 500_000) == MIN_CHUNK_ROWS
+
+    assert worker_count(None, 8) == 8
+    assert worker_count(budget, 8) == 2
+    assert worker_count(parse_size("64M"), 8) == 1
+    assert worker_count(parse_size("2G"), 8, PARSER_WORKER_BYTES) == 5
+
+    assert block_elements(None, 4_000_000) == 4_000_000
+    assert block_elements(parse_size("64M"), 4_000_000) == 1_048_576
+
+
+def test_track_memory_reports_stage(tmp_path, capsys, monkeypatch):
+    monkeypatch.setenv(instrumentation.ENV_VAR, "0")
+    path = instrumentation.enable(tmp_path)
+    try:
+        with track_memory("stage-x", budget=1, trace=True):
+            data = [bytes(1024) for _ in range(2000)]
+        del data
+    finally:
+        instrumentation.disable()
+
+    out = capsys.readouterr().out
+    assert "stage-x" in out and "pico de alocações Python" in out
+    assert "acima do orçamento" in out
+
+    record = json.loads(path.read_text().splitlines()[0])
+    assert record["type"] == "memory" and record["stage"] == "stage-x"
+    assert record["traced_peak_bytes"] >= 2000 * 1024
@@ -0,0 +1,162 @@
+import os
+import threading
+import time
+
+import pytest
+
+from pipeline import is_up_to_date, plan, run_pipeline
+
+
+@pytest.fixture
+def stages(tmp_path):
+    raw = tmp_path / "raw.txt"
+    raw.write_text("raw")
+    return {
+        "fetch-a": {"deps": [], "inputs": [], "outputs": [tmp_path / "a.txt"]},
+        "fetch-b": {"deps": [], "inputs": [raw], "outputs": [tmp_path / "b.txt"]},
+        "combine": {
+            "deps": ["fetch-a", "fetch-b"],
+            "inputs": [tmp_path / "a.txt", tmp_path / "b.txt"],
+            "outputs": [tmp_path / "c.txt"],
+        },
+    }
+
+
+def _writer(stages, calls):
+    def run_stage(name):
+        calls.append(name)
+        for output in stages[name]["outputs"]:
+            output.write_text(name)
+        return stages[name]["outputs"]
+    return run_stage
+
+
+def test_plan_orders_dependencies_first(stages):
+    assert plan(stages, ["combine"]) == ["fetch-a", "fetch-b", "combine"]
+    assert plan(stages, ["fetch-b"]) == ["fetch-b"]
+    with pytest.raises(ValueError, match="desconhecidas"):
+        plan(stages, ["nope"])
+
+
+def test_plan_detects_cycles():
+    cyclic = {
+        "a": {"deps": ["b"], "inputs": [], "outputs": []},
+        "b": {"deps": ["a"], "inputs": [], "outputs": []},
+    }
+    with pytest.raises(ValueError, match="cíclica"):
+        plan(cyclic)
+
+
+def test_run_pipeline_then_skips_up_to_date_stages(stages):
+    calls = []
+    status = run_pipeline(_writer(stages, calls), stages=stages, jobs=2)
+    assert status == {"fetch-a": "ok", "fetch-b": "ok", "combine": "ok"}
+    assert calls.index("combine") == 2
+
+    calls.clear()
+    status = run_pipeline(_writer(stages, calls), stages=stages, jobs=2)
+    assert calls == []
+    assert set(status.values()) == {"skipped"}
+
+
+def test_newer_input_reruns_stage_and_dependents(stages, tmp_path):
+    run_pipeline(_writer(stages, []), stages=stages)
+    raw = tmp_path / "raw.txt"
+    future = (tmp_path / "c.txt").stat().st_mtime + 10
+    os.utime(raw, (future, future))
+
+    calls = []
+    status = run_pipeline(_writer(stages, calls), stages=stages)
+    assert status == {"fetch-a": "skipped", "fetch-b": "ok", "combine": "ok"}
+    assert calls == ["fetch-b", "combine"]
+    assert is_up_to_date(stages["combine"])
+
+
+def test_independent_stages_run_concurrently(stages):
+    # fetch-a e fetch-b só terminam se estiverem rodando ao mesmo tempo
+    barrier = threading.Barrier(2, timeout=5)
+    write = _writer(stages, [])
+
+    def run_stage(name):
+        if name != "combine":
+            barrier.wait()
+        return write(name)
+
+    status = run_pipeline(run_stage, stages=stages, jobs=2)
+    assert status["combine"] == "ok"
+
+
+def test_failed_stage_blocks_dependents(stages):
+    def run_stage(name):
+        if name == "fetch-b":
+            raise RuntimeError("sem rede")
+        return _writer(stages, [])(name)
+
+    status = run_pipeline(run_stage, stages=stages)
+    assert status == {"fetch-a": "ok", "fetch-b": "failed", "combine": "blocked"}
+
+
+def test_stage_returning_without_outputs_fails(stages, tmp_path, capsys):
+    def run_stage(name):
+        # Como um `main` que avisa da entrada ausente e retorna None
+        if name != "fetch-b":
+            return _writer(stages, [])(name)
+
+    status = run_pipeline(run_stage, stages=stages)
+    assert status == {"fetch-a": "ok", "fetch-b": "failed", "combine": "blocked"}
+    assert "sem gerar as saídas" in capsys.readouterr().out
+
+    # Saída antiga que a etapa não informou continua sendo falha
+    (tmp_path / "b.txt").write_text("antigo")
+    past = (tmp_path / "raw.txt").stat().st_mtime - 10
+    os.utime(tmp_path / "b.txt", (past, past))
+    assert run_pipeline(run_stage, stages=stages, targets=["fetch-b"]) == {"fetch-b": "failed"}
+
+
+def test_state_file_tracks_reported_outputs(tmp_path):
+    raw_dir = tmp_path / "raw"
+    raw_dir.mkdir()
+    out_dir = tmp_path / "parts"
+    out_dir.mkdir()
+    (raw_dir / "q1.asc").write_text("1")
+    (out_dir / "stale.csv").write_text("de uma métrica que não existe mais")
+    stages = {
+        "parse": {"deps": [], "inputs": [raw_dir / "*.asc"], "outputs": [out_dir / "*.csv"]},
+    }
+    calls = []
+
+    def run_stage(name):
+        # Como o `fetch-flights`: só grava as partições que faltam
+        calls.append(name)
+        outputs = []
+        for raw in sorted(raw_dir.glob("*.asc")):
+            part = out_dir / f"{raw.stem}.csv"
+            if not part.exists():
+                part.write_text(raw.read_text())
+            outputs.append(part)
+        return outputs
+
+    state = tmp_path / "state.json"
+    past = time.time() - 100
+    os.utime(out_dir / "stale.csv", (past, past))
+    assert run_pipeline(run_stage, stages=stages, state_file=state) == {"parse": "ok"}
+    assert run_pipeline(run_stage, stages=stages, state_file=state) == {"parse": "skipped"}
+
+    # Um trimestre novo (mesmo com data antiga) roda a etapa uma vez, que não
+    # regrava as partições em dia e não falha por causa delas
+    (raw_dir / "q2.asc").write_text("2")
+    os.utime(raw_dir / "q2.asc", (past, past))
+    assert run_pipeline(run_stage, stages=stages, state_file=state) == {"parse": "ok"}
+    assert run_pipeline(run_stage, stages=stages, state_file=state) == {"parse": "skipped"}
+    assert calls == ["parse", "parse"]
+
+    # Saída registrada removida também faz a etapa rodar de novo
+    (out_dir / "q1.csv").unlink()
+    assert run_pipeline(run_stage, stages=stages, state_file=state) == {"parse": "ok"}
+
+
+def test_dry_run_does_not_execute(stages):
+    calls = []
+    status = run_pipeline(_writer(stages, calls), stages=stages, dry_run=True)
+    assert calls == []
+    assert set(status.values()) == {"planned"}
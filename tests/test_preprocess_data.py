@@ -3,7 +3,13 @@ from pathlib import Path
 import pandas as pd
 from unittest.mock import patch, MagicMock
 
-from preprocess_data import main as preprocess_main
+from preprocess_data import (
+    main as preprocess_main,
+    detect_metric_bounds,
+    process_single_file,
+    LINHA_DATAS,
+)
+from tourism_store import long_to_wide, to_store_frame
 from config import DATA_PROCESSED, DATA_RAW
 
 # Mock data for testing
@@ -50,6 +56,63 @@ def mock_excel_files(tmp_path):
 
     return raw_dir
 
+def _raw_sheet(names):
+    """Monta uma planilha bruta com a coluna de nomes após a linha de datas."""
+    rows = [[None, None, None] for _ in range(LINHA_DATAS + 1)]
+    rows += [[name, 1.0, 2.0] if name is not None else [None, None, None] for name in names]
+    return pd.DataFrame(rows)
+
+
+def test_detect_metric_bounds_stops_at_footer():
+    df = _raw_sheet([None, "Visitors", "Room Nights", "Source: LVCVA", "Other"])
+    assert detect_metric_bounds(df) == (LINHA_DATAS + 2, LINHA_DATAS + 4)
+
+
+def test_detect_metric_bounds_stops_at_blank_name():
+    df = _raw_sheet(["Visitors", "   ", "Room Nights"])
+    assert detect_metric_bounds(df) == (LINHA_DATAS + 1, LINHA_DATAS + 2)
+
+
+def test_detect_metric_bounds_runs_to_end_and_handles_short_sheets():
+    df = _raw_sheet(["Visitors", "Room Nights"])
+    assert detect_metric_bounds(df) == (LINHA_DATAS + 1, len(df))
+    assert detect_metric_bounds(pd.DataFrame([[None]])) == (LINHA_DATAS + 1, LINHA_DATAS + 1)
+
+
+def _lvcva_sheet(names, base):
+    """Aba no layout LVCVA: métricas após a linha de datas, meses em colunas alternadas."""
+    rows = [[None] * 25 for _ in range(LINHA_DATAS + 1)]
+    for i, name in enumerate(names):
+        row = [name] + [None] * 24
+        for month, col in enumerate(range(1, 25, 2)):
+            row[col] = base + i * 100 + month
+        rows.append(row)
+    rows.append(["Source: LVCVA"] + [None] * 24)
+    return pd.DataFrame(rows)
+
+
+def test_process_single_file_reads_all_regions_in_one_pass(tmp_path, capsys):
+    path = tmp_path / "Executive Summary 2022.xlsx"
+    with pd.ExcelWriter(path) as writer:
+        _lvcva_sheet(["Visitors", "Room Rate"], 0).to_excel(
+            writer, sheet_name="Las Vegas 2022", header=False, index=False
+        )
+        _lvcva_sheet(["Visitors"], 1000).to_excel(
+            writer, sheet_name="Laughlin 2022", header=False, index=False
+        )
+
+    long_df = process_single_file(path, 2022, ["Las Vegas", "Laughlin", "Mesquite"])
+
+    assert list(long_df.columns) == ["Region", "Year", "Month", "Metric", "Value"]
+    assert set(long_df["Region"]) == {"Las Vegas", "Laughlin"}
+    assert len(long_df) == 12 * 3
+    assert "aba 'Mesquite 2022' não encontrada" in capsys.readouterr().out
+
+    wide = long_to_wide(to_store_frame(long_df), "Laughlin")
+    assert list(wide.columns) == ["Visitors", "Year", "Month"]
+    assert wide.loc["2022-04-01", "Visitors"] == 1003
+
+
 @pytest.fixture
 def mock_processed_dir(tmp_path):
     processed_dir = tmp_path / "data" / "processed"
@@ -0,0 +1,225 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from reddit_async import AsyncRedditClient, RateLimiter, collect, flatten_comments
+
+
+def _comment(cid, body, replies=()):
+    return {
+        "kind": "t1",
+        "data": {
+            "id": cid,
+            "body": body,
+            "author": f"user_{cid}",
+            "score": 1,
+            "created_utc": 1_700_000_000,
+            "replies": {"kind": "Listing", "data": {"children": list(replies)}} if replies else "",
+        },
+    }
+
+
+POSTS = {
+    "p1": [
+        _comment("c1", "knitting is so ugly", [_comment("c2", "nothing to see"), _comment("c3", "ugly knitting again")]),
+        {"kind": "more", "data": {"id": "m1", "count": 5, "children": ["c9"], "depth": 0}},
+    ],
+    "p2": [_comment("c4", "I love knitting")],
+    "p3": [_comment("c5", "Knitting, ugly as always")],
+}
+
+# Comentários recolhidos, devolvidos por /api/morechildren
+MORE_CHILDREN = {
+    "c9": [
+        _comment("c9", "deep ugly knitting"),
+        {"kind": "more", "data": {"id": "m2", "count": 1, "children": ["c10"], "depth": 2}},
+    ],
+    "c10": [_comment("c10", "deepest knitting, still ugly")],
+}
+
+
+class FakeReddit:
+    """API falsa do Reddit: token OAuth, busca paginada e árvores de comentários."""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.in_flight = self.max_in_flight = 0
+        self.paths = []
+        self.fail_once = set()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, payload, headers=None):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                assert self.headers["Authorization"].startswith("Basic ")
+                self._send(200, {"access_token": "tok", "expires_in": 3600})
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                with fake.lock:
+                    fake.paths.append(url.path)
+                    fake.in_flight += 1
+                    fake.max_in_flight = max(fake.max_in_flight, fake.in_flight)
+                try:
+                    time.sleep(fake.delay)
+                    if self.headers.get("Authorization") != "bearer tok":
+                        return self._send(401, {})
+                    if url.path in fake.fail_once:
+                        fake.fail_once.discard(url.path)
+                        return self._send(429, {}, {"Retry-After": "0"})
+                    self._send(200, *fake.route(url.path, query))
+                finally:
+                    with fake.lock:
+                        fake.in_flight -= 1
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def route(self, path, query):
+        if path == "/r/all/search":
+            ids = sorted(POSTS)
+            start = ids.index(query["after"][0][3:]) + 1 if "after" in query else 0
+            page = ids[start : start + int(query["limit"][0])]
+            after = f"t3_{page[-1]}" if page and page[-1] != ids[-1] else None
+            children = [{"kind": "t3", "data": {"id": pid, "subreddit": "crafts"}} for pid in page]
+            return {"kind": "Listing", "data": {"children": children, "after": after}}, None
+        if path == "/api/morechildren":
+            things = [node for cid in query["children"][0].split(",") for node in MORE_CHILDREN[cid]]
+            return {"json": {"data": {"things": things}}}, None
+        post_id = path.rsplit("/", 1)[-1]
+        post = {"kind": "Listing", "data": {"children": []}}
+        return [post, {"kind": "Listing", "data": {"children": POSTS[post_id]}}], None
+
+    def client(self, **kwargs):
+        return AsyncRedditClient(
+            "cid", "secret", "ua", api_base=self.url, auth_url=self.url + "/api/v1/access_token", **kwargs
+        )
+
+
+@pytest.fixture
+def fake_reddit():
+    fake = FakeReddit()
+    yield fake
+    fake.server.shutdown()
+
+
+def _collect(fake, pairs, comment_limit=5, more_requests=0, more_depth=None, **client_kwargs):
+    async def run():
+        async with fake.client(**client_kwargs) as client:
+            rows = await collect(client, pairs, 10, comment_limit, more_requests, more_depth)
+            return rows, client.requests
+
+    return asyncio.run(run())
+
+
+def test_flatten_comments_is_breadth_first_like_praw_and_keeps_more_nodes():
+    comments, more = flatten_comments({"data": {"children": POSTS["p1"]}})
+    assert [c["id"] for c in comments] == ["c1", "c2", "c3"]
+    assert [m["id"] for m in more] == ["m1"]
+
+    # CommentForest.list() do PRAW: nível a nível, na ordem de cada nível
+    tree = [
+        _comment("a", "", [_comment("a1", "", [_comment("a11", "")]), _comment("a2", "")]),
+        _comment("b", "", [_comment("b1", "")]),
+    ]
+    comments, _ = flatten_comments({"data": {"children": tree}})
+    assert [c["id"] for c in comments] == ["a", "b", "a1", "a2", "b1", "a11"]
+
+
+def test_collect_matches_comments_across_posts(fake_reddit):
+    fake_reddit.fail_once.add("/comments/p2")
+    rows, n_requests = _collect(fake_reddit, [("knitting", "ugly")], rate=None)
+
+    assert [r["comment_id"] for r in rows] == ["c1", "c3", "c5"]
+    assert rows[0]["pair"] == "knitting|ugly"
+    assert rows[0]["subreddit"] == "crafts"
+    assert rows[0]["word_count"] == 4
+    # 1 busca + 3 árvores de comentários + 1 repetição após o 429
+    assert n_requests == 5
+
+
+def test_concurrency_is_bounded_and_used(fake_reddit):
+    pairs = [("knitting", "ugly"), ("knit", "ugly"), ("knitting", "dumb")]
+    _collect(fake_reddit, pairs, concurrency=3, rate=None)
+    assert fake_reddit.max_in_flight == 3
+
+
+def test_search_paginates_and_respects_limit(fake_reddit, monkeypatch):
+    import reddit_async
+
+    monkeypatch.setattr(reddit_async, "SEARCH_PAGE_SIZE", 2)
+
+    async def run():
+        async with fake_reddit.client(rate=None) as client:
+            return [page async for page in client.search("q", limit=3)]
+
+    pages = asyncio.run(run())
+    assert [[p["id"] for p in page] for page in pages] == [["p1", "p2"], ["p3"]]
+
+
+@pytest.mark.parametrize(
+    "more_requests, more_depth, expected",
+    [
+        (0, None, ["c1", "c3", "c5"]),
+        (1, None, ["c1", "c3", "c9", "c5"]),
+        (5, 1, ["c1", "c3", "c9", "c5"]),
+        (5, None, ["c1", "c3", "c9", "c10", "c5"]),
+    ],
+)
+def test_more_comments_expansion_respects_budget_and_depth(fake_reddit, more_requests, more_depth, expected):
+    rows, _ = _collect(
+        fake_reddit, [("knitting", "ugly")], more_requests=more_requests, more_depth=more_depth, rate=None
+    )
+    assert [r["comment_id"] for r in rows] == expected
+    assert fake_reddit.paths.count("/api/morechildren") == len(expected) - 3
+
+
+def test_more_comments_expansion_stops_at_comment_limit(fake_reddit):
+    rows, _ = _collect(fake_reddit, [("knitting", "ugly")], comment_limit=2, more_requests=5, rate=None)
+    assert [r["comment_id"] for r in rows] == ["c1", "c3", "c5"]
+    assert "/api/morechildren" not in fake_reddit.paths
+
+
+def test_rate_limiter_spaces_requests():
+    async def run():
+        limiter = RateLimiter(rate=50)
+        start = time.monotonic()
+        await asyncio.gather(*(limiter.acquire() for _ in range(6)))
+        return time.monotonic() - start
+
+    assert asyncio.run(run()) >= 5 / 50 * 0.9
+
+
+def test_rate_limiter_waits_for_exhausted_quota():
+    limiter = RateLimiter(rate=None)
+    limiter.update({"x-ratelimit-remaining": "0", "x-ratelimit-reset": "0.2"})
+
+    async def run():
+        start = time.monotonic()
+        await limiter.acquire()
+        return time.monotonic() - start
+
+    assert asyncio.run(run()) >= 0.15
@@ -1,10 +1,12 @@
 import re
+from types import SimpleNamespace
 from unittest.mock import MagicMock
 
 import pytest
 
 from reddit_scraper import (
     enrich_row,
+    fetch_comments_for_pair,
     match_terms,
     init_reddit_client,
 )
@@ -50,3 +52,64 @@ def test_init_reddit_client_missing_env(monkeypatch):
     monkeypatch.delenv("REDDIT_USER_AGENT", raising=False)
     with pytest.raises(RuntimeError):
         init_reddit_client()
+
+
+def _comment(cid, body):
+    return SimpleNamespace(id=cid, body=body, author="a", score=1, created_utc=0)
+
+
+class FakeForest:
+    """Árvore com comentários recolhidos: cada `MoreComments` revela um comentário."""
+
+    def __init__(self, loaded, collapsed):
+        self.loaded = list(loaded)
+        self.collapsed = list(collapsed)
+        self.calls = []
+
+    def list(self):
+        return self.loaded + [SimpleNamespace(id=f"more_{c.id}") for c in self.collapsed]
+
+    def replace_more(self, limit=32, threshold=0):
+        self.calls.append(limit)
+        self.loaded += self.collapsed[:limit]
+        self.collapsed = self.collapsed[limit:]
+        return [SimpleNamespace() for _ in self.collapsed]
+
+
+def _fake_reddit(forest):
+    sub = SimpleNamespace(id="p1", subreddit="crafts", comments=forest)
+    reddit = MagicMock()
+    reddit.subreddit.return_value.search.return_value = [sub]
+    return reddit
+
+
+@pytest.mark.parametrize(
+    "more_requests, comments_limit, expected, calls",
+    [
+        (0, 5, ["c1"], [0]),
+        (1, 5, ["c1", "c2"], [1]),
+        (10, 5, ["c1", "c2", "c3"], [1, 1]),
+        (10, 2, ["c1", "c2"], [1]),
+        (10, 1, ["c1"], []),
+    ],
+)
+def test_fetch_comments_for_pair_expands_more_within_budget(
+    more_requests, comments_limit, expected, calls, monkeypatch
+):
+    import instrumentation
+
+    counters = {}
+    monkeypatch.setattr(
+        instrumentation, "count", lambda name, n=1: counters.__setitem__(name, counters.get(name, 0) + n)
+    )
+    forest = FakeForest(
+        [_comment("c1", "knitting is ugly"), _comment("x", "nothing")],
+        [_comment("c2", "ugly knitting"), _comment("c3", "knitting, ugly")],
+    )
+    rows = fetch_comments_for_pair(
+        _fake_reddit(forest), "knitting", "ugly", comments_limit=comments_limit, more_requests=more_requests
+    )
+    assert [r["comment_id"] for r in rows] == expected
+    assert forest.calls == calls
+    # Só as requisições de fato feitas contam
+    assert counters.get("reddit.more_requests", 0) == sum(calls)
@@ -33,3 +33,95 @@ def test_unknown_subcommand_raises_system_exit(monkeypatch):
     with pytest.raises(SystemExit) as err:
         run.main()
     assert err.value.code == 2
+
+
+def test_pipeline_subcommand_runs_stages_with_default_args(monkeypatch):
+    stub = types.ModuleType("pipeline")
+
+    def fake_run_pipeline(run_stage, targets, jobs, force, dry_run, state_file):
+        assert (targets, jobs, force, dry_run) == (["join-data"], 2, False, False)
+        assert state_file.name == "pipeline_state.json"
+        return {"join-data": "ok"}
+
+    stub.run_pipeline = fake_run_pipeline
+    stub.STATE_FILE = run.DATA_PROCESSED / "pipeline_state.json"
+    monkeypatch.setitem(sys.modules, "pipeline", stub)
+    monkeypatch.setattr(sys, "argv", ["run.py", "pipeline", "--targets", "join-data", "--jobs", "2"])
+    run.main()
+
+
+def test_fetch_flights_jobs_fit_memory_budget(monkeypatch, capsys):
+    import flights_parser
+
+    calls = {}
+
+    def fake_write_flight_partitions(output_dir, **kwargs):
+        calls.update(kwargs)
+        return {}
+
+    monkeypatch.setattr(flights_parser, "write_flight_partitions", fake_write_flight_partitions)
+    monkeypatch.setattr(sys, "argv", ["run.py", "--memory-budget", "512M", "fetch-flights", "--jobs", "8"])
+    run.main()
+    assert calls["jobs"] == 1
+
+
+def test_sample_profile_is_saved_when_stage_fails(monkeypatch, tmp_path, capsys):
+    import flights_parser
+    import sampling_profiler
+
+    def failing(*args, **kwargs):
+        raise RuntimeError("Failed to process: x")
+
+    monkeypatch.setattr(flights_parser, "write_flight_partitions", failing)
+    monkeypatch.setattr(sampling_profiler, "PERF_REPORTS", tmp_path)
+    monkeypatch.setattr(sys, "argv", ["run.py", "--sample-profile", "fetch-flights"])
+    with pytest.raises(RuntimeError):
+        run.main()
+    assert sorted(p.suffix for p in tmp_path.iterdir()) == [".json", ".txt"]
+
+
+def test_more_depth_requires_async(monkeypatch, capsys):
+    monkeypatch.setattr(sys, "argv", ["run.py", "fetch-reddit", "--expand-more", "4", "--more-depth", "2"])
+    with pytest.raises(SystemExit):
+        run.main()
+    assert "--async" in capsys.readouterr().err
+
+
+# Orçamento de importação do run.py (µs, acumulado): folgado para máquinas
+# lentas, mas bem abaixo do custo de importar pandas (centenas de ms)
+RUN_IMPORT_BUDGET_US = 150_000
+HEAVY_MODULES = {"pandas", "numpy", "matplotlib", "seaborn", "praw", "bs4", "pyarrow"}
+
+
+def _import_times(code):
+    import subprocess
+    from pathlib import Path
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=Path(run.__file__).parent,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_run_import_is_lazy_and_fast():
+    times = _import_times("import run; run.build_parser().format_help()")
+
+    assert not HEAVY_MODULES & {name.split(".")[0] for name in times}
+    assert times["run"] < RUN_IMPORT_BUDGET_US
+
+
+def test_stage_modules_defer_optional_imports():
+    times = _import_times("import analyze_processed_data, reddit_scraper, artists_info")
+
+    imported = {name.split(".")[0] for name in times}
+    assert not {"matplotlib", "seaborn", "praw", "bs4"} & imported
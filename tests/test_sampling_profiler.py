@@ -0,0 +1,41 @@
+import json
+import time
+
+from sampling_profiler import SamplingProfiler
+
+
+def busy_loop(seconds):
+    end = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < end:
+        total += sum(range(200))
+    return total
+
+
+def test_samples_hot_function(tmp_path):
+    with SamplingProfiler(interval=0.002) as profiler:
+        busy_loop(0.3)
+
+    assert profiler.samples > 10
+    lines = profiler.collapsed()
+    assert any("busy_loop (test_sampling_profiler.py:" in line for line in lines)
+    stack, count = lines[0].rsplit(" ", 1)
+    assert stack.startswith("MainThread;") and int(count) > 0
+    assert not any(line.startswith("sampling-profiler") for line in lines)
+
+
+def test_speedscope_output_is_consistent(tmp_path):
+    with SamplingProfiler(interval=0.002) as profiler:
+        busy_loop(0.1)
+
+    collapsed, speedscope = profiler.save("test", output_dir=tmp_path)
+    assert collapsed.read_text().strip()
+
+    data = json.loads(speedscope.read_text())
+    n_frames = len(data["shared"]["frames"])
+    for profile in data["profiles"]:
+        assert profile["type"] == "sampled"
+        assert len(profile["samples"]) == len(profile["weights"])
+        assert all(0 <= i < n_frames for sample in profile["samples"] for i in sample)
+    names = {frame["name"] for frame in data["shared"]["frames"]}
+    assert "busy_loop" in names
@@ -0,0 +1,44 @@
+import pandas as pd
+import pytest
+
+from tourism_store import load_store, long_to_wide, save_store, to_store_frame
+
+
+@pytest.fixture
+def long_df():
+    rows = []
+    for year in (2021, 2022):
+        for month in (3, 4):
+            rows.append(("Las Vegas", year, month, "Visitors", year * 10 + month))
+            rows.append(("Las Vegas", year, month, "Average Room Rate", month * 1.5))
+            rows.append(("Laughlin", year, month, "Visitors", month))
+    return pd.DataFrame(rows, columns=["Region", "Year", "Month", "Metric", "Value"])
+
+
+def test_to_store_frame_types_and_order(long_df):
+    store = to_store_frame(long_df)
+
+    assert list(store.columns) == ["Date", "Region", "Metric", "Value"]
+    assert isinstance(store["Metric"].dtype, pd.CategoricalDtype)
+    assert list(store["Metric"].cat.categories) == ["Visitors", "Average Room Rate"]
+    assert store["Value"].dtype == "float64"
+    assert store["Date"].is_monotonic_increasing
+
+
+def test_save_and_load_store_with_filters(tmp_path, long_df):
+    path = save_store(to_store_frame(long_df), tmp_path / "store.parquet")
+
+    df = load_store(path, metrics=["Visitors"], regions=["Las Vegas"], start="2022-01-01")
+
+    assert df.index.name == "Date"
+    assert list(df.index) == list(pd.to_datetime(["2022-03-01", "2022-04-01"]))
+    assert set(df["Metric"]) == {"Visitors"}
+    assert list(df["Value"]) == [20223.0, 20224.0]
+
+
+def test_long_to_wide_keeps_metric_order_and_date_index(long_df):
+    wide = long_to_wide(to_store_frame(long_df), "Las Vegas")
+
+    assert list(wide.columns) == ["Visitors", "Average Room Rate", "Year", "Month"]
+    assert wide.loc["2021-04-01", "Visitors"] == 20214.0
+    assert list(wide["Year"]) == [2021, 2021, 2022, 2022]
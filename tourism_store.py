@@ -0,0 +1,102 @@
+"""
+tourism_store.py
+
+Armazenamento tipado dos dados de turismo de Las Vegas pré-processados.
+
+Os dados ficam em formato longo (Date, Region, Metric, Value) num arquivo
+Parquet colunar, ordenado por data. ``Region`` e ``Metric`` são gravadas como
+colunas categóricas (códigos inteiros + dicionário de nomes) e ``Value`` como
+float64, de modo que nenhuma inferência de tipos é necessária na leitura.
+
+Como o Parquet guarda estatísticas por grupo de linhas, a leitura com filtros
+de métrica, região ou intervalo de datas descarta os blocos irrelevantes sem
+carregar o arquivo inteiro.
+"""
+
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+from config import DATA_PROCESSED
+
+STORE_FILE = DATA_PROCESSED / "vegas_tourism.parquet"
+STORE_COLUMNS = ["Date", "Region", "Metric", "Value"]
+# Linhas por grupo do Parquet: blocos menores permitem descartar mais dados
+# ao filtrar por data, ao custo de um pouco mais de metadados.
+ROW_GROUP_SIZE = 4096
+
+
+def to_store_frame(long_df: pd.DataFrame) -> pd.DataFrame:
+    """Converte a tabela longa (Region, Year, Month, Metric, Value) para o formato do store."""
+    # Categorias na ordem de aparição, preservando a ordem das planilhas
+    regions = long_df["Region"].astype(str)
+    metrics = long_df["Metric"].astype(str)
+    store = pd.DataFrame(
+        {
+            "Date": pd.to_datetime(
+                {"year": long_df["Year"], "month": long_df["Month"], "day": 1}
+            ),
+            "Region": pd.Categorical(regions, categories=regions.unique()),
+            "Metric": pd.Categorical(metrics, categories=metrics.unique()),
+            "Value": pd.to_numeric(long_df["Value"], errors="coerce").astype("float64"),
+        }
+    )
+    return store.sort_values(["Date", "Region", "Metric"], kind="stable").reset_index(drop=True)
+
+
+def save_store(store_df: pd.DataFrame, path: Path = STORE_FILE) -> Path:
+    """Grava o store em Parquet, ordenado por data."""
+    store_df[STORE_COLUMNS].to_parquet(path, index=False, row_group_size=ROW_GROUP_SIZE)
+    return path
+
+
+def load_store(
+    path: Path = STORE_FILE,
+    metrics: Optional[list[str]] = None,
+    regions: Optional[list[str]] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+) -> pd.DataFrame:
+    """Lê o store aplicando os filtros diretamente no Parquet.
+
+    ``start`` e ``end`` são datas inclusivas (ex: ``"2022-01-01"``). O
+    resultado é indexado por ``Date``.
+    """
+    filters = []
+    if metrics:
+        filters.append(("Metric", "in", list(metrics)))
+    if regions:
+        filters.append(("Region", "in", list(regions)))
+    if start is not None:
+        filters.append(("Date", ">=", pd.Timestamp(start)))
+    if end is not None:
+        filters.append(("Date", "<=", pd.Timestamp(end)))
+
+    df = pd.read_parquet(path, columns=STORE_COLUMNS, filters=filters or None)
+    return df.set_index("Date")
+
+
+def long_to_wide(store_df: pd.DataFrame, region: str) -> pd.DataFrame:
+    """Reconstrói a tabela larga (uma coluna por métrica) de uma região.
+
+    Aceita o store indexado por data ou com a coluna ``Date``. As métricas
+    mantêm a ordem das categorias e as colunas ``Year`` e ``Month`` vêm ao
+    final, como na saída original do pré-processamento.
+    """
+    if "Date" in store_df.columns:
+        store_df = store_df.set_index("Date")
+    subset = store_df[store_df["Region"] == region]
+    metric = subset["Metric"]
+    if isinstance(metric.dtype, pd.CategoricalDtype):
+        metric = metric.cat.remove_unused_categories()
+
+    wide = subset.pivot_table(
+        index=subset.index, columns=metric, values="Value", aggfunc="first", observed=True
+    )
+    wide.columns = wide.columns.astype(str)
+    wide.columns.name = None
+    wide.index.name = "Date"
+    wide["Year"] = wide.index.year
+    wide["Month"] = wide.index.month
+    return wide
@@ -1,47 +1,52 @@
-import time
 import functools
 import cProfile
 import pstats
 import io
-import os
+
+import instrumentation
+from config import PERF_REPORTS
+
 
 def time_function(func):
     """
-    Decorator that measures the execution time of a function and prints it.
+    Decorator that records the execution time of a function as an
+    instrumentation span (no-op unless instrumentation is enabled).
     """
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        start_time = time.perf_counter()
-        result = func(*args, **kwargs)
-        end_time = time.perf_counter()
-        run_time = end_time - start_time
-        print(f"\n⏱️ {func.__name__} executed in {run_time:.4f} seconds")
-        return result
-    return wrapper
+    return instrumentation.instrumented(func.__name__)(func)
+
 
 def profile_function(func):
     """
-    Decorator that profiles a function and saves the stats to a file.
+    Decorator that profiles a function with cProfile and saves the stats to
+    ``PERF_REPORTS/<name>_profile.txt``.
+
+    Profiling only happens when instrumentation is enabled (``TCC_PROFILE=1``
+    or ``run.py --profile``); otherwise the function runs unwrapped.
     """
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
+        if not instrumentation.enabled():
+            return func(*args, **kwargs)
+
         profiler = cProfile.Profile()
         profiler.enable()
-        result = func(*args, **kwargs)
-        profiler.disable()
-        
+        try:
+            with instrumentation.span(func.__name__):
+                result = func(*args, **kwargs)
+        finally:
+            profiler.disable()
+
         s = io.StringIO()
         sortby = pstats.SortKey.CUMULATIVE
         ps = pstats.Stats(profiler, stream=s).sort_stats(sortby)
         ps.print_stats()
-        
-        report_path = f"performance_reports/{func.__name__}_profile.txt"
-        os.makedirs(os.path.dirname(report_path), exist_ok=True)
 
+        PERF_REPORTS.mkdir(parents=True, exist_ok=True)
+        report_path = PERF_REPORTS / f"{func.__name__}_profile.txt"
         with open(report_path, "w") as f:
             f.write(s.getvalue())
-            
+
         print(f"\n📊 Performance profile for {func.__name__} saved to {report_path}")
-        
+
         return result
     return wrapper